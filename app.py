@@ -1,15 +1,33 @@
 import streamlit as st
-import numpy as np
-import pandas as pd
-import joblib
-import plotly.graph_objects as go
-from datetime import datetime
-import time
+import os
+import tempfile
+import uuid
+
+# pandas, plotly (charts.py) and the model's own dependencies are imported on
+# first use, not here: the first page only needs streamlit and numpy
+# (`python benchmark.py --startup` shows the per-package import breakdown).
+from assets import stylesheet_tag
+from batch import CHUNK_ROWS
+from drift import DRIFT
+from history import get_store
+from inference import LEVELS
+from instrumentation import TIMINGS
+from jobs import DONE, FAILED, JobRejected, get_jobs
+from metrics import MODEL_SECONDS, PREDICTION_SECONDS, PREDICTIONS, serve_metrics, track_session
+from registry import get_registry
+from result_cache import RESULTS
 
 # ---------------------- Load Model + Assets ----------------------
-model = joblib.load("student_model.joblib")
-scaler = joblib.load("scaler.joblib")
-feature_columns = joblib.load("model_features.joblib")
+# Loaded once per server process and shared by every session. New model
+# versions are loaded, validated and warmed up in the background and swapped
+# in between predictions (see registry.py), so deploys don't need a restart.
+# The first version loads in the background as well, so the page renders
+# while it does; registry.current() waits for it.
+registry = get_registry()
+# Prometheus metrics at http://127.0.0.1:8602/metrics and/or METRICS_FILE (see metrics.py);
+# every rerun marks this session as active for student_active_sessions
+serve_metrics()
+track_session()
 
 # ---------------------- Page Styling ----------------------
 st.set_page_config(
@@ -18,379 +36,24 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Premium Glassmorphism + Animations CSS
-st.markdown("""
-    <style>
-        @import url('https://fonts.googleapis.com/css2?family=Plus+Jakarta+Sans:wght@400;500;600;700;800&display=swap');
-        
-        * {
-            font-family: 'Plus Jakarta Sans', sans-serif;
-        }
-        
-        /* Animated gradient background */
-        .main {
-            background: linear-gradient(-45deg, #667eea, #764ba2, #5f72bd, #667eea);
-            background-size: 400% 400%;
-            animation: gradient 15s ease infinite;
-            min-height: 100vh;
-            padding: 40px 20px;
-        }
-        
-        @keyframes gradient {
-            0% { background-position: 0% 50%; }
-            50% { background-position: 100% 50%; }
-            100% { background-position: 0% 50%; }
-        }
-        
-        .stApp {
-            background: linear-gradient(-45deg, #667eea, #764ba2, #5f72bd, #667eea);
-            background-size: 400% 400%;
-            animation: gradient 15s ease infinite;
-        }
-        
-        /* Fade in animation */
-        @keyframes fadeInUp {
-            from {
-                opacity: 0;
-                transform: translateY(30px);
-            }
-            to {
-                opacity: 1;
-                transform: translateY(0);
-            }
-        }
-        
-        /* Slide in animation */
-        @keyframes slideInRight {
-            from {
-                opacity: 0;
-                transform: translateX(50px);
-            }
-            to {
-                opacity: 1;
-                transform: translateX(0);
-            }
-        }
-        
-        /* Scale animation */
-        @keyframes scaleIn {
-            from {
-                opacity: 0;
-                transform: scale(0.8);
-            }
-            to {
-                opacity: 1;
-                transform: scale(1);
-            }
-        }
-        
-        /* Pulse animation */
-        @keyframes pulse {
-            0%, 100% {
-                opacity: 1;
-            }
-            50% {
-                opacity: 0.7;
-            }
-        }
-        a
-        /* Floating animation */
-        @keyframes float {
-            0%, 100% {
-                transform: translateY(0px);
-            }
-            50% {
-                transform: translateY(-10px);
-            }
-        }
-        
-        /* Glow animation */
-        @keyframes glow {
-            0%, 100% {
-                box-shadow: 0 8px 32px 0 rgba(31, 38, 135, 0.37), 0 0 20px rgba(255, 255, 255, 0.1);
-            }
-            50% {
-                box-shadow: 0 8px 32px 0 rgba(31, 38, 135, 0.5), 0 0 40px rgba(255, 255, 255, 0.2);
-            }
-        }
-        
-        /* Title styling with animation */
-        h1 {
-            color: white !important;
-            font-weight: 800;
-            text-align: center;
-            text-shadow: 0 4px 20px rgba(0, 0, 0, 0.2);
-            font-size: 3.5em;
-            margin-bottom: 10px;
-            animation: fadeInUp 0.8s ease-out;
-        }
-        
-        /* Subtitle */
-        .subtitle {
-            text-align: center;
-            color: rgba(255, 255, 255, 0.95);
-            font-size: 1.1em;
-            margin-bottom: 40px;
-            animation: fadeInUp 0.8s ease-out 0.2s both;
-            font-weight: 500;
-            letter-spacing: 0.5px;
-        }
-        
-        /* Premium glass card */
-        .glass-card {
-            background: rgba(255, 255, 255, 0.15);
-            backdrop-filter: blur(20px);
-            -webkit-backdrop-filter: blur(20px);
-            border-radius: 24px;
-            border: 1px solid rgba(255, 255, 255, 0.25);
-            padding: 35px;
-            box-shadow: 0 8px 32px 0 rgba(31, 38, 135, 0.37);
-            margin-bottom: 25px;
-            animation: fadeInUp 0.8s ease-out 0.3s both;
-            transition: all 0.3s ease;
-        }
-        
-        .glass-card:hover {
-            background: rgba(255, 255, 255, 0.2);
-            border: 1px solid rgba(255, 255, 255, 0.35);
-            transform: translateY(-5px);
-            box-shadow: 0 12px 40px 0 rgba(31, 38, 135, 0.45);
-        }
-        
-        /* Input section card */
-        .input-section {
-            background: rgba(255, 255, 255, 0.12);
-            backdrop-filter: blur(25px);
-            -webkit-backdrop-filter: blur(25px);
-            border-radius: 28px;
-            border: 1.5px solid rgba(255, 255, 255, 0.2);
-            padding: 40px;
-            box-shadow: inset 0 0 30px rgba(255, 255, 255, 0.1), 0 8px 32px rgba(31, 38, 135, 0.37);
-            margin-bottom: 30px;
-            animation: fadeInUp 0.8s ease-out 0.25s both;
-        }
-        
-        /* Input labels with styling */
-        .stNumberInput > label,
-        .stSelectbox > label {
-            color: white !important;
-            font-weight: 700;
-            font-size: 1.1em;
-            margin-bottom: 10px;
-            text-shadow: 0 2px 4px rgba(0, 0, 0, 0.2);
-        }
-        
-        /* Input fields styling */
-        .stNumberInput > div > div > input,
-        .stSelectbox > div > div > select {
-            background: rgba(255, 255, 255, 0.25) !important;
-            backdrop-filter: blur(10px);
-            -webkit-backdrop-filter: blur(10px);
-            border: 1.5px solid rgba(255, 255, 255, 0.3) !important;
-            border-radius: 14px;
-            color: white !important;
-            padding: 14px 16px !important;
-            font-size: 1em;
-            font-weight: 500;
-            transition: all 0.3s ease;
-        }
-        
-        .stNumberInput > div > div > input:focus,
-        .stSelectbox > div > div > select:focus {
-            background: rgba(255, 255, 255, 0.35) !important;
-            border: 1.5px solid rgba(255, 255, 255, 0.5) !important;
-            box-shadow: 0 0 20px rgba(255, 255, 255, 0.2);
-        }
-        
-        /* Input placeholder */
-        .stNumberInput > div > div > input::placeholder {
-            color: rgba(255, 255, 255, 0.6);
-        }
-        
-        /* Premium button styling */
-        .stButton > button {
-            background: linear-gradient(135deg, rgba(255, 255, 255, 0.3), rgba(255, 255, 255, 0.15));
-            backdrop-filter: blur(15px);
-            -webkit-backdrop-filter: blur(15px);
-            color: white !important;
-            border: 1.5px solid rgba(255, 255, 255, 0.4) !important;
-            border-radius: 18px;
-            padding: 16px 40px !important;
-            font-weight: 700;
-            font-size: 1.1em;
-            width: 100%;
-            transition: all 0.3s cubic-bezier(0.25, 0.46, 0.45, 0.94);
-            text-transform: uppercase;
-            letter-spacing: 1.2px;
-            box-shadow: 0 8px 32px rgba(31, 38, 135, 0.3);
-            animation: fadeInUp 0.8s ease-out 0.4s both;
-        }
-        
-        .stButton > button:hover {
-            background: linear-gradient(135deg, rgba(255, 255, 255, 0.4), rgba(255, 255, 255, 0.25));
-            transform: translateY(-3px) scale(1.02);
-            box-shadow: 0 12px 40px rgba(31, 38, 135, 0.45);
-            border: 1.5px solid rgba(255, 255, 255, 0.6) !important;
-        }
-        
-        .stButton > button:active {
-            transform: translateY(-1px) scale(0.98);
-        }
-        
-        /* Result card - Premium */
-        .result-card {
-            background: linear-gradient(135deg, rgba(255, 255, 255, 0.2), rgba(255, 255, 255, 0.1));
-            backdrop-filter: blur(20px);
-            -webkit-backdrop-filter: blur(20px);
-            border: 1.5px solid rgba(255, 255, 255, 0.35);
-            padding: 35px;
-            border-radius: 24px;
-            color: white;
-            font-size: 1.8em;
-            text-align: center;
-            font-weight: 800;
-            margin: 30px 0;
-            box-shadow: 0 8px 32px 0 rgba(31, 38, 135, 0.37), inset 0 0 20px rgba(255, 255, 255, 0.1);
-            animation: scaleIn 0.6s ease-out;
-            letter-spacing: 0.5px;
-        }
-        
-        /* Category badge */
-        .category-badge {
-            display: inline-block;
-            background: linear-gradient(135deg, rgba(255, 255, 255, 0.25), rgba(255, 255, 255, 0.1));
-            border: 1.5px solid rgba(255, 255, 255, 0.4);
-            color: white;
-            padding: 12px 30px;
-            border-radius: 50px;
-            font-weight: 700;
-            font-size: 1.3em;
-            margin: 10px 0;
-            animation: slideInRight 0.6s ease-out 0.2s both;
-            box-shadow: 0 4px 15px rgba(0, 0, 0, 0.2);
-        }
-        
-        /* Performance score card */
-        .score-card {
-            background: rgba(255, 255, 255, 0.15);
-            backdrop-filter: blur(15px);
-            border-radius: 20px;
-            border: 1px solid rgba(255, 255, 255, 0.25);
-            padding: 25px;
-            text-align: center;
-            color: white;
-            margin: 15px;
-            animation: scaleIn 0.6s ease-out;
-            transition: all 0.3s ease;
-        }
-        
-        .score-card:hover {
-            transform: translateY(-8px);
-            background: rgba(255, 255, 255, 0.2);
-            box-shadow: 0 12px 32px rgba(31, 38, 135, 0.4);
-        }
-        
-        .score-value {
-            font-size: 2.5em;
-            font-weight: 800;
-            margin: 10px 0;
-            animation: float 3s ease-in-out infinite;
-        }
-        
-        .score-label {
-            font-size: 1em;
-            font-weight: 600;
-            opacity: 0.9;
-        }
-        
-        /* Section headers */
-        h2, h3 {
-            color: white !important;
-            font-weight: 700;
-            text-shadow: 0 2px 8px rgba(0, 0, 0, 0.2);
-            margin-top: 30px;
-            margin-bottom: 20px;
-            animation: fadeInUp 0.6s ease-out;
-        }
-        
-        /* Progress bar animation */
-        .progress-bar {
-            background: rgba(255, 255, 255, 0.2);
-            border-radius: 20px;
-            height: 10px;
-            overflow: hidden;
-            margin: 10px 0;
-        }
-        
-        .progress-fill {
-            height: 100%;
-            background: linear-gradient(90deg, rgba(255, 255, 255, 0.6), rgba(255, 255, 255, 0.3));
-            border-radius: 20px;
-            animation: slideInRight 1s ease-out;
-        }
-        
-        /* Chart wrapper */
-        .chart-wrapper {
-            background: rgba(255, 255, 255, 0.12);
-            backdrop-filter: blur(20px);
-            border-radius: 24px;
-            border: 1px solid rgba(255, 255, 255, 0.2);
-            padding: 30px;
-            margin: 20px 0;
-            animation: fadeInUp 0.8s ease-out;
-            box-shadow: 0 8px 32px 0 rgba(31, 38, 135, 0.37);
-        }
-        
-        /* Remove default Streamlit padding */
-        .block-container {
-            padding-top: 2rem;
-            padding-left: 1rem;
-            padding-right: 1rem;
-            max-width: 1400px;
-            margin: 0 auto;
-        }
-        
-        /* Text styling */
-        p, span {
-            color: rgba(255, 255, 255, 0.95);
-        }
-        
-        /* Tooltip styling */
-        .tooltip {
-            background: rgba(0, 0, 0, 0.3);
-            color: white;
-            padding: 10px 15px;
-            border-radius: 10px;
-            border: 1px solid rgba(255, 255, 255, 0.2);
-            font-size: 0.95em;
-            margin-top: 10px;
-        }
-        
-        /* Loading animation */
-        .loading {
-            display: inline-block;
-            width: 20px;
-            height: 20px;
-            border: 3px solid rgba(255, 255, 255, 0.3);
-            border-radius: 50%;
-            border-top-color: white;
-            animation: spin 1s ease-in-out infinite;
-        }
-        
-        @keyframes spin {
-            to { transform: rotate(360deg); }
-        }
-        
-        /* Decorative elements */
-        .decoration {
-            position: fixed;
-            border-radius: 50%;
-            opacity: 0.1;
-            pointer-events: none;
-            animation: float 8s ease-in-out infinite;
-        }
-    </style>
-""", unsafe_allow_html=True)
+if registry.ready() and registry.current().table_error is not None:
+    st.warning(f"Prediction table disabled, using the live model: {registry.current().table_error}")
+
+with st.sidebar:
+    if registry.ready():
+        record = registry.current().record
+        st.caption(
+            f"Model version `{record['version']}` (`{record['model_hash'][:12]}`, {record['runtime']} runtime) · "
+            f"loaded {record['loaded_at']} in {record['load_seconds'] * 1000:.0f} ms (pid {record['pid']}) · "
+            f"disk loads: {registry.disk_loads} · cache hits: {registry.cache_hits} · hot swaps: {registry.swaps}"
+        )
+    else:
+        st.caption("Model loading in the background…")
+    show_diagnostics = st.checkbox("🩺 Show diagnostics", key="show_diagnostics")
+
+# Premium Glassmorphism + Animations CSS, served by Streamlit as a content-hashed
+# static asset so each rerun only sends a single <link> (see assets.py / static/app.css)
+st.markdown(stylesheet_tag(), unsafe_allow_html=True)
 
 # ---------------------- HEADER with Animation ----------------------
 col1, col2, col3 = st.columns([1, 2, 1])
@@ -402,282 +65,575 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-# ---------------------- Input Section ----------------------
-st.markdown("<div class='input-section'>", unsafe_allow_html=True)
+# ---------------------- History ----------------------
+# No login yet: predictions and jobs belong to ?user=<id>. Without it each
+# browser session gets its own id, so anonymous visitors never share history,
+# job limits or scored files.
+if "anonymous_id" not in st.session_state:
+    st.session_state.anonymous_id = f"anon-{uuid.uuid4().hex[:12]}"
+user_id = st.query_params.get("user", st.session_state.anonymous_id)
+history = get_store()
+# Long-running work (file scoring) runs here, off the script thread
+jobs = get_jobs()
 
-col1, col2 = st.columns(2, gap="large")
+# ---------------------- Prediction Callback ----------------------
+# Runs once when the form is submitted; the result is kept in session_state so
+# later reruns (e.g. toggling diagnostics) re-draw it without recomputing.
+def run_prediction():
+    from charts import confidence_bar, performance_gauge
 
-with col1:
-    st.markdown("<p style='font-size: 0.95em; opacity: 0.9; margin-bottom: 5px;'>📘 Math Score</p>", unsafe_allow_html=True)
-    math = st.number_input("Math Score", 0, 100, 0, label_visibility="collapsed")
-    
-    st.markdown("<p style='font-size: 0.95em; opacity: 0.9; margin-bottom: 5px; margin-top: 15px;'>✍️ Writing Score</p>", unsafe_allow_html=True)
-    writing = st.number_input("Writing Score", 0, 100, 0, label_visibility="collapsed")
+    state = st.session_state
+    math, reading, writing, gender = state.math, state.reading, state.writing, state.gender
+    timer = TIMINGS.timer()
+    # One snapshot for the whole prediction, even if a new version is swapped in meanwhile
+    model = registry.current()
+    model_hash = model.record["model_hash"]
 
-with col2:
-    st.markdown("<p style='font-size: 0.95em; opacity: 0.9; margin-bottom: 5px;'>📖 Reading Score</p>", unsafe_allow_html=True)
-    reading = st.number_input("Reading Score", 0, 100, 0, label_visibility="collapsed")
-    
-    st.markdown("<p style='font-size: 0.95em; opacity: 0.9; margin-bottom: 5px; margin-top: 15px;'>🧑 Student Gender</p>", unsafe_allow_html=True)
-    gender = st.selectbox("Gender", ["Female", "Male"], label_visibility="collapsed")
-
-st.markdown("</div>", unsafe_allow_html=True)
-
-# ---------------------- Feature Processing ----------------------
-performance = (math + reading + writing) / 3
-
-gender_encoded = 0 if gender.lower() == "female" else 1
-gender_female = 1 if gender.lower() == "female" else 0
-gender_male = 1 if gender.lower() == "male" else 0
-
-if performance < 60:
-    pe = 0
-elif performance < 80:
-    pe = 1
-else:
-    pe = 2
-
-input_dict = {
-    'math score': math,
-    'reading score': reading,
-    'writing score': writing,
-    'performance': performance,
-    'gender_encoded': gender_encoded,
-    'performance_encoded': pe,
-    'gender_female': gender_female,
-    'gender_male': gender_male,
-}
-
-input_df = pd.DataFrame([input_dict])
-input_df = input_df.reindex(columns=feature_columns, fill_value=0)
-input_df = input_df.fillna(0)
-
-# ---------------------- Predict Button ----------------------
-col1, col2, col3 = st.columns([1, 2, 1])
-with col2:
-    predict = st.button("🔍 Predict Performance", use_container_width=True)
+    performance = (math + reading + writing) / 3
+    gender_encoded = 0 if gender.lower() == "female" else 1
 
-if predict:
-    # Simulate processing with animation
-    with st.spinner(""):
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        for i in range(100):
-            progress_bar.progress(i + 1)
-            time.sleep(0.02)
-        
-        status_text.empty()
-        progress_bar.empty()
-    
-    # Get predictions
-    scaled_input = scaler.transform(input_df)
-    prediction = int(model.predict(scaled_input)[0])
-    probabilities = model.predict_proba(scaled_input)[0]
+    # Same inputs on the same model from any session reuse the stored result
+    cached = RESULTS.get(math, reading, writing, gender, model_hash)
+    timer.lap("cache")
 
-    levels = ["Low", "Medium", "High"]
-    final_label = levels[prediction]
-    
-    # Color mapping
-    colors = {
-        "Low": "#FF6B6B",
-        "Medium": "#FFD93D",
-        "High": "#4CAF50"
-    }
+    if cached is None:
+        # Compiled from model_features.joblib once per process (see features.FeaturePlan)
+        input_features = model.plan.build(math, reading, writing, gender)
+        timer.lap("features")
 
-    # ==================== RESULTS SECTION ====================
-    st.markdown("<h2 style='text-align: center; margin-top: 40px;'>📈 Prediction Results</h2>", unsafe_allow_html=True)
-    
-    # Animated result card
-    st.markdown(
-        f"""
-        <div class='result-card'>
-            <div style='font-size: 1em; opacity: 0.85; margin-bottom: 15px;'>🎯 PREDICTED CATEGORY</div>
-            <div class='category-badge' style='background: linear-gradient(135deg, {colors[final_label]}40, {colors[final_label]}20);'>{final_label.upper()}</div>
-        </div>
-        """,
-        unsafe_allow_html=True
+        # Get predictions (table lookup if enabled, else one fused matmul + softmax;
+        # the scaler is folded into the model so there is no separate scaling step)
+        if model.table is not None:
+            labels, probs = model.table.predict(math, reading, writing, gender_encoded)
+        else:
+            labels, probs = model.engine.predict(input_features)
+        timer.lap("inference")
+        MODEL_SECONDS.observe(timer.stages["inference"])
+
+        cached = {
+            "label": int(labels[0]),
+            "probabilities": probs[0],
+            "fig_bar": confidence_bar(probs[0]),
+            "fig_gauge": performance_gauge(performance),
+        }
+        timer.lap("figures")
+        RESULTS.put(math, reading, writing, gender, model_hash, cached)
+
+    # A few fixed-size running summaries, compared with the training data in diagnostics
+    DRIFT.observe(math, reading, writing, gender_encoded, cached["label"])
+    PREDICTIONS.inc(LEVELS[cached["label"]], gender.lower())
+
+    # Queued for the background writer; never waits on disk
+    history.record(
+        user_id, math, reading, writing, gender, performance, LEVELS[cached["label"]], cached["probabilities"],
+        model_version=model.record["version"],
     )
+
+    # The what-if controls start again from the new student
+    for key in ("whatif_gender", "whatif_Math", "whatif_Reading", "whatif_Writing"):
+        state.pop(key, None)
+
+    state.prediction = {
+        "math": math,
+        "reading": reading,
+        "writing": writing,
+        "gender": gender,
+        "performance": performance,
+        "model_version": model.record["version"],
+        **cached,
+        "timer": timer,
+    }
+
+
+# ---------------------- Batch Scoring Job ----------------------
+# Runs on a job worker thread (see jobs.py), never in the script thread
+def score_upload(job, data, name, chunk_rows, model):
+    import io
+
+    from batch import iter_chunks, score_stream
+    from charts import cohort_figures
+    from cohort import CohortAggregate
+
+    source = io.BytesIO(data)
+    total_bytes = max(len(data), 1)
+    # Filled while scoring; a few hundred KB however large the file is
+    aggregate = CohortAggregate()
+
+    def on_chunk(rows, seconds):
+        job.update(source.tell() / total_bytes, f"⚡ {rows:,} rows scored · {rows / max(seconds, 1e-9):,.0f} rows/sec")
+        job.check_cancelled()
+
+    # Results go to a temp file on disk so memory stays bounded by the chunk size
+    out_file = tempfile.NamedTemporaryFile("w+", suffix=".csv", newline="", delete=False)
+    try:
+        with out_file:
+            rows, seconds = score_stream(
+                iter_chunks(source, name, chunksize=chunk_rows),
+                model.engine, model.plan, out_file, on_chunk=on_chunk, aggregate=aggregate,
+            )
+    except BaseException:
+        os.unlink(out_file.name)
+        raise
+    job.update(1.0, f"✅ Scored {rows:,} rows in {seconds:.2f}s ({rows / max(seconds, 1e-9):,.0f} rows/sec)")
+    return {
+        "path": out_file.name,
+        "name": name,
+        "rows": rows,
+        "cohort": {"name": name, "summary": aggregate.summary(), "figures": cohort_figures(aggregate)},
+    }
+
+
+def remove_scored_file(result):
+    os.unlink(result["path"])
+
+
+# ---------------------- Tabs ----------------------
+single_tab, batch_tab, history_tab, stats_tab = st.tabs(
+    ["🎯 Single Prediction", "📂 Batch Scoring", "🕘 Prediction History", "📊 Statistics"]
+)
+
+with single_tab:
+    # ---------------------- Input Section ----------------------
+    # Inputs live in a form: editing them doesn't rerun the script, the whole
+    # form is committed at once when Predict is pressed.
+    with st.form("prediction_form", border=False):
+        st.markdown("<div class='input-section'>", unsafe_allow_html=True)
+
+        col1, col2 = st.columns(2, gap="large")
+
+        with col1:
+            st.markdown("<p style='font-size: 0.95em; opacity: 0.9; margin-bottom: 5px;'>📘 Math Score</p>", unsafe_allow_html=True)
+            st.number_input("Math Score", 0, 100, 0, key="math", label_visibility="collapsed")
+
+            st.markdown("<p style='font-size: 0.95em; opacity: 0.9; margin-bottom: 5px; margin-top: 15px;'>✍️ Writing Score</p>", unsafe_allow_html=True)
+            st.number_input("Writing Score", 0, 100, 0, key="writing", label_visibility="collapsed")
+
+        with col2:
+            st.markdown("<p style='font-size: 0.95em; opacity: 0.9; margin-bottom: 5px;'>📖 Reading Score</p>", unsafe_allow_html=True)
+            st.number_input("Reading Score", 0, 100, 0, key="reading", label_visibility="collapsed")
+
+            st.markdown("<p style='font-size: 0.95em; opacity: 0.9; margin-bottom: 5px; margin-top: 15px;'>🧑 Student Gender</p>", unsafe_allow_html=True)
+            st.selectbox("Gender", ["Female", "Male"], key="gender", label_visibility="collapsed")
+
+        st.markdown("</div>", unsafe_allow_html=True)
+
+        # ---------------------- Predict Button ----------------------
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col2:
+            st.form_submit_button("🔍 Predict Performance", use_container_width=True, on_click=run_prediction)
+
+    current_timings = None
+    result = st.session_state.get("prediction")
+    if result is not None:
+        math, reading, writing = result["math"], result["reading"], result["writing"]
+        performance = result["performance"]
+        prediction = result["label"]
+        probabilities = result["probabilities"]
+        fig_bar, fig_gauge = result["fig_bar"], result["fig_gauge"]
+
+        levels = LEVELS
+        final_label = levels[prediction]
     
-    # ==================== SCORE OVERVIEW ====================
-    st.markdown("<h3 style='text-align: center;'>📊 Score Overview</h3>", unsafe_allow_html=True)
-    
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.markdown(
-            f"""
-            <div class='score-card'>
-                <div class='score-value'>📘</div>
-                <div class='score-label'>Math</div>
-                <div class='score-value' style='font-size: 2em; animation: none;'>{math}</div>
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
-    
-    with col2:
-        st.markdown(
-            f"""
-            <div class='score-card'>
-                <div class='score-value'>📖</div>
-                <div class='score-label'>Reading</div>
-                <div class='score-value' style='font-size: 2em; animation: none;'>{reading}</div>
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
-    
-    with col3:
-        st.markdown(
-            f"""
-            <div class='score-card'>
-                <div class='score-value'>✍️</div>
-                <div class='score-label'>Writing</div>
-                <div class='score-value' style='font-size: 2em; animation: none;'>{writing}</div>
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
+        # Color mapping
+        colors = {
+            "Low": "#FF6B6B",
+            "Medium": "#FFD93D",
+            "High": "#4CAF50"
+        }
+
+        # ==================== RESULTS SECTION ====================
+        st.markdown("<h2 style='text-align: center; margin-top: 40px;'>📈 Prediction Results</h2>", unsafe_allow_html=True)
     
-    with col4:
+        # Animated result card
         st.markdown(
             f"""
-            <div class='score-card'>
-                <div class='score-value'>⭐</div>
-                <div class='score-label'>Average</div>
-                <div class='score-value' style='font-size: 2em; animation: none;'>{performance:.1f}</div>
+            <div class='result-card'>
+                <div style='font-size: 1em; opacity: 0.85; margin-bottom: 15px;'>🎯 PREDICTED CATEGORY</div>
+                <div class='category-badge' style='background: linear-gradient(135deg, {colors[final_label]}40, {colors[final_label]}20);'>{final_label.upper()}</div>
             </div>
             """,
             unsafe_allow_html=True
         )
+        st.caption(f"Predicted by model version `{result['model_version']}`")
     
-    # ==================== CONFIDENCE CHART ====================
-    st.markdown("<div class='chart-wrapper'>", unsafe_allow_html=True)
-    st.markdown("<h3>📈 Prediction Confidence Breakdown</h3>", unsafe_allow_html=True)
-
-    prob_df = pd.DataFrame({
-        "Performance Level": levels,
-        "Probability %": [round(p * 100, 1) for p in probabilities]
-    })
-
-    fig_bar = go.Figure(data=[
-        go.Bar(
-            x=prob_df["Performance Level"],
-            y=prob_df["Probability %"],
-            marker=dict(
-                color=['#FF6B6B', '#FFD93D', '#4CAF50'],
-                line=dict(color='rgba(255,255,255,0.3)', width=2)
-            ),
-            text=[f"{p:.1f}%" for p in prob_df["Probability %"]],
-            textposition='outside',
-            hovertemplate='<b>%{x}</b><br>Confidence: %{y:.1f}%<extra></extra>',
-        )
-    ])
-    
-    fig_bar.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='white', size=12, family='Plus Jakarta Sans'),
-        xaxis=dict(
-            showgrid=False,
-            showline=False,
-            linewidth=0,
-            color='white'
-        ),
-        yaxis=dict(
-            showgrid=True,
-            gridcolor='rgba(255,255,255,0.1)',
-            showline=False,
-            color='white'
-        ),
-        margin=dict(t=20, b=20, l=20, r=20),
-        height=400,
-        hovermode='x unified'
-    )
-    
-    st.plotly_chart(fig_bar, use_container_width=True)
-    st.markdown("</div>", unsafe_allow_html=True)
-
-    # ==================== GAUGE CHART ====================
-    st.markdown("<div class='chart-wrapper'>", unsafe_allow_html=True)
-    st.markdown("<h3>📉 Performance Gauge</h3>", unsafe_allow_html=True)
-
-    fig_gauge = go.Figure(go.Indicator(
-        mode="gauge+number+delta",
-        value=performance,
-        delta={'reference': 70, 'suffix': ' vs Average'},
-        title={"text": "Average Performance Score", "font": {"color": "white", "size": 20}},
-        number={"font": {"color": "white", "size": 50}, "suffix": "/100"},
-        gauge={
-            'axis': {
-                'range': [0, 100],
-                'tickcolor': "rgba(255,255,255,0.5)",
-                'tickfont': {'color': 'white'}
-            },
-            'bar': {'color': "rgba(255, 255, 255, 0.9)"},
-            'bgcolor': "rgba(255, 255, 255, 0.1)",
-            'borderwidth': 2,
-            'bordercolor': "rgba(255, 255, 255, 0.3)",
-            'steps': [
-                {'range': [0, 60], 'color': "rgba(255, 107, 107, 0.3)"},
-                {'range': [60, 80], 'color': "rgba(255, 217, 61, 0.3)"},
-                {'range': [80, 100], 'color': "rgba(76, 175, 80, 0.3)"},
-            ],
-        }
-    ))
+        # ==================== SCORE OVERVIEW ====================
+        st.markdown("<h3 style='text-align: center;'>📊 Score Overview</h3>", unsafe_allow_html=True)
     
-    fig_gauge.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='white', family='Plus Jakarta Sans'),
-        margin=dict(t=40, b=40, l=40, r=40),
-        height=450
-    )
-
-    st.plotly_chart(fig_gauge, use_container_width=True)
-    st.markdown("</div>", unsafe_allow_html=True)
-
-    # ==================== INSIGHTS SECTION ====================
-    st.markdown("<h3>💡 Performance Insights</h3>", unsafe_allow_html=True)
+        col1, col2, col3, col4 = st.columns(4)
     
-    insights_col1, insights_col2 = st.columns(2)
+        with col1:
+            st.markdown(
+                f"""
+                <div class='score-card'>
+                    <div class='score-value'>📘</div>
+                    <div class='score-label'>Math</div>
+                    <div class='score-value' style='font-size: 2em; animation: none;'>{math}</div>
+                </div>
+                """,
+                unsafe_allow_html=True
+            )
     
-    with insights_col1:
-        st.markdown("<div class='glass-card'>", unsafe_allow_html=True)
-        st.markdown(f"<h4 style='color: white; margin-top: 0;'>📌 Category Analysis</h4>", unsafe_allow_html=True)
-        
-        if final_label == "High":
+        with col2:
             st.markdown(
-                "✨ **Excellent Performance!** Your student demonstrates exceptional academic performance with strong scores across all subjects. Keep up the excellent work!",
+                f"""
+                <div class='score-card'>
+                    <div class='score-value'>📖</div>
+                    <div class='score-label'>Reading</div>
+                    <div class='score-value' style='font-size: 2em; animation: none;'>{reading}</div>
+                </div>
+                """,
                 unsafe_allow_html=True
             )
-        elif final_label == "Medium":
+    
+        with col3:
             st.markdown(
-                "💪 **Good Performance!** Your student shows solid academic abilities. There's room for improvement in specific areas to achieve higher performance levels.",
+                f"""
+                <div class='score-card'>
+                    <div class='score-value'>✍️</div>
+                    <div class='score-label'>Writing</div>
+                    <div class='score-value' style='font-size: 2em; animation: none;'>{writing}</div>
+                </div>
+                """,
                 unsafe_allow_html=True
             )
-        else:
+    
+        with col4:
             st.markdown(
-                "📚 **Development Opportunity!** Your student would benefit from additional support and practice. Focus on improving foundational concepts in weaker subjects.",
+                f"""
+                <div class='score-card'>
+                    <div class='score-value'>⭐</div>
+                    <div class='score-label'>Average</div>
+                    <div class='score-value' style='font-size: 2em; animation: none;'>{performance:.1f}</div>
+                </div>
+                """,
                 unsafe_allow_html=True
             )
-        
+    
+        # ==================== CONFIDENCE CHART ====================
+        st.markdown("<div class='chart-wrapper'>", unsafe_allow_html=True)
+        st.markdown("<h3>📈 Prediction Confidence Breakdown</h3>", unsafe_allow_html=True)
+
+        st.plotly_chart(fig_bar, use_container_width=True)
         st.markdown("</div>", unsafe_allow_html=True)
+
+        # ==================== GAUGE CHART ====================
+        st.markdown("<div class='chart-wrapper'>", unsafe_allow_html=True)
+        st.markdown("<h3>📉 Performance Gauge</h3>", unsafe_allow_html=True)
+
+        st.plotly_chart(fig_gauge, use_container_width=True)
+        st.markdown("</div>", unsafe_allow_html=True)
+
+        # ==================== INSIGHTS SECTION ====================
+        st.markdown("<h3>💡 Performance Insights</h3>", unsafe_allow_html=True)
     
-    with insights_col2:
-        st.markdown("<div class='glass-card'>", unsafe_allow_html=True)
-        st.markdown(f"<h4 style='color: white; margin-top: 0;'>📊 Subject Strengths</h4>", unsafe_allow_html=True)
+        insights_col1, insights_col2 = st.columns(2)
+    
+        with insights_col1:
+            st.markdown("<div class='glass-card'>", unsafe_allow_html=True)
+            st.markdown(f"<h4 style='color: white; margin-top: 0;'>📌 Category Analysis</h4>", unsafe_allow_html=True)
+        
+            if final_label == "High":
+                st.markdown(
+                    "✨ **Excellent Performance!** Your student demonstrates exceptional academic performance with strong scores across all subjects. Keep up the excellent work!",
+                    unsafe_allow_html=True
+                )
+            elif final_label == "Medium":
+                st.markdown(
+                    "💪 **Good Performance!** Your student shows solid academic abilities. There's room for improvement in specific areas to achieve higher performance levels.",
+                    unsafe_allow_html=True
+                )
+            else:
+                st.markdown(
+                    "📚 **Development Opportunity!** Your student would benefit from additional support and practice. Focus on improving foundational concepts in weaker subjects.",
+                    unsafe_allow_html=True
+                )
+        
+            st.markdown("</div>", unsafe_allow_html=True)
+    
+        with insights_col2:
+            st.markdown("<div class='glass-card'>", unsafe_allow_html=True)
+            st.markdown(f"<h4 style='color: white; margin-top: 0;'>📊 Subject Strengths</h4>", unsafe_allow_html=True)
         
-        scores = {"Math": math, "Reading": reading, "Writing": writing}
-        strongest = max(scores, key=scores.get)
-        weakest = min(scores, key=scores.get)
+            scores = {"Math": math, "Reading": reading, "Writing": writing}
+            strongest = max(scores, key=scores.get)
+            weakest = min(scores, key=scores.get)
         
-        st.markdown(
-            f"🏆 **Strongest:** {strongest} ({scores[strongest]}/100)<br>"
-            f"📈 **Focus Area:** {weakest} ({scores[weakest]}/100)<br>"
-            f"🎯 **Recommendation:** Emphasize improvement in {weakest} while maintaining {strongest} performance.",
-            unsafe_allow_html=True
+            st.markdown(
+                f"🏆 **Strongest:** {strongest} ({scores[strongest]}/100)<br>"
+                f"📈 **Focus Area:** {weakest} ({scores[weakest]}/100)<br>"
+                f"🎯 **Recommendation:** Emphasize improvement in {weakest} while maintaining {strongest} performance.",
+                unsafe_allow_html=True
+            )
+            st.markdown("</div>", unsafe_allow_html=True)
+
+        # Only the rerun right after a submit is timed; later reruns just re-draw
+        timer = result.pop("timer", None)
+        if timer is not None:
+            timer.lap("render")
+            current_timings = timer.finish()
+            PREDICTION_SECONDS.observe(current_timings["total"])
+
+        # ==================== WHAT-IF EXPLORER ====================
+        # Outside the form: every change reruns and rescores all 101 x 101
+        # combinations of the two chosen subjects in one batched call.
+        from charts import probability_surface as surface_figure
+        from whatif import GRID_SIZE, SUBJECTS, probability_surface
+
+        st.markdown("<h3>🔮 What-if Explorer</h3>", unsafe_allow_html=True)
+        student = {"Math": math, "Reading": reading, "Writing": writing}
+
+        col1, col2, col3, col4 = st.columns([1, 1, 2, 1])
+        with col1:
+            x_subject = st.selectbox("Horizontal axis", SUBJECTS, key="whatif_x")
+        with col2:
+            y_subject = st.selectbox("Vertical axis", [s for s in SUBJECTS if s != x_subject], key="whatif_y")
+        fixed_subject = next(s for s in SUBJECTS if s not in (x_subject, y_subject))
+        with col3:
+            fixed_score = st.slider(f"{fixed_subject} held at", 0, 100, student[fixed_subject], key=f"whatif_{fixed_subject}")
+        with col4:
+            whatif_gender = st.radio("Gender", ["Female", "Male"], index=["Female", "Male"].index(result["gender"]), key="whatif_gender", horizontal=True)
+
+        surface = probability_surface(registry.current(), x_subject, y_subject, fixed_score, whatif_gender)
+        x, y = student[x_subject], student[y_subject]
+        st.plotly_chart(surface_figure(surface, x, y), use_container_width=True)
+
+        here = int(surface.labels[y, x])
+        if here == len(LEVELS) - 1:
+            answer = f"At these settings this student is already predicted **{LEVELS[here]}**."
+        else:
+            target = here + 1
+            needed = surface.needed(x, y, target)
+            if needed is None:
+                answer = f"No {y_subject} score reaches **{LEVELS[target]}** with {x_subject} at {x} and {fixed_subject} at {fixed_score}."
+            else:
+                answer = (
+                    f"Raising {y_subject} from {y} to **{needed}** (+{needed - y}) would move this student "
+                    f"to **{LEVELS[target]}**, with {x_subject} at {x} and {fixed_subject} at {fixed_score}."
+                )
+        st.markdown(answer)
+        st.caption(f"{GRID_SIZE}×{GRID_SIZE} = {GRID_SIZE ** 2:,} combinations scored in {surface.seconds * 1000:.1f} ms. ⭐ marks this student.")
+
+    # ---------------------- Diagnostics ----------------------
+    if show_diagnostics:
+        import pandas as pd
+
+        with st.expander("🩺 Latency Diagnostics", expanded=True):
+            rows = TIMINGS.summary(current_timings)
+            if rows:
+                st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+                st.caption(f"Rolling window of the last {TIMINGS.window} predictions in this server process.")
+            else:
+                st.caption("No predictions yet in this server process.")
+
+            if registry.current().segment is not None:
+                from shared import memory_report
+
+                memory = memory_report()
+                if memory is not None:
+                    st.caption(
+                        f"Shared model segment: {memory['attached_rss_bytes'] / 1e6:.1f} MB mapped "
+                        f"({memory['attached_pss_bytes'] / 1e6:.1f} MB proportional share) · "
+                        f"this process: {memory['private_bytes'] / 1e6:.1f} MB private, "
+                        f"{memory['shared_bytes'] / 1e6:.1f} MB shared"
+                    )
+
+            cache_stats = RESULTS.stats()
+            st.dataframe(pd.DataFrame([cache_stats]), hide_index=True, use_container_width=True)
+            st.caption(
+                f"Result cache: {cache_stats['hit_rate']:.0%} hit rate, shared by all sessions "
+                f"of model `{registry.current().record['model_hash'][:12]}` (LRU, {cache_stats['ttl']:.0f}s TTL)."
+            )
+
+            from drift import drift_report, reference_from
+
+            drift = drift_report(DRIFT.state(), reference_from(registry.current()))
+            st.dataframe(pd.DataFrame(drift["features"]), hide_index=True, use_container_width=True)
+            mix = " · ".join(f"{level} {share:.0%}" for level, share in drift["mix"].items())
+            st.caption(
+                f"Input drift vs. the scaler's training statistics: score {drift['score']:.2f} "
+                f"(**{drift['status']}**) over {drift['count']:,} predictions since {drift['since']}. "
+                f"Prediction mix: {mix}."
+            )
+            if st.button("💾 Save drift snapshot"):
+                path = DRIFT.save(model_version=registry.current().record["version"])
+                st.caption(f"Saved {path}; compare later with `python drift.py report NEW --baseline {path}`.")
+
+# ---------------------- Batch Scoring ----------------------
+with batch_tab:
+    st.markdown("<h3>📂 Score a Whole Cohort</h3>", unsafe_allow_html=True)
+    st.markdown(
+        "Upload a CSV or Excel file with `math score`, `reading score`, `writing score` and `gender` columns. "
+        "The file is scored in chunks in the background - keep using the app or come back later - "
+        "and the results can be downloaded as CSV."
+    )
+
+    uploaded = st.file_uploader("Cohort file", type=["csv", "xlsx", "parquet"], label_visibility="collapsed")
+    chunk_rows = st.number_input("Rows per chunk", 1_000, 500_000, CHUNK_ROWS, step=10_000)
+
+    if uploaded is not None and st.button("🚀 Score File", use_container_width=True):
+        try:
+            job = jobs.submit(
+                user_id, f"Score {uploaded.name}", score_upload,
+                uploaded.getvalue(), uploaded.name, int(chunk_rows), registry.current(),
+                cleanup=remove_scored_file,
+            )
+        except JobRejected as exc:
+            st.warning(f"Not started: {exc}.")
+
+    # ---------------------- Jobs ----------------------
+    # Listed per user, so jobs started in an earlier session are still here
+    collected = st.session_state.setdefault("collected_jobs", set())
+    job_progress = st.session_state.setdefault("job_progress", {})
+    newest_done = True
+    for job in jobs.jobs_for(user_id):  # newest first
+        snapshot = job_progress[job.id] = job.snapshot()
+        if job.status == DONE:
+            # A newly finished job fills the dashboard, unless a newer one already has
+            if newest_done and job.id not in collected:
+                st.session_state.cohort = job.result["cohort"]
+            newest_done = False
+            collected.add(job.id)
+
+        with st.container(border=True):
+            col1, col2 = st.columns([5, 1])
+            with col1:
+                st.markdown(f"**{snapshot['title']}** · {snapshot['status']} · {snapshot['elapsed']:.1f}s")
+                if job.active:
+                    st.progress(snapshot["progress"], text=snapshot["message"] or "Waiting for a worker…")
+                    # Streamlit 1.32 has no fragments or timed reruns to push progress,
+                    # so it updates on the next rerun: this button or any other input
+                    st.button("🔄 Refresh", key=f"refresh_{job.id}")
+                elif job.status == DONE:
+                    st.caption(snapshot["message"])
+                elif job.status == FAILED:
+                    st.error(f"Could not score file: {snapshot['error']}")
+            with col2:
+                if job.active:
+                    st.button("✖️ Cancel", key=f"cancel_{job.id}", on_click=jobs.cancel, args=(job.id,), use_container_width=True)
+                else:
+                    st.button("🗑️ Dismiss", key=f"dismiss_{job.id}", on_click=jobs.dismiss, args=(job.id,), use_container_width=True)
+            if job.status == DONE:
+                result = job.result
+                # The CSV is only read into the page when asked for, not on every rerun
+                if st.button("📦 Prepare download", key=f"prepare_{job.id}"):
+                    with open(result["path"], "rb") as f:
+                        st.download_button(
+                            "⬇️ Download Results",
+                            f,
+                            file_name=os.path.splitext(result["name"])[0] + "_predictions.csv",
+                            mime="text/csv",
+                            use_container_width=True,
+                            key=f"download_{job.id}",
+                        )
+
+    # ---------------------- Cohort Analytics ----------------------
+    cohort = st.session_state.get("cohort")
+    if cohort is not None:
+        summary, figures = cohort["summary"], cohort["figures"]
+        st.markdown(f"<h3>📊 Cohort Analytics · {cohort['name']}</h3>", unsafe_allow_html=True)
+
+        cols = st.columns(1 + len(LEVELS))
+        cols[0].metric("Students", f"{summary['rows']:,}")
+        for col, level in zip(cols[1:], LEVELS):
+            col.metric(level, f"{summary['categories'][level]:,}", f"{summary['categories'][level] / max(summary['rows'], 1):.1%}", delta_color="off")
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown("<h4>Score distributions</h4>", unsafe_allow_html=True)
+            st.plotly_chart(figures["score_distributions"], use_container_width=True)
+        with col2:
+            st.markdown("<h4>Predicted category by gender</h4>", unsafe_allow_html=True)
+            st.plotly_chart(figures["category_by_gender"], use_container_width=True)
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown("<h4>Math vs reading by predicted category</h4>", unsafe_allow_html=True)
+            st.plotly_chart(figures["math_vs_reading"], use_container_width=True)
+        with col2:
+            st.markdown("<h4>Math vs reading density</h4>", unsafe_allow_html=True)
+            st.plotly_chart(figures["math_vs_reading_density"], use_container_width=True)
+        st.caption(
+            f"Distributions, counts and density cover all {summary['rows']:,} students; the scatter shows a uniform "
+            f"random sample of {summary['sampled']:,}, drawn with WebGL."
         )
-        st.markdown("</div>", unsafe_allow_html=True)
 
+# ---------------------- Prediction History ----------------------
+with history_tab:
+    st.markdown("<h3>🕘 Prediction History</h3>", unsafe_allow_html=True)
+
+    # Stack of keyset cursors, one per page we've paged past
+    cursors = st.session_state.setdefault("history_cursors", [])
+    rows, next_cursor = history.page(user_id, cursor=cursors[-1] if cursors else None)
+
+    if rows:
+        import pandas as pd
+
+        history_df = pd.DataFrame(rows)
+        history_df["created_at"] = pd.to_datetime(history_df["created_at"], unit="s").dt.strftime("%Y-%m-%d %H:%M:%S")
+        st.dataframe(
+            history_df.drop(columns=["id", "user_id"]),
+            hide_index=True,
+            use_container_width=True,
+        )
+    else:
+        st.caption("No predictions recorded yet.")
+
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        st.button("⬅️ Newer", disabled=not cursors, use_container_width=True, on_click=cursors.pop)
+    with col2:
+        st.caption(f"Page {len(cursors) + 1} · user `{user_id}`")
+    with col3:
+        st.button(
+            "Older ➡️", disabled=next_cursor is None, use_container_width=True,
+            on_click=cursors.append, args=(next_cursor,),
+        )
+
+# ---------------------- Statistics ----------------------
+with stats_tab:
+    st.markdown("<h3>📊 Your Statistics</h3>", unsafe_allow_html=True)
+
+    # Running aggregates maintained by the history writer: same cost at 10 or 10M predictions
+    stats = history.stats(user_id)
+    if stats is None:
+        st.caption("No predictions recorded yet.")
+    else:
+        from charts import category_distribution, performance_histogram
+
+        cards = [
+            ("🧮", "Predictions", f"{stats['total']:,}"),
+            ("📘", "Avg Math", f"{stats['mean']['math']:.1f}"),
+            ("📖", "Avg Reading", f"{stats['mean']['reading']:.1f}"),
+            ("✍️", "Avg Writing", f"{stats['mean']['writing']:.1f}"),
+            ("🏅", "Most Common", stats["most_common"]),
+        ]
+        for col, (icon, label, value) in zip(st.columns(len(cards)), cards):
+            with col:
+                st.markdown(
+                    f"""
+                    <div class='score-card'>
+                        <div class='score-value'>{icon}</div>
+                        <div class='score-label'>{label}</div>
+                        <div class='score-value' style='font-size: 2em; animation: none;'>{value}</div>
+                    </div>
+                    """,
+                    unsafe_allow_html=True
+                )
+        st.caption(
+            "Std. deviation — "
+            + " · ".join(f"{score}: {stats['std'][score]:.1f}" for score in ("math", "reading", "writing", "performance"))
+        )
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown("<div class='chart-wrapper'>", unsafe_allow_html=True)
+            st.markdown("<h3>🎯 Predicted Categories</h3>", unsafe_allow_html=True)
+            st.plotly_chart(
+                category_distribution([stats["categories"][level] for level in LEVELS]), use_container_width=True
+            )
+            st.markdown("</div>", unsafe_allow_html=True)
+        with col2:
+            st.markdown("<div class='chart-wrapper'>", unsafe_allow_html=True)
+            st.markdown("<h3>📉 Performance Distribution</h3>", unsafe_allow_html=True)
+            st.plotly_chart(performance_histogram(stats["histogram"]), use_container_width=True)
+            st.markdown("</div>", unsafe_allow_html=True)
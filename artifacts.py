@@ -0,0 +1,162 @@
+"""Locations, fingerprint and process-wide loading of the model artifacts.
+
+Streamlit re-executes app.py on every widget interaction, but imported modules
+stay in sys.modules, so anything cached here is loaded once per server process
+and shared by every session. numpy arrays inside the joblib files are
+memory-mapped read-only, so several server processes share the same pages.
+Each call stats the files (a few microseconds) and reloads them if their size
+or mtime changed, so a replaced model is picked up without a restart.
+
+If a current fused_model.npz (see `python inference.py export`) sits next to
+the artifacts, the model is read from it instead and joblib/scikit-learn are
+only imported if something asks for `.model` or `.scaler`. MODEL_RUNTIME
+selects the behaviour: auto (default), numpy (require the .npz) or sklearn.
+"""
+import hashlib
+import os
+import threading
+import time
+
+MODEL_PATH = "student_model.joblib"
+SCALER_PATH = "scaler.joblib"
+FEATURES_PATH = "model_features.joblib"
+
+ARTIFACT_PATHS = (MODEL_PATH, SCALER_PATH, FEATURES_PATH)
+FUSED_MODEL_NAME = "fused_model.npz"
+RUNTIMES = ("auto", "numpy", "sklearn")
+
+
+def artifact_hash(paths=ARTIFACT_PATHS):
+    """SHA-256 over the raw bytes of the artifacts, in a fixed order."""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def artifact_signature(paths=ARTIFACT_PATHS):
+    """Cheap change detector: (size, mtime) of each file."""
+    stats = [os.stat(p) for p in paths]
+    return tuple((st.st_size, st.st_mtime_ns) for st in stats)
+
+
+def fused_model_path(paths=ARTIFACT_PATHS):
+    return os.path.join(os.path.dirname(paths[0]), FUSED_MODEL_NAME)
+
+
+# ---------------------- Process-wide Cache ----------------------
+class Artifacts:
+    def __init__(self, paths, mmap_mode, feature_columns, plan, engine, table, table_error, record,
+                 model=None, scaler=None, segment=None):
+        self.paths = paths
+        self.mmap_mode = mmap_mode
+        self.feature_columns = feature_columns
+        self.plan = plan
+        self.engine = engine
+        self.table = table
+        self.table_error = table_error
+        self.record = record
+        self._model = model
+        self._scaler = scaler
+        # shared.Segment the arrays are mapped from, with SHARED_MEMORY=1
+        self.segment = segment
+
+    # The sklearn objects are only needed for parity checks and benchmarks;
+    # with the numpy runtime they are read from disk on first access.
+    @property
+    def model(self):
+        if self._model is None:
+            import joblib
+            self._model = joblib.load(self.paths[0], mmap_mode=self.mmap_mode)
+        return self._model
+
+    @property
+    def scaler(self):
+        if self._scaler is None:
+            import joblib
+            self._scaler = joblib.load(self.paths[1], mmap_mode=self.mmap_mode)
+        return self._scaler
+
+
+_lock = threading.Lock()
+_loaded = {}
+_signatures = {}
+
+
+def read_artifacts(paths=ARTIFACT_PATHS, mmap_mode="r", version=None):
+    """Load `paths` from disk, uncached. `version` defaults to the short model hash."""
+    from features import FeaturePlan
+    from inference import FusedModel
+    from lookup import load_table, TableMismatchError
+
+    runtime = os.environ.get("MODEL_RUNTIME", "auto")
+    if runtime not in RUNTIMES:
+        raise ValueError(f"MODEL_RUNTIME must be one of {RUNTIMES}, got {runtime!r}")
+
+    start = time.perf_counter()
+    model_path, scaler_path, features_path = paths
+    model_hash = artifact_hash(paths)
+    model = scaler = engine = None
+
+    fused_path = fused_model_path(paths)
+    if runtime != "sklearn" and os.path.exists(fused_path):
+        engine, meta = FusedModel.load(fused_path)
+        if meta.get("model_hash") == model_hash:
+            feature_columns = meta["feature_columns"]
+        else:
+            engine = None  # exported for a different model; ignore it
+    if engine is None:
+        if runtime == "numpy":
+            raise FileNotFoundError(f"no current {fused_path}; run `python inference.py export`")
+        import joblib
+        model = joblib.load(model_path, mmap_mode=mmap_mode)
+        scaler = joblib.load(scaler_path, mmap_mode=mmap_mode)
+        feature_columns = joblib.load(features_path)
+        engine = FusedModel.from_sklearn(model, scaler)
+    plan = FeaturePlan(feature_columns)
+
+    # Optional precomputed table (PREDICTION_TABLE=prediction_table.npy)
+    table_error = None
+    try:
+        table = load_table(expected_hash=model_hash)
+    except (OSError, TableMismatchError) as exc:
+        table, table_error = None, exc
+
+    record = {
+        "version": version or model_hash[:12],
+        "model_hash": model_hash,
+        "loaded_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "load_seconds": round(time.perf_counter() - start, 4),
+        "runtime": "sklearn" if model is not None else "numpy",
+        "mmap_mode": mmap_mode,
+        "pid": os.getpid(),
+        "disk_loads": 1,
+        "cache_hits": 0,
+    }
+    return Artifacts(paths, mmap_mode, feature_columns, plan, engine, table, table_error, record,
+                     model=model, scaler=scaler)
+
+
+def load_artifacts(paths=ARTIFACT_PATHS, mmap_mode="r"):
+    """Return the cached Artifacts for `paths`, (re)loading them when the files change."""
+    key = tuple(os.path.abspath(p) for p in paths)
+    with _lock:
+        signature = artifact_signature(paths)
+        artifacts = _loaded.get(key)
+        if artifacts is None or _signatures[key] != signature:
+            previous = artifacts
+            artifacts = _loaded[key] = read_artifacts(paths, mmap_mode)
+            _signatures[key] = signature
+            if previous is not None:
+                artifacts.record["disk_loads"] += previous.record["disk_loads"]
+        else:
+            artifacts.record["cache_hits"] += 1
+        return artifacts
+
+
+def clear_cache():
+    with _lock:
+        _loaded.clear()
+        _signatures.clear()
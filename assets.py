@@ -0,0 +1,267 @@
+"""Static, content-hashed asset pipeline for the app's stylesheet and fonts.
+
+static/app.css and the font files in static/fonts/ are fingerprinted at
+startup (app.<sha>.css, SourceSansPro-Regular.<sha>.woff2, ...), written to a
+build directory and served by the Streamlit server itself: the directory is
+registered as component files (components.declare_component(path=...)). Each
+rerun only sends one <link> with a relative URL on the page's own origin, so it
+works behind proxies and forwarded ports (Codespaces) alike, and browsers fetch
+the stylesheet and fonts once. No font is requested from a third party.
+
+Streamlit's static file serving (server.enableStaticServing) can't be used
+here: it sends everything except images as text/plain with nosniff, which
+browsers refuse for stylesheets. The component file handler sends real types.
+
+static/fonts/ ships Source Sans Pro (SIL Open Font License, see OFL.txt). The
+stylesheet asks for Plus Jakarta Sans first; `python assets.py fetch-font`
+vendors it (also OFL) on a machine that can reach GitHub.
+
+Environment:
+    ASSET_BASE_URL  link to the files there instead (a CDN, or a proxy in front of
+                    the asset server this process then starts on ASSET_HOST:ASSET_PORT)
+    ASSET_HOST      interface the asset server binds to (default 127.0.0.1)
+    ASSET_PORT      its port (default 8599)
+    ASSET_BUILD_DIR where the hashed files are written (default: a temp dir)
+    ASSETS_INLINE=1 inline the stylesheet into every page instead of linking it
+
+    python assets.py report       # per-rerun payload: inline <style> vs <link>
+    python assets.py fetch-font   # vendor Plus Jakarta Sans into static/fonts/
+"""
+import errno
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+STYLESHEET = os.path.join(STATIC_DIR, "app.css")
+FONT_DIR = os.path.join(STATIC_DIR, "fonts")
+BUILD_DIR = os.environ.get("ASSET_BUILD_DIR", os.path.join(tempfile.gettempdir(), "student-assets"))
+COMPONENT_NAME = "static"
+
+# font file stem -> (family, weight); other files in static/fonts/ are ignored
+FONT_FACES = {
+    "PlusJakartaSans[wght]": ("Plus Jakarta Sans", "200 800"),
+    "SourceSansPro-Regular": ("Source Sans Pro", "400"),
+    "SourceSansPro-SemiBold": ("Source Sans Pro", "600"),
+    "SourceSansPro-Bold": ("Source Sans Pro", "700"),
+}
+
+FONT_FORMATS = {".woff2": "woff2", ".woff": "woff", ".ttf": "truetype", ".otf": "opentype"}
+CONTENT_TYPES = {
+    ".css": "text/css; charset=utf-8",
+    ".woff2": "font/woff2",
+    ".woff": "font/woff",
+    ".ttf": "font/ttf",
+    ".otf": "font/otf",
+}
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Upstream (SIL Open Font License) variable font covering weights 200-800
+FONT_SOURCE = "https://github.com/google/fonts/raw/main/ofl/plusjakartasans/PlusJakartaSans%5Bwght%5D.ttf"
+
+
+def _fingerprint(name, data):
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+
+
+def _font_face(family, weight, url, ext):
+    return (
+        "@font-face {\n"
+        f"    font-family: '{family}';\n"
+        f"    src: url('{url}') format('{FONT_FORMATS[ext]}');\n"
+        f"    font-weight: {weight};\n"
+        "    font-style: normal;\n"
+        "    font-display: swap;\n"
+        "}\n"
+    )
+
+
+# ---------------------- Bundle ----------------------
+class AssetBundle:
+    def __init__(self, stylesheet=STYLESHEET, font_dir=FONT_DIR, url_prefix=""):
+        self.files = {}
+        fonts = []
+        if os.path.isdir(font_dir):
+            for name in sorted(os.listdir(font_dir)):
+                stem, ext = os.path.splitext(name)
+                if ext.lower() not in FONT_FORMATS or stem not in FONT_FACES:
+                    continue
+                with open(os.path.join(font_dir, name), "rb") as f:
+                    data = f.read()
+                hashed = _fingerprint(name.replace("[wght]", ""), data)
+                self.files[hashed] = (data, CONTENT_TYPES[ext.lower()])
+                fonts.append((*FONT_FACES[stem], hashed, ext.lower()))
+
+        with open(stylesheet, "rb") as f:
+            base = f.read()
+        self._fonts = fonts
+        self._base = base
+        # Font URLs are relative to the stylesheet, which is where they are served from
+        self.css = self._with_fonts("")
+        self.stylesheet_name = _fingerprint("app.css", self.css)
+        self.files[self.stylesheet_name] = (self.css, CONTENT_TYPES[".css"])
+        self.fonts = len(fonts)
+        self.url_prefix = url_prefix
+
+    def _with_fonts(self, prefix):
+        faces = [_font_face(family, weight, prefix + name, ext) for family, weight, name, ext in self._fonts]
+        return "".join(faces).encode() + self._base
+
+    @property
+    def inline_css(self):
+        """The stylesheet for a <style> tag: font URLs relative to the page."""
+        return self._with_fonts(self.url_prefix)
+
+    def write(self, build_dir=BUILD_DIR):
+        """Write the hashed files to a directory named after the stylesheet; return it."""
+        directory = os.path.join(build_dir, os.path.splitext(self.stylesheet_name)[0])
+        os.makedirs(directory, exist_ok=True)
+        for name, (data, _) in self.files.items():
+            path = os.path.join(directory, name)
+            if not os.path.exists(path):
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+        return directory
+
+
+class _AssetHandler(BaseHTTPRequestHandler):
+    bundle = None
+
+    def do_GET(self):
+        name = self.path.split("?", 1)[0].lstrip("/")
+        entry = self.bundle.files.get(name)
+        if entry is None:
+            self.send_error(404)
+            return
+        data, content_type = entry
+        etag = '"' + name + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", CACHE_CONTROL)
+        self.send_header("ETag", etag)
+        # Fonts referenced from a cross-origin stylesheet need CORS
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# ---------------------- Process-wide Server ----------------------
+_lock = threading.Lock()
+_state = {}
+
+
+def asset_port():
+    return int(os.environ.get("ASSET_PORT", 8599))
+
+
+def get_bundle():
+    """The bundle, with its files written out and registered with Streamlit (once per process)."""
+    with _lock:
+        if "bundle" not in _state:
+            from streamlit.components.v1 import declare_component
+
+            bundle = AssetBundle()
+            component = declare_component(COMPONENT_NAME, path=bundle.write())
+            # Served by Streamlit at component/<name>/<file>, relative to the page
+            bundle.url_prefix = f"component/{component.name}/"
+            _state["bundle"] = bundle
+        return _state["bundle"]
+
+
+def serve_assets(port=None):
+    """Start the asset server once per process.
+
+    If the port is already taken we assume another worker process on this box
+    is serving the same content-hashed files and just link to it.
+    """
+    bundle = get_bundle()
+    with _lock:
+        if "server" in _state:
+            return _state["server"]
+        handler = type("AssetHandler", (_AssetHandler,), {"bundle": bundle})
+        try:
+            address = (os.environ.get("ASSET_HOST", "127.0.0.1"), asset_port() if port is None else port)
+            server = ThreadingHTTPServer(address, handler)
+        except OSError as exc:
+            if exc.errno != errno.EADDRINUSE:
+                raise
+            server = None
+        else:
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name="asset-server", daemon=True).start()
+        _state["server"] = server
+        return server
+
+
+def stylesheet_url():
+    bundle = get_bundle()
+    base = os.environ.get("ASSET_BASE_URL")
+    if base:
+        return f"{base.rstrip('/')}/{bundle.stylesheet_name}"
+    return bundle.url_prefix + bundle.stylesheet_name
+
+
+def linked():
+    return os.environ.get("ASSETS_INLINE") != "1"
+
+
+def stylesheet_tag():
+    """The per-rerun payload: a <link> to the hashed stylesheet, or the stylesheet inline."""
+    if not linked():
+        return "<style>\n" + get_bundle().inline_css.decode() + "</style>"
+    if os.environ.get("ASSET_BASE_URL"):
+        serve_assets()
+    return f'<link rel="stylesheet" href="{stylesheet_url()}">'
+
+
+# ---------------------- CLI ----------------------
+def fetch_font(url=FONT_SOURCE, font_dir=FONT_DIR):
+    os.makedirs(font_dir, exist_ok=True)
+    path = os.path.join(font_dir, "PlusJakartaSans[wght].ttf")
+    with urllib.request.urlopen(url, timeout=60) as response:
+        data = response.read()
+    with open(path, "wb") as f:
+        f.write(data)
+    return path, len(data)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else "report"
+    if command == "fetch-font":
+        path, size = fetch_font()
+        print(f"Saved {path} ({size:,} bytes)")
+        return 0
+    if command != "report":
+        print(__doc__)
+        return 2
+
+    bundle = get_bundle()
+    inline = len(("<style>\n" + bundle.inline_css.decode() + "</style>").encode())
+    link = len(f'<link rel="stylesheet" href="{stylesheet_url()}">'.encode())
+    print(f"stylesheet     {bundle.stylesheet_name}  ({len(bundle.css):,} bytes, {bundle.fonts} font file(s))")
+    for name, (data, content_type) in sorted(bundle.files.items()):
+        print(f"  /{name:<40} {len(data):>9,} bytes  {content_type}")
+    print(f"per-rerun payload: inline <style> {inline:,} bytes -> <link> {link:,} bytes")
+    print(f"serving: {'<link> to ' + stylesheet_url() if linked() else 'inline <style> (ASSETS_INLINE=1)'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""Chunked batch scoring for uploaded cohorts.
+
+Input files are read in fixed-size chunks, each chunk goes through the same
+feature rules as app.py (see features.py) and one vectorized model call, and
+results are appended to the output CSV as they are produced, so memory stays
+bounded by the chunk size rather than the file size.
+
+Every score must be a number from 0 to 100. A chunk with a missing,
+non-numeric or out-of-range score raises ValueError naming the offending
+rows (numbered from 1, not counting the header) instead of being scored.
+
+pandas is imported on first use, so app.py can import this module (for
+CHUNK_ROWS) without paying for pandas before anyone uploads a file.
+"""
+import os
+import time
+
+import numpy as np
+
+from features import gender_codes
+from inference import LEVELS
+
+SCORE_COLUMNS = ["math score", "reading score", "writing score"]
+GENDER_COLUMN = "gender"
+SCORE_RANGE = (0, 100)
+CHUNK_ROWS = 50_000
+
+RESULT_COLUMNS = ["predicted_category"] + [f"prob_{level.lower()}" for level in LEVELS]
+
+
+def _resolve_columns(columns):
+    lookup = {str(c).strip().lower(): c for c in columns}
+    missing = [c for c in SCORE_COLUMNS + [GENDER_COLUMN] if c not in lookup]
+    if missing:
+        raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+    return [lookup[c] for c in SCORE_COLUMNS], lookup[GENDER_COLUMN]
+
+
+def _checked_scores(chunk, score_cols, first_row):
+    """The chunk's scores as a float array; raises ValueError on any invalid value."""
+    import pandas as pd
+
+    scores = chunk[score_cols].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+    with np.errstate(invalid="ignore"):
+        bad = ~(np.isfinite(scores) & (scores >= SCORE_RANGE[0]) & (scores <= SCORE_RANGE[1]))
+    if bad.any():
+        rows = np.flatnonzero(bad.any(axis=1))
+        details = []
+        for i in rows[:5]:
+            j = int(np.flatnonzero(bad[i])[0])
+            details.append(f"row {first_row + i + 1} {SCORE_COLUMNS[j]}={chunk[score_cols[j]].iat[i]!r}")
+        more = f" and {len(rows) - 5:,} more" if len(rows) > 5 else ""
+        raise ValueError(
+            f"{len(rows):,} row(s) have a missing, non-numeric or out-of-range score "
+            f"(expected {SCORE_RANGE[0]}-{SCORE_RANGE[1]}): {', '.join(details)}{more}"
+        )
+    return scores
+
+
+# ---------------------- Readers ----------------------
+def _excel_chunks(fileobj, chunksize):
+    try:
+        from openpyxl import load_workbook
+    except ImportError as exc:
+        raise ImportError("Reading Excel files requires openpyxl (pip install openpyxl)") from exc
+    import pandas as pd
+
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        buffer = []
+        for row in rows:
+            buffer.append(row)
+            if len(buffer) == chunksize:
+                yield pd.DataFrame(buffer, columns=header)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=header)
+    finally:
+        workbook.close()
+
+
+def _parquet_chunks(fileobj, chunksize):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise ImportError("Reading Parquet files requires pyarrow (pip install pyarrow)") from exc
+
+    for record_batch in pq.ParquetFile(fileobj).iter_batches(batch_size=chunksize):
+        yield record_batch.to_pandas()
+
+
+def iter_chunks(fileobj, filename, chunksize=CHUNK_ROWS):
+    """Yield DataFrames of at most `chunksize` rows from a CSV, Excel or Parquet file."""
+    import pandas as pd
+
+    ext = os.path.splitext(filename)[1].lower()
+    if ext in (".xlsx", ".xlsm"):
+        yield from _excel_chunks(fileobj, chunksize)
+    elif ext in (".parquet", ".pq"):
+        yield from _parquet_chunks(fileobj, chunksize)
+    elif ext in (".csv", ".txt", ""):
+        yield from pd.read_csv(fileobj, chunksize=chunksize)
+    else:
+        raise ValueError(f"Unsupported file type '{ext}', expected .csv, .xlsx or .parquet")
+
+
+# ---------------------- Scoring ----------------------
+def score_chunk(chunk, engine, plan, aggregate=None, first_row=0):
+    """Return `chunk` with the predicted category and class probabilities appended.
+
+    If `aggregate` (a cohort.CohortAggregate) is given, the chunk is folded into it too.
+    `first_row` is the chunk's offset in the file, for error messages.
+    """
+    score_cols, gender_col = _resolve_columns(chunk.columns)
+    scores = _checked_scores(chunk, score_cols, first_row)
+    # Labels are parsed once; the feature plan and the aggregate both take the codes
+    genders = gender_codes(chunk[gender_col].to_numpy())
+    X = plan.build(scores[:, 0], scores[:, 1], scores[:, 2], genders)
+    labels, proba = engine.predict(X)
+    if aggregate is not None:
+        aggregate.add(scores[:, 0], scores[:, 1], scores[:, 2], genders, labels)
+
+    result = chunk.copy()
+    result[RESULT_COLUMNS[0]] = np.asarray(LEVELS)[labels]
+    for j, col in enumerate(RESULT_COLUMNS[1:]):
+        result[col] = proba[:, j].round(4)
+    return result
+
+
+def score_stream(chunks, engine, plan, out, on_chunk=None, aggregate=None):
+    """Score each chunk and append it to the text stream `out` as CSV.
+
+    `on_chunk(rows_done, seconds)` is called after every chunk. Returns
+    (rows, seconds).
+    """
+    rows = 0
+    start = time.perf_counter()
+    for i, chunk in enumerate(chunks):
+        result = score_chunk(chunk, engine, plan, aggregate, first_row=rows)
+        result.to_csv(out, header=(i == 0), index=False)
+        rows += len(result)
+        if on_chunk is not None:
+            on_chunk(rows, time.perf_counter() - start)
+    return rows, time.perf_counter() - start
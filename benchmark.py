@@ -0,0 +1,470 @@
+"""Offline benchmark suite for the prediction path in app.py.
+
+Measures each stage on its own so regressions can be pinned down:
+
+  features_pandas   dict -> DataFrame -> reindex -> fillna (the app.py input_df path)
+  features_plan     FeaturePlan.build (compiled numpy feature builder)
+  scaler_transform  scaler.transform
+  sklearn_predict   model.predict + model.predict_proba
+  fused_predict     FusedModel.predict
+  table_lookup      PredictionTable.predict (if a current table is present)
+  fig_bar/fig_gauge figure construction (cold and memoized) + JSON size
+  apptest_*         full headless script reruns via streamlit's AppTest
+  interactions      server CPU time and bytes sent per user interaction (load,
+                    edit each input, predict); edits to widgets inside an
+                    st.form cost nothing until the form is submitted
+  startup_*         cold start in a fresh interpreter: time to the first
+                    render and to the first prediction, with a per-package
+                    `-X importtime` breakdown of what each phase imported
+
+Per-row stages run over every batch size. Time spent in time.sleep during
+script reruns (the progress animation) is patched out and reported on its own.
+
+    python benchmark.py                           # writes bench_results/<commit>.json
+    python benchmark.py --sizes 1 1000 --compare bench_results/abc1234.json
+    python benchmark.py --startup --startup-budget-ms 2500   # cold start only; exit 1 over budget
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from artifacts import load_artifacts
+
+DEFAULT_SIZES = [1, 100, 10_000, 1_000_000]
+RESULTS_DIR = "bench_results"
+
+
+def measure(fn, repeat=None, min_time=0.2):
+    """Run `fn` repeatedly; return min/median seconds per call."""
+    fn()  # warm-up
+    times = []
+    start = time.perf_counter()
+    while True:
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+        if repeat is not None and len(times) >= repeat:
+            break
+        if repeat is None and time.perf_counter() - start >= min_time and len(times) >= 3:
+            break
+    return {"min_s": min(times), "median_s": statistics.median(times), "runs": len(times)}
+
+
+def sample_inputs(n, seed=0):
+    rng = np.random.default_rng(seed)
+    math, reading, writing = rng.integers(0, 101, (3, n))
+    gender_encoded = rng.integers(0, 2, n)
+    return math, reading, writing, gender_encoded
+
+
+# ---------------------- Stages ----------------------
+def pandas_features(math, reading, writing, gender_encoded, feature_columns):
+    performance = (math + reading + writing) / 3
+    input_dict = {
+        'math score': math,
+        'reading score': reading,
+        'writing score': writing,
+        'performance': performance,
+        'gender_encoded': gender_encoded,
+        'performance_encoded': np.where(performance < 60, 0, np.where(performance < 80, 1, 2)),
+        'gender_female': (gender_encoded == 0).astype(int),
+        'gender_male': (gender_encoded == 1).astype(int),
+    }
+    input_df = pd.DataFrame(input_dict)
+    input_df = input_df.reindex(columns=feature_columns, fill_value=0)
+    return input_df.fillna(0)
+
+
+def bench_stages(artifacts, sizes):
+    model, scaler, engine, table = artifacts.model, artifacts.scaler, artifacts.engine, artifacts.table
+    feature_columns, plan = artifacts.feature_columns, artifacts.plan
+    results = {}
+    for n in sizes:
+        math, reading, writing, gender_encoded = sample_inputs(n)
+        input_df = pandas_features(math, reading, writing, gender_encoded, feature_columns)
+        X = input_df.to_numpy(dtype=np.float64)
+        scaled = scaler.transform(input_df)
+        repeat = 3 if n >= 1_000_000 else None
+
+        stages = {
+            "features_pandas": lambda: pandas_features(math, reading, writing, gender_encoded, feature_columns),
+            "features_plan": lambda: plan.build(math, reading, writing, gender_encoded),
+            "scaler_transform": lambda: scaler.transform(input_df),
+            "sklearn_predict": lambda: (model.predict(scaled), model.predict_proba(scaled)),
+            "fused_predict": lambda: engine.predict(X),
+        }
+        if table is not None:
+            stages["table_lookup"] = lambda: table.predict(math, reading, writing, gender_encoded)
+
+        row = {}
+        for name, fn in stages.items():
+            r = measure(fn, repeat=repeat)
+            r["rows_per_s"] = n / r["median_s"]
+            row[name] = r
+            print(f"  n={n:>9,}  {name:<17} {r['median_s'] * 1e6:>12.1f} us  {r['rows_per_s']:>14,.0f} rows/s")
+        results[str(n)] = row
+    return results
+
+
+def bench_figures():
+    import charts
+
+    probabilities = np.array([0.1, 0.3, 0.6])
+    results = {}
+    for name, build in (("fig_bar", lambda: charts.confidence_bar(probabilities)),
+                        ("fig_gauge", lambda: charts.performance_gauge(75.3))):
+        def cold():
+            charts.cache_clear()
+            return build()
+
+        r = measure(cold)
+        r["memoized"] = measure(build)
+        r["json_bytes"] = len(build().to_json())
+        r["build_and_serialize"] = measure(lambda: cold().to_json())
+        results[name] = r
+        print(f"  {name:<10} build {r['median_s'] * 1e3:8.2f} ms  memoized {r['memoized']['median_s'] * 1e3:8.3f} ms"
+              f"  json {r['json_bytes']:>8,} bytes")
+    return results
+
+
+# ---------------------- Script Reruns ----------------------
+class _SleepRecorder:
+    """Replaces time.sleep during reruns; sleeps issued by the app script are
+    skipped and recorded, everything else (AppTest's own polling) still sleeps."""
+
+    def __init__(self, real_sleep, script="app.py"):
+        self.real_sleep = real_sleep
+        self.script = os.path.abspath(script)
+        self.requested = 0.0
+        self.calls = 0
+
+    def __call__(self, seconds):
+        if os.path.abspath(sys._getframe(1).f_code.co_filename) != self.script:
+            return self.real_sleep(seconds)
+        self.requested += seconds
+        self.calls += 1
+
+
+_scratch = None
+
+
+def _scratch_history():
+    """Point HISTORY_DB at a throwaway database, so benchmark predictions stay out of history.db.
+
+    Must run before app.py first imports history (its path is read at import).
+    """
+    global _scratch
+    if _scratch is None and "HISTORY_DB" not in os.environ:
+        _scratch = tempfile.TemporaryDirectory(prefix="bench-history-")
+        os.environ["HISTORY_DB"] = os.path.join(_scratch.name, "history.db")
+
+
+def find_button(at, text):
+    return next(b for b in at.button if text in str(b.label))
+
+
+def bench_apptest(repeat=5):
+    from streamlit.testing.v1 import AppTest
+
+    _scratch_history()
+    results = {"initial_run": [], "idle_rerun": [], "predict_rerun": []}
+    real_sleep = time.sleep
+    recorder = _SleepRecorder(real_sleep)
+    time.sleep = recorder
+    try:
+        for i in range(repeat):
+            at = AppTest.from_file("app.py", default_timeout=120)
+            t = time.perf_counter()
+            at.run()
+            results["initial_run"].append(time.perf_counter() - t)
+
+            at.number_input[0].set_value(50 + i)
+            t = time.perf_counter()
+            at.run()
+            results["idle_rerun"].append(time.perf_counter() - t)
+
+            find_button(at, "Predict").click()
+            recorder.requested = recorder.calls = 0
+            t = time.perf_counter()
+            at.run()
+            results["predict_rerun"].append(time.perf_counter() - t)
+            if at.exception:
+                raise RuntimeError(f"app raised: {at.exception}")
+    finally:
+        time.sleep = real_sleep
+
+    report = {
+        f"apptest_{name}": {"min_s": min(v), "median_s": statistics.median(v), "runs": len(v)}
+        for name, v in results.items()
+    }
+    # Reported separately so the fake progress animation doesn't hide real costs
+    report["sleep_excluded_per_predict"] = {"seconds": recorder.requested, "calls": recorder.calls}
+    for name, r in report.items():
+        if "median_s" in r:
+            print(f"  {name:<24} {r['median_s'] * 1e3:9.1f} ms")
+    print(f"  sleep excluded per predict: {recorder.requested:.2f} s over {recorder.calls} calls")
+    return report
+
+
+# ---------------------- Interactions ----------------------
+class _MessageMeter:
+    """Counts bytes of every ForwardMsg the script enqueues for the browser."""
+
+    def __init__(self):
+        self.bytes = 0
+        self.messages = 0
+
+    def __enter__(self):
+        from streamlit.runtime.forward_msg_queue import ForwardMsgQueue
+
+        self._cls = ForwardMsgQueue
+        self._enqueue = ForwardMsgQueue.enqueue
+        meter = self
+
+        def enqueue(queue, msg):
+            meter.bytes += msg.ByteSize()
+            meter.messages += 1
+            return meter._enqueue(queue, msg)
+
+        ForwardMsgQueue.enqueue = enqueue
+        return self
+
+    def __exit__(self, *exc):
+        self._cls.enqueue = self._enqueue
+
+
+def _interaction_steps(at):
+    widgets = [at.number_input[0], at.number_input[1], at.number_input[2]]
+    return [
+        ("edit_math", widgets[0], lambda: widgets[0].set_value(72)),
+        ("edit_writing", widgets[1], lambda: widgets[1].set_value(64)),
+        ("edit_reading", widgets[2], lambda: widgets[2].set_value(81)),
+        ("switch_gender", at.selectbox[0], lambda: at.selectbox[0].set_value("Male")),
+        ("predict", None, lambda: find_button(at, "Predict").click()),
+    ]
+
+
+def bench_interactions(repeat=3):
+    from streamlit.testing.v1 import AppTest
+
+    _scratch_history()
+    samples = {}
+
+    def run_measured(name, at):
+        with _MessageMeter() as meter:
+            cpu = time.process_time()
+            wall = time.perf_counter()
+            at.run()
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+        if at.exception:
+            raise RuntimeError(f"app raised: {at.exception}")
+        samples.setdefault(name, []).append((cpu, wall, meter.bytes, 1))
+
+    for _ in range(repeat):
+        at = AppTest.from_file("app.py", default_timeout=120)
+        run_measured("load", at)
+        for name, widget, action in _interaction_steps(at):
+            action()
+            if widget is not None and widget.proto.form_id:
+                # Inside a form: the browser holds the value until submit, no rerun
+                samples.setdefault(name, []).append((0.0, 0.0, 0, 0))
+            else:
+                run_measured(name, at)
+
+    report = {}
+    for name, values in samples.items():
+        cpu, wall, sent, reruns = (statistics.median(v) for v in zip(*values))
+        report[name] = {"cpu_ms": cpu * 1000, "median_s": wall, "bytes_sent": int(sent), "reruns": reruns}
+    flow = [name for name in report if name != "load"]
+    report["flow_total"] = {
+        "cpu_ms": sum(report[n]["cpu_ms"] for n in flow),
+        "median_s": sum(report[n]["median_s"] for n in flow),
+        "bytes_sent": sum(report[n]["bytes_sent"] for n in flow),
+        "reruns": sum(report[n]["reruns"] for n in flow),
+    }
+    for name, r in report.items():
+        print(f"  {name:<14} cpu {r['cpu_ms']:8.1f} ms  sent {r['bytes_sent']:>9,} bytes  reruns {r['reruns']:.0f}")
+    return report
+
+
+# ---------------------- Cold Start ----------------------
+STARTUP_PHASES = ("interpreter", "first_render", "first_prediction")
+
+# Runs in a fresh interpreter under -X importtime; phase markers go to stderr
+# between the import lines so each import can be attributed to a phase.
+_STARTUP_CHILD = """
+import json, sys, time
+times = {"start": time.perf_counter()}
+from streamlit.testing.v1 import AppTest
+times["interpreter"] = time.perf_counter()
+sys.stderr.write("@@phase first_render\\n"); sys.stderr.flush()
+at = AppTest.from_file("app.py", default_timeout=120)
+at.run()
+times["first_render"] = time.perf_counter()
+sys.stderr.write("@@phase first_prediction\\n"); sys.stderr.flush()
+next(b for b in at.button if "Predict" in str(b.label)).click()
+at.run()
+times["first_prediction"] = time.perf_counter()
+print(json.dumps({"times": times, "exceptions": [str(e.value) for e in at.exception]}))
+"""
+
+
+def _parse_importtime(stderr):
+    """{phase: {top-level package: self microseconds}} from -X importtime output."""
+    phase = "interpreter"
+    packages = {p: {} for p in STARTUP_PHASES}
+    for line in stderr.splitlines():
+        if line.startswith("@@phase "):
+            phase = line.split()[1]
+        elif line.startswith("import time:") and "|" in line and "self [us]" not in line:
+            self_us, _, name = line[len("import time:"):].split("|")
+            package = name.strip().split(".")[0]
+            # Imports running concurrently in other threads (e.g. the model registry
+            # loading in the background) can skew the nesting, even below zero
+            packages[phase][package] = packages[phase].get(package, 0) + max(int(self_us), 0)
+    return packages
+
+
+def bench_startup(repeat=3, top=8):
+    samples = {phase: [] for phase in STARTUP_PHASES}
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(repeat):
+            # A new history database each time: a first visit, with nothing to tabulate yet
+            env = dict(os.environ, HISTORY_DB=os.path.join(tmp, f"history{i}.db"), ASSETS_INLINE="1")
+            launched = time.perf_counter()
+            proc = subprocess.run(
+                [sys.executable, "-X", "importtime", "-W", "ignore", "-c", _STARTUP_CHILD],
+                capture_output=True, text=True, env=env, check=True,
+            )
+            child = json.loads(proc.stdout.strip().splitlines()[-1])
+            if child["exceptions"]:
+                raise RuntimeError(f"app raised: {child['exceptions']}")
+            times = child["times"]
+            # Process launch happens before the child's clock starts; count it as interpreter time
+            launch = (time.perf_counter() - launched) - (times["first_prediction"] - times["start"])
+            samples["interpreter"].append(launch + times["interpreter"] - times["start"])
+            samples["first_render"].append(times["first_render"] - times["interpreter"])
+            samples["first_prediction"].append(times["first_prediction"] - times["first_render"])
+        packages = _parse_importtime(proc.stderr)
+
+    report = {}
+    for phase in STARTUP_PHASES:
+        imports = sorted(packages[phase].items(), key=lambda item: -item[1])
+        report[f"startup_{phase}"] = {
+            "median_s": statistics.median(samples[phase]),
+            "runs": repeat,
+            "import_s": sum(packages[phase].values()) / 1e6,
+            "top_imports_ms": {name: round(us / 1000, 1) for name, us in imports[:top]},
+        }
+    report["startup_time_to_first_render"] = {
+        "median_s": report["startup_interpreter"]["median_s"] + report["startup_first_render"]["median_s"],
+        "runs": repeat,
+    }
+    for name, r in report.items():
+        line = f"  {name:<30} {r['median_s'] * 1e3:9.1f} ms"
+        if "import_s" in r:
+            line += f"  (imports {r['import_s'] * 1e3:.0f} ms: " + ", ".join(
+                f"{pkg} {ms:.0f}" for pkg, ms in r["top_imports_ms"].items()
+            ) + ")"
+        print(line)
+    return report
+
+
+# ---------------------- Reporting ----------------------
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _flatten(obj, prefix=""):
+    out = {}
+    for key, value in obj.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            if "median_s" in value:
+                out[name] = value["median_s"]
+            else:
+                out.update(_flatten(value, name + "/"))
+    return out
+
+
+def compare(current, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    old, new = _flatten(baseline["results"]), _flatten(current["results"])
+    print(f"\nComparison against {baseline_path} ({baseline.get('commit', '?')}):")
+    for name in sorted(set(old) & set(new)):
+        ratio = new[name] / old[name] if old[name] else float("inf")
+        flag = "  <-- slower" if ratio > 1.10 else ""
+        print(f"  {name:<45} {old[name] * 1e3:10.3f} ms -> {new[name] * 1e3:10.3f} ms  x{ratio:5.2f}{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the stages of the prediction path.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--skip-apptest", action="store_true", help="skip full script reruns")
+    parser.add_argument("--apptest-repeat", type=int, default=5)
+    parser.add_argument("--output", help=f"JSON path (default: {RESULTS_DIR}/<commit>.json)")
+    parser.add_argument("--compare", help="previous results JSON to compare against")
+    parser.add_argument("--startup", action="store_true", help="only profile cold start")
+    parser.add_argument("--startup-repeat", type=int, default=3)
+    parser.add_argument("--startup-budget-ms", type=float, help="exit 1 if time to first render exceeds this")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore")
+    artifacts = load_artifacts()
+
+    results = {}
+    if not args.startup:
+        print("Per-row stages:")
+        results["stages"] = bench_stages(artifacts, args.sizes)
+        print("Figures:")
+        results["figures"] = bench_figures()
+    print("Cold start (fresh interpreter):")
+    results["startup"] = bench_startup(args.startup_repeat)
+    if not args.skip_apptest and not args.startup:
+        print("Script reruns (AppTest):")
+        results["reruns"] = bench_apptest(args.apptest_repeat)
+        print("Interactions (AppTest):")
+        results["interactions"] = bench_interactions(args.apptest_repeat)
+
+    report = {
+        "commit": git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "model_hash": artifacts.record["model_hash"],
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{report['commit']}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved {output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+    first_render_ms = results["startup"]["startup_time_to_first_render"]["median_s"] * 1000
+    if args.startup_budget_ms is not None and first_render_ms > args.startup_budget_ms:
+        print(f"\nTime to first render {first_render_ms:.0f} ms exceeds the {args.startup_budget_ms:.0f} ms budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,363 @@
+"""Plotly figures shown with each prediction.
+
+Layouts (fonts, colors, gauge steps, margins) are built once per process as
+plain dicts; per prediction only the data arrays - the three probabilities and
+`performance` - are swapped in. The default plotly template is trimmed to the
+parts these two charts actually use (it is ~7 KB of every serialized figure
+otherwise), and figures for identical results are memoized.
+
+Memoized figures are shared between sessions: render them, don't mutate them.
+"""
+import base64
+import functools
+import io
+
+import numpy as np
+
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from inference import LEVELS
+
+LEVEL_COLORS = ['#FF6B6B', '#FFD93D', '#4CAF50']
+FIGURE_CACHE_SIZE = 4096
+
+# Template layout keys that affect a cartesian bar chart or an indicator
+_TEMPLATE_LAYOUT_KEYS = (
+    "annotationdefaults", "autotypenumbers", "colorway", "font", "hoverlabel",
+    "hovermode", "paper_bgcolor", "plot_bgcolor", "title", "xaxis", "yaxis",
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _template(trace_type):
+    template = pio.templates[pio.templates.default].to_plotly_json()
+    data = template.get("data", {})
+    return {
+        "data": {trace_type: data[trace_type]} if trace_type in data else {},
+        "layout": {k: v for k, v in template.get("layout", {}).items() if k in _TEMPLATE_LAYOUT_KEYS},
+    }
+
+
+# ---------------------- Layout Templates ----------------------
+@functools.lru_cache(maxsize=None)
+def _bar_layout():
+    return dict(
+        template=_template("bar"),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white', size=12, family='Plus Jakarta Sans'),
+        xaxis=dict(
+            showgrid=False,
+            showline=False,
+            linewidth=0,
+            color='white'
+        ),
+        yaxis=dict(
+            showgrid=True,
+            gridcolor='rgba(255,255,255,0.1)',
+            showline=False,
+            color='white'
+        ),
+        margin=dict(t=20, b=20, l=20, r=20),
+        height=400,
+        hovermode='x unified'
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _gauge_layout():
+    return dict(
+        template=_template("indicator"),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white', family='Plus Jakarta Sans'),
+        margin=dict(t=40, b=40, l=40, r=40),
+        height=450
+    )
+
+
+_GAUGE = {
+    'axis': {
+        'range': [0, 100],
+        'tickcolor': "rgba(255,255,255,0.5)",
+        'tickfont': {'color': 'white'}
+    },
+    'bar': {'color': "rgba(255, 255, 255, 0.9)"},
+    'bgcolor': "rgba(255, 255, 255, 0.1)",
+    'borderwidth': 2,
+    'bordercolor': "rgba(255, 255, 255, 0.3)",
+    'steps': [
+        {'range': [0, 60], 'color': "rgba(255, 107, 107, 0.3)"},
+        {'range': [60, 80], 'color': "rgba(255, 217, 61, 0.3)"},
+        {'range': [80, 100], 'color': "rgba(76, 175, 80, 0.3)"},
+    ],
+}
+
+
+# ---------------------- Figures ----------------------
+@functools.lru_cache(maxsize=FIGURE_CACHE_SIZE)
+def _confidence_bar(percentages):
+    return go.Figure(dict(
+        data=[dict(
+            type='bar',
+            x=LEVELS,
+            y=list(percentages),
+            marker=dict(
+                color=LEVEL_COLORS,
+                line=dict(color='rgba(255,255,255,0.3)', width=2)
+            ),
+            text=[f"{p:.1f}%" for p in percentages],
+            textposition='outside',
+            hovertemplate='<b>%{x}</b><br>Confidence: %{y:.1f}%<extra></extra>',
+        )],
+        layout=_bar_layout(),
+    ))
+
+
+@functools.lru_cache(maxsize=FIGURE_CACHE_SIZE)
+def _performance_gauge(performance):
+    return go.Figure(dict(
+        data=[dict(
+            type='indicator',
+            mode="gauge+number+delta",
+            value=performance,
+            delta={'reference': 70, 'suffix': ' vs Average'},
+            title={"text": "Average Performance Score", "font": {"color": "white", "size": 20}},
+            number={"font": {"color": "white", "size": 50}, "suffix": "/100"},
+            gauge=_GAUGE,
+        )],
+        layout=_gauge_layout(),
+    ))
+
+
+def confidence_bar(probabilities):
+    # Keyed on the displayed (rounded) percentages, so equal-looking results share a figure
+    return _confidence_bar(tuple(round(float(p) * 100, 1) for p in probabilities))
+
+
+def performance_gauge(performance):
+    return _performance_gauge(float(performance))
+
+
+@functools.lru_cache(maxsize=FIGURE_CACHE_SIZE)
+def _category_distribution(counts):
+    return go.Figure(dict(
+        data=[dict(
+            type='bar',
+            x=LEVELS,
+            y=list(counts),
+            marker=dict(
+                color=LEVEL_COLORS,
+                line=dict(color='rgba(255,255,255,0.3)', width=2)
+            ),
+            text=[f"{c:,}" for c in counts],
+            textposition='outside',
+            hovertemplate='<b>%{x}</b><br>Predictions: %{y:,}<extra></extra>',
+        )],
+        layout=_bar_layout(),
+    ))
+
+
+@functools.lru_cache(maxsize=FIGURE_CACHE_SIZE)
+def _performance_histogram(histogram):
+    width = 100 / len(histogram)
+    edges = [round(i * width) for i in range(len(histogram) + 1)]
+    # Bars colored by the Low / Medium / High performance bands (60 / 80)
+    colors = [LEVEL_COLORS[(lo >= 60) + (lo >= 80)] for lo in edges[:-1]]
+    return go.Figure(dict(
+        data=[dict(
+            type='bar',
+            x=[f"{lo}-{hi}" for lo, hi in zip(edges, edges[1:])],
+            y=list(histogram),
+            marker=dict(color=colors, line=dict(color='rgba(255,255,255,0.3)', width=2)),
+            hovertemplate='<b>Average %{x}</b><br>Predictions: %{y:,}<extra></extra>',
+        )],
+        layout=_bar_layout(),
+    ))
+
+
+def category_distribution(counts):
+    """Bar chart of prediction counts per category, `counts` in LEVELS order."""
+    return _category_distribution(tuple(int(c) for c in counts))
+
+
+def performance_histogram(histogram):
+    """Bar chart of fixed-width `performance` bins spanning 0-100."""
+    return _performance_histogram(tuple(int(c) for c in histogram))
+
+
+# ---------------------- What-if Surface ----------------------
+_LEVEL_RGB = np.array([[int(c[i:i + 2], 16) for i in (1, 3, 5)] for c in LEVEL_COLORS], dtype=np.uint8)
+
+
+@functools.lru_cache(maxsize=None)
+def _surface_layout(x_subject, y_subject):
+    axis = dict(range=[-0.5, 100.5], showgrid=False, color='white', zeroline=False)
+    return dict(
+        template=_template("scatter"),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white', size=12, family='Plus Jakarta Sans'),
+        xaxis=dict(axis, title=f"{x_subject} score"),
+        yaxis=dict(axis, title=f"{y_subject} score", autorange=False, scaleanchor='x'),
+        margin=dict(t=20, b=20, l=20, r=20),
+        height=520,
+        showlegend=False,
+    )
+
+
+def surface_png(surface):
+    """The class grid as a PNG data URI: one pixel per grid point, colored by class
+    and faded where the model is less sure, so the boundaries show as soft bands."""
+    from PIL import Image
+
+    rgba = np.empty(surface.labels.shape + (4,), dtype=np.uint8)
+    rgba[..., :3] = _LEVEL_RGB[surface.labels]
+    # Confidence runs 1/3..1 for three classes; map it onto 25%..90% opacity
+    n_classes = surface.probabilities.shape[2]
+    sure = (surface.confidence() - 1 / n_classes) / (1 - 1 / n_classes)
+    rgba[..., 3] = (64 + 166 * np.clip(sure, 0, 1)).astype(np.uint8)
+    buffer = io.BytesIO()
+    # Image rows run top-down, the y axis bottom-up
+    Image.fromarray(rgba[::-1], "RGBA").save(buffer, format="PNG", compress_level=1)
+    return "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def probability_surface(surface, x, y):
+    """Predicted class over a whatif.Surface as an image, with (x, y) marked.
+
+    Built fresh for every slider move. The 101 x 101 grid goes to the browser
+    as a ~1 KB PNG rather than a heatmap trace: plotly validates and serializes
+    heatmap cells one by one (~35 ms and ~60 KB for this grid).
+    """
+    return go.Figure(dict(
+        data=[
+            dict(
+                type='image',
+                source=surface_png(surface),
+                x0=0,
+                dx=1,
+                y0=len(surface.labels) - 1,
+                dy=-1,
+                hoverinfo='skip',
+            ),
+            dict(
+                type='scatter',
+                x=[x],
+                y=[y],
+                mode='markers',
+                marker=dict(symbol='star', size=18, color='white', line=dict(color='black', width=1)),
+                hovertemplate=f'<b>This student</b><br>{surface.x_subject} %{{x}} · {surface.y_subject} %{{y}}<extra></extra>',
+            ),
+        ],
+        layout=_surface_layout(surface.x_subject, surface.y_subject),
+    ))
+
+
+# ---------------------- Cohort Dashboard ----------------------
+DENSITY_BIN_WIDTH = 2
+SCATTER_JITTER = 0.35
+
+
+@functools.lru_cache(maxsize=None)
+def _cohort_layout(trace_type, x_title, y_title, barmode=None, equal_axes=False):
+    layout = dict(_bar_layout(), template=_template(trace_type), hovermode='closest')
+    layout["xaxis"] = dict(layout["xaxis"], title=x_title)
+    layout["yaxis"] = dict(layout["yaxis"], title=y_title)
+    if equal_axes:
+        layout["yaxis"].update(scaleanchor='x', showgrid=False)
+    if barmode is not None:
+        layout["barmode"] = barmode
+    layout["legend"] = dict(orientation='h', y=1.08, font=dict(color='white'))
+    return layout
+
+
+def cohort_figures(aggregate):
+    """Dashboard figures for a cohort.CohortAggregate, keyed by name.
+
+    Every trace is drawn from the aggregate's fixed-size arrays - histograms,
+    counts and the reservoir sample - never from rows, so building and sending
+    these costs the same for a thousand students or a million. The density map
+    is a heatmap of server-side 2-D bins rather than a Histogram2d trace, which
+    would need every point in the browser. Arrays go in as lists (the bundled
+    plotly.js can't decode plotly's base64 numpy encoding) with per-element
+    validation skipped, since they come straight from numpy.
+    """
+    from cohort import GENDERS, SCORE_BINS, SUBJECTS
+
+    scores = list(range(SCORE_BINS))
+    distributions = go.Figure(dict(
+        data=[
+            dict(type='bar', name=subject, x=scores, y=hist.tolist(), opacity=0.6,
+                 hovertemplate=f'<b>{subject} %{{x}}</b><br>Students: %{{y:,}}<extra></extra>')
+            for subject, hist in zip(SUBJECTS, aggregate.score_hist)
+        ],
+        layout=_cohort_layout("bar", "Score", "Students", barmode='overlay'),
+    ), _validate=False)
+
+    present = [i for i, row in enumerate(aggregate.counts) if row.any()] or [0, 1]
+    by_gender = go.Figure(dict(
+        data=[
+            dict(type='bar', name=level, x=[GENDERS[i] for i in present], y=aggregate.counts[present, j].tolist(),
+                 marker=dict(color=LEVEL_COLORS[j], line=dict(color='rgba(255,255,255,0.3)', width=2)),
+                 hovertemplate=f'<b>%{{x}} · {level}</b><br>Students: %{{y:,}}<extra></extra>')
+            for j, level in enumerate(LEVELS)
+        ],
+        layout=_cohort_layout("bar", "Gender", "Students", barmode='group'),
+    ))
+
+    # Scores are integers, so sampled points are jittered to show how many share a cell
+    sample = aggregate.sample
+    jitter = np.random.default_rng(0).uniform(-SCATTER_JITTER, SCATTER_JITTER, (len(sample), 2))
+    scatter = go.Figure(dict(
+        data=[
+            dict(type='scattergl', mode='markers', name=level,
+                 x=(sample[mask, 0] + jitter[mask, 0]).round(2).tolist(),
+                 y=(sample[mask, 1] + jitter[mask, 1]).round(2).tolist(),
+                 marker=dict(color=LEVEL_COLORS[j], size=4, opacity=0.6),
+                 hovertemplate=f'<b>{level}</b><br>Math %{{x:.0f}} · Reading %{{y:.0f}}<extra></extra>')
+            for j, level in enumerate(LEVELS)
+            for mask in [sample[:, 4] == j]
+        ],
+        layout=_cohort_layout("scattergl", "Math score", "Reading score", equal_axes=True),
+    ), _validate=False)
+
+    edges = np.arange(0, SCORE_BINS, DENSITY_BIN_WIDTH)
+    counts = aggregate.density.sum(axis=0)
+    counts = np.add.reduceat(np.add.reduceat(counts, edges, axis=0), edges, axis=1)
+    density = go.Figure(dict(
+        data=[dict(
+            type='heatmap',
+            x=edges.tolist(),
+            y=edges.tolist(),
+            z=counts.T.tolist(),  # z rows run along y (reading)
+            colorscale='Viridis',
+            colorbar=dict(tickfont=dict(color='white'), thickness=12),
+            hovertemplate=f'Math %{{x}} · Reading %{{y}} ({DENSITY_BIN_WIDTH}-point bins)<br>Students: %{{z:,}}<extra></extra>',
+        )],
+        layout=_cohort_layout("heatmap", "Math score", "Reading score", equal_axes=True),
+    ), _validate=False)
+
+    return {
+        "score_distributions": distributions,
+        "category_by_gender": by_gender,
+        "math_vs_reading": scatter,
+        "math_vs_reading_density": density,
+    }
+
+
+def cache_info():
+    return {
+        "confidence_bar": _confidence_bar.cache_info(),
+        "performance_gauge": _performance_gauge.cache_info(),
+        "category_distribution": _category_distribution.cache_info(),
+        "performance_histogram": _performance_histogram.cache_info(),
+    }
+
+
+def cache_clear():
+    _confidence_bar.cache_clear()
+    _performance_gauge.cache_clear()
+    _category_distribution.cache_clear()
+    _performance_histogram.cache_clear()
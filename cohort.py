@@ -0,0 +1,154 @@
+"""Constant-size cohort aggregates for the district-level dashboard.
+
+A `CohortAggregate` is filled chunk by chunk while a cohort file is scored
+(batch.score_chunk) and never holds rows: whatever the cohort size it keeps
+
+    counts[gender, class]           predicted category by Female / Male / Other
+    score_hist[subject, score]      one 101-bin histogram per subject (0..100)
+    density[class, math, reading]   101 x 101 math-vs-reading histogram per class
+    sample                          a uniform random sample of SAMPLE_SIZE students
+
+Everything is updated with np.bincount / np.argpartition over whole chunks, and
+the charts (charts.cohort_figures) are drawn from these arrays, so the browser
+payload depends on SAMPLE_SIZE and the bin counts, not on the number of rows.
+
+    python cohort.py synth students.csv --rows 1000000   # synthetic cohort for testing
+    python cohort.py bench --rows 1000000                # aggregate + figure timings
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from features import gender_codes
+from inference import LEVELS
+
+GENDERS = ("Female", "Male", "Other")
+SUBJECTS = ("Math", "Reading", "Writing")
+SCORE_BINS = 101
+SAMPLE_SIZE = 5_000
+
+
+def score_bins(scores):
+    """Integer 0..100 bin for each score (rounded and clipped)."""
+    return np.clip(np.rint(scores), 0, SCORE_BINS - 1).astype(np.intp)
+
+
+class CohortAggregate:
+    def __init__(self, sample_size=SAMPLE_SIZE, seed=0):
+        n_classes = len(LEVELS)
+        self.rows = 0
+        self.counts = np.zeros((len(GENDERS), n_classes), dtype=np.int64)
+        self.score_hist = np.zeros((len(SUBJECTS), SCORE_BINS), dtype=np.int64)
+        self.density = np.zeros((n_classes, SCORE_BINS, SCORE_BINS), dtype=np.int64)
+        self.sample_size = sample_size
+        # Reservoir: the SAMPLE_SIZE rows with the smallest random keys seen so
+        # far are a uniform sample without replacement of everything added
+        self.sample_keys = np.empty(0)
+        self.sample = np.empty((0, 5), dtype=np.int16)  # math, reading, writing, gender, class
+        self._rng = np.random.default_rng(seed)
+
+    def add(self, math, reading, writing, genders, labels):
+        """Fold one scored chunk in; `genders` may be labels or 0/1/2 codes."""
+        bins = [score_bins(s) for s in (math, reading, writing)]
+        codes = gender_codes(genders)
+        labels = np.asarray(labels, dtype=np.intp)
+        n_classes = len(LEVELS)
+
+        self.rows += len(labels)
+        self.counts += np.bincount(codes * n_classes + labels, minlength=self.counts.size).reshape(self.counts.shape)
+        for i, b in enumerate(bins):
+            self.score_hist[i] += np.bincount(b, minlength=SCORE_BINS)
+        cell = (labels * SCORE_BINS + bins[0]) * SCORE_BINS + bins[1]
+        self.density += np.bincount(cell, minlength=self.density.size).reshape(self.density.shape)
+
+        keys = np.concatenate([self.sample_keys, self._rng.random(len(labels))])
+        points = np.concatenate([self.sample, np.column_stack(bins + [codes, labels]).astype(np.int16)])
+        if len(keys) > self.sample_size:
+            keep = np.argpartition(keys, self.sample_size)[:self.sample_size]
+            keys, points = keys[keep], points[keep]
+        self.sample_keys, self.sample = keys, points
+
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.counts, self.score_hist, self.density, self.sample_keys, self.sample))
+
+    def summary(self):
+        classes = self.counts.sum(axis=0)
+        scores = np.arange(SCORE_BINS)
+        return {
+            "rows": self.rows,
+            "categories": dict(zip(LEVELS, classes.tolist())),
+            "by_gender": {g: dict(zip(LEVELS, row.tolist())) for g, row in zip(GENDERS, self.counts) if row.any()},
+            "mean": {
+                s: float(hist @ scores / max(hist.sum(), 1)) for s, hist in zip(SUBJECTS, self.score_hist)
+            },
+            "sampled": len(self.sample),
+        }
+
+
+# ---------------------- CLI ----------------------
+def synthetic_cohort(rows, seed=0):
+    """(math, reading, writing, genders) shaped roughly like the training data."""
+    rng = np.random.default_rng(seed)
+    ability = rng.normal(66, 14, rows)
+    math, reading, writing = (np.clip(np.rint(ability + rng.normal(0, 7, rows)), 0, 100).astype(np.int64) for _ in range(3))
+    genders = np.where(rng.random(rows) < 0.52, "female", "male")
+    return math, reading, writing, genders
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Synthetic cohorts and cohort aggregate timings.")
+    parser.add_argument("command", choices=["synth", "bench"])
+    parser.add_argument("path", nargs="?", help="output file for synth (.csv or .parquet)")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    args = parser.parse_args(argv)
+
+    math, reading, writing, genders = synthetic_cohort(args.rows)
+    if args.command == "synth":
+        import pandas as pd
+
+        frame = pd.DataFrame({"math score": math, "reading score": reading, "writing score": writing, "gender": genders})
+        if args.path.endswith((".parquet", ".pq")):
+            frame.to_parquet(args.path, index=False)
+        else:
+            frame.to_csv(args.path, index=False)
+        print(f"Wrote {args.rows:,} students to {args.path}")
+        return 0
+
+    import plotly.io as pio
+
+    from charts import cohort_figures
+    from registry import ModelRegistry
+
+    model = ModelRegistry(poll_seconds=0).load()
+    aggregate = CohortAggregate()
+    score_seconds = add_seconds = 0.0
+    for lo in range(0, args.rows, args.chunksize):
+        part = slice(lo, lo + args.chunksize)
+        start = time.perf_counter()
+        codes = gender_codes(genders[part])
+        labels, _ = model.engine.predict(model.plan.build(math[part], reading[part], writing[part], codes))
+        middle = time.perf_counter()
+        aggregate.add(math[part], reading[part], writing[part], codes, labels)
+        score_seconds += middle - start
+        add_seconds += time.perf_counter() - middle
+
+    cohort_figures(aggregate)  # the first call also loads plotly's templates
+    start = time.perf_counter()
+    figures = cohort_figures(aggregate)
+    figure_seconds = time.perf_counter() - start
+    payload = {name: len(pio.to_json(fig, validate=False)) for name, fig in figures.items()}
+    print(f"{args.rows:,} rows in chunks of {args.chunksize:,}:")
+    print(f"  scoring     {score_seconds:7.3f} s  ({args.rows / score_seconds:,.0f} rows/s)")
+    print(f"  aggregating {add_seconds:7.3f} s  ({args.rows / add_seconds:,.0f} rows/s)")
+    print(f"  figures     {figure_seconds * 1000:7.1f} ms")
+    print(f"  aggregate   {aggregate.nbytes() / 1e3:7.1f} KB in memory")
+    for name, size in payload.items():
+        print(f"  {name:<20} {size / 1e3:7.1f} KB payload")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+"""Constant-memory monitoring of live inputs and predictions for drift.
+
+Every prediction updates a few fixed-size summaries and nothing else:
+
+    moments[feature]      running count / mean / M2 (Welford) of each model input
+    hist[subject, score]  one 101-bin histogram per subject (0..100)
+    mix[class]            Low / Medium / High prediction counts
+
+so memory does not grow with traffic and an update costs a few microseconds.
+`drift_report` compares the running moments with the statistics the scaler
+was fitted on (mean_/scale_, carried in fused_model.npz): per feature, the
+shift of the live mean in training standard deviations and the log ratio of
+the live and training spreads; the drift score is the largest of these. Given
+an earlier snapshot as a baseline it also reports the population stability
+index (PSI) of each score histogram and of the prediction mix against it.
+Scores of DRIFT_WARN and DRIFT_ALERT and above are flagged; a PSI of 0.25 is
+conventionally read as a significant shift.
+
+Snapshots are JSON files and can be compared later:
+
+    DRIFT_WARN=0.25         drift score flagged as "warn"
+    DRIFT_ALERT=0.5         drift score flagged as "alert"
+    DRIFT_MIN_COUNT=100     predictions needed before a status is given
+    DRIFT_SNAPSHOT_DIR=drift_snapshots
+
+    python drift.py report drift_snapshots/20261018-120000.json --baseline drift_snapshots/<older>.json
+    python drift.py bench   # per-prediction overhead and memory
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+from inference import LEVELS
+
+DRIFT_WARN = float(os.environ.get("DRIFT_WARN", 0.25))
+DRIFT_ALERT = float(os.environ.get("DRIFT_ALERT", 0.5))
+DRIFT_MIN_COUNT = int(os.environ.get("DRIFT_MIN_COUNT", 100))
+DRIFT_SNAPSHOT_DIR = os.environ.get("DRIFT_SNAPSHOT_DIR", "drift_snapshots")
+
+INPUTS = ("math score", "reading score", "writing score", "gender_encoded")
+SUBJECTS = ("Math", "Reading", "Writing")
+SCORE_BINS = 101
+PSI_EPSILON = 1e-4
+
+
+class DriftMonitor:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.count = 0
+            self.started_at = time.time()
+            # Plain lists: cheaper than numpy for the one-row updates on the hot path
+            self._mean = [0.0] * len(INPUTS)
+            self._m2 = [0.0] * len(INPUTS)
+            self._hist = [[0] * SCORE_BINS for _ in SUBJECTS]
+            self._mix = [0] * len(LEVELS)
+
+    def observe(self, math_score, reading, writing, gender_encoded, label):
+        """Fold in one prediction; `gender_encoded` is the model's 0/1 input."""
+        row = (math_score, reading, writing, gender_encoded)
+        with self._lock:
+            n = self.count = self.count + 1
+            mean, m2 = self._mean, self._m2
+            for i, x in enumerate(row):
+                delta = x - mean[i]
+                mean[i] += delta / n
+                m2[i] += delta * (x - mean[i])
+            for hist, score in zip(self._hist, row):
+                hist[min(max(int(round(score)), 0), SCORE_BINS - 1)] += 1
+            self._mix[int(label)] += 1
+
+    def observe_many(self, scores, gender_encoded, labels):
+        """Fold in a batch: `scores` is (n, 3), the others length n."""
+        X = np.column_stack([np.asarray(scores, dtype=np.float64), np.asarray(gender_encoded, dtype=np.float64)])
+        n_b = len(X)
+        if n_b == 0:
+            return
+        mean_b = X.mean(axis=0)
+        m2_b = ((X - mean_b) ** 2).sum(axis=0)
+        bins = np.clip(np.rint(X[:, :3]), 0, SCORE_BINS - 1).astype(np.intp)
+        hists = [np.bincount(bins[:, i], minlength=SCORE_BINS) for i in range(len(SUBJECTS))]
+        mix = np.bincount(np.asarray(labels, dtype=np.intp), minlength=len(LEVELS))
+        with self._lock:
+            # Chan et al.: merge the batch's moments into the running ones
+            n_a = self.count
+            n = self.count = n_a + n_b
+            mean_a, m2_a = np.array(self._mean), np.array(self._m2)
+            delta = mean_b - mean_a
+            self._mean = (mean_a + delta * n_b / n).tolist()
+            self._m2 = (m2_a + m2_b + delta ** 2 * n_a * n_b / n).tolist()
+            self._hist = [(np.array(h) + b).tolist() for h, b in zip(self._hist, hists)]
+            self._mix = (np.array(self._mix) + mix).tolist()
+
+    def state(self):
+        """Plain, JSON-able copy of the summaries."""
+        with self._lock:
+            return {
+                "inputs": list(INPUTS),
+                "count": self.count,
+                "started_at": self.started_at,
+                "mean": list(self._mean),
+                "m2": list(self._m2),
+                "hist": [list(h) for h in self._hist],
+                "mix": list(self._mix),
+            }
+
+    def nbytes(self):
+        """Size of the summaries (constant, whatever the traffic)."""
+        return sys.getsizeof(self._mean) + sys.getsizeof(self._m2) + sys.getsizeof(self._mix) + sum(
+            sys.getsizeof(h) for h in self._hist
+        )
+
+    def save(self, path=None, **meta):
+        """Write a snapshot (plus JSON-able `meta`) to `path`, by default a timestamped file."""
+        if path is None:
+            path = os.path.join(DRIFT_SNAPSHOT_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        snapshot = {**self.state(), "saved_at": time.time(), **meta}
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, path)
+        return path
+
+
+def load_snapshot(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+# ---------------------- Comparison ----------------------
+def reference_from(artifacts):
+    """The scaler's training mean/scale for each monitored input the model uses."""
+    engine = artifacts.engine
+    names = engine.feature_names_in or list(artifacts.feature_columns)
+    if engine.mean is not None:
+        mean, scale = engine.mean, engine.scale
+    else:
+        # fused_model.npz exported before it carried them; read the scaler itself
+        mean, scale = artifacts.scaler.mean_, artifacts.scaler.scale_
+    index = {name: i for i, name in enumerate(names)}
+    features = [f for f in INPUTS if f in index]
+    return {
+        "features": features,
+        "mean": [float(mean[index[f]]) for f in features],
+        "scale": [float(scale[index[f]]) for f in features],
+    }
+
+
+def psi(actual, expected):
+    """Population stability index of two count vectors over the same bins."""
+    p = np.asarray(actual, dtype=np.float64)
+    q = np.asarray(expected, dtype=np.float64)
+    p = np.maximum(p / max(p.sum(), 1), PSI_EPSILON)
+    q = np.maximum(q / max(q.sum(), 1), PSI_EPSILON)
+    return float(((p - q) * np.log(p / q)).sum())
+
+
+def _status(score, count):
+    if count < DRIFT_MIN_COUNT:
+        return "insufficient data"
+    if score >= DRIFT_ALERT:
+        return "alert"
+    if score >= DRIFT_WARN:
+        return "warn"
+    return "ok"
+
+
+def drift_report(state, reference, baseline=None):
+    """Drift of a monitor state against the scaler's statistics (and a baseline snapshot)."""
+    count = state["count"]
+    features = []
+    for name, ref_mean, ref_scale in zip(reference["features"], reference["mean"], reference["scale"]):
+        i = state["inputs"].index(name)
+        mean = state["mean"][i]
+        std = math.sqrt(state["m2"][i] / count) if count else 0.0
+        shift = abs(mean - ref_mean) / ref_scale if ref_scale else 0.0
+        # A constant input (std 0) counts as a 100x narrower spread rather than an infinite one
+        spread = abs(math.log(max(std, ref_scale / 100) / ref_scale)) if count > 1 and ref_scale else 0.0
+        features.append({
+            "feature": name,
+            "live_mean": round(mean, 3),
+            "train_mean": round(ref_mean, 3),
+            "live_std": round(std, 3),
+            "train_std": round(ref_scale, 3),
+            "mean_shift": round(shift, 4),
+            "spread_ratio": round(spread, 4),
+            "drift": round(max(shift, spread), 4) if count else 0.0,
+        })
+    scores = [f["drift"] for f in features]
+
+    report = {
+        "count": count,
+        "since": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(state["started_at"])),
+        "features": features,
+        "mix": {level: c / max(count, 1) for level, c in zip(LEVELS, state["mix"])},
+    }
+    if baseline is not None:
+        compared = {s: psi(h, b) for s, h, b in zip(SUBJECTS, state["hist"], baseline["hist"])}
+        compared["Prediction mix"] = psi(state["mix"], baseline["mix"])
+        report["baseline_psi"] = {k: round(v, 4) for k, v in compared.items()}
+        report["baseline_count"] = baseline["count"]
+        scores += list(compared.values())
+    report["score"] = round(max(scores, default=0.0), 4)
+    report["status"] = _status(report["score"], count)
+    return report
+
+
+# Process-wide monitor shared by every session
+DRIFT = DriftMonitor()
+
+
+# ---------------------- CLI ----------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drift reports from monitor snapshots, and monitor timings.")
+    parser.add_argument("command", choices=["report", "bench"])
+    parser.add_argument("snapshot", nargs="?", help="snapshot to report on")
+    parser.add_argument("--baseline", help="earlier snapshot to compare against")
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args(argv)
+
+    from registry import ModelRegistry
+
+    reference = reference_from(ModelRegistry(poll_seconds=0).load())
+    if args.command == "report":
+        if args.snapshot is None:
+            parser.error("report needs a snapshot")
+        baseline = load_snapshot(args.baseline) if args.baseline else None
+        print(json.dumps(drift_report(load_snapshot(args.snapshot), reference, baseline), indent=2))
+        return 0
+
+    from cohort import synthetic_cohort
+
+    math_s, reading, writing, genders = synthetic_cohort(args.rows)
+    gender_encoded = (genders != "female").astype(np.int64)
+    labels = np.digitize((math_s + reading + writing) / 3, [60, 80])
+    rows = list(zip(math_s.tolist(), reading.tolist(), writing.tolist(), gender_encoded.tolist(), labels.tolist()))
+    monitor = DriftMonitor()
+    start = time.perf_counter()
+    for row in rows:
+        monitor.observe(*row)
+    one_seconds = time.perf_counter() - start
+    batched = DriftMonitor()
+    start = time.perf_counter()
+    batched.observe_many(np.column_stack([math_s, reading, writing]), gender_encoded, labels)
+    many_seconds = time.perf_counter() - start
+    state = monitor.state()
+    assert np.allclose(state["mean"], batched.state()["mean"]) and np.allclose(state["m2"], batched.state()["m2"])
+    start = time.perf_counter()
+    report = drift_report(state, reference)
+    report_seconds = time.perf_counter() - start
+    print(f"{args.rows:,} predictions:")
+    print(f"  observe       {one_seconds / args.rows * 1e6:7.2f} µs per prediction")
+    print(f"  observe_many  {many_seconds / args.rows * 1e9:7.1f} ns per row")
+    print(f"  report        {report_seconds * 1e6:7.1f} µs")
+    print(f"  summaries     {monitor.nbytes() / 1e3:7.1f} KB")
+    print(f"  drift score   {report['score']:7.3f} ({report['status']})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
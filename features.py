@@ -0,0 +1,100 @@
+"""Schema-compiled, vectorized feature builder shared by every scoring path.
+
+`FeaturePlan` compiles the model's feature list (model_features.joblib) once
+into a column-index plan, then fills a preallocated float matrix straight from
+numpy arrays of scores and genders - no per-row dicts or DataFrames.
+
+It mirrors the rules in app.py exactly: `performance` is the mean of the three
+scores, `performance_encoded` buckets it at 60/80, gender is 0 for female and 1
+otherwise, and any column the model expects that we can't build is left at 0
+(same as `reindex(columns=feature_columns, fill_value=0)`). A retrained model
+using any subset of the candidate columns needs no code changes.
+"""
+import numpy as np
+
+SCORE_COLUMNS = ("math score", "reading score", "writing score")
+PERFORMANCE_BINS = np.array([60.0, 80.0])
+
+CANDIDATE_COLUMNS = SCORE_COLUMNS + (
+    "performance",
+    "performance_encoded",
+    "gender_encoded",
+    "gender_female",
+    "gender_male",
+)
+
+
+def gender_masks(genders):
+    """Return (female, male) boolean masks from gender labels or 0/1 codes."""
+    genders = np.asarray(genders).reshape(-1)
+    if genders.dtype.kind in "iub":
+        return genders == 0, genders == 1
+    lowered = np.char.lower(genders.astype(str))
+    return lowered == "female", lowered == "male"
+
+
+def gender_codes(genders):
+    """0 for female, 1 for male, 2 for anything else, as int8; FeaturePlan.build accepts these."""
+    female, male = gender_masks(genders)
+    return np.where(female, 0, np.where(male, 1, 2)).astype(np.int8)
+
+
+def encode_gender(genders):
+    # 0 for female, 1 for anything else - same as app.py's gender_encoded
+    female, _ = gender_masks(genders)
+    return np.where(female, 0, 1)
+
+
+class FeaturePlan:
+    def __init__(self, feature_columns):
+        self.feature_columns = list(feature_columns)
+        self.n_features = len(self.feature_columns)
+        index = {col: j for j, col in enumerate(self.feature_columns)}
+
+        # column name -> output index, only for columns the model actually uses
+        self.scores = [(index[c], k) for k, c in enumerate(SCORE_COLUMNS) if c in index]
+        self.performance = index.get("performance")
+        self.performance_encoded = index.get("performance_encoded")
+        self.gender_encoded = index.get("gender_encoded")
+        self.gender_female = index.get("gender_female")
+        self.gender_male = index.get("gender_male")
+        self.missing = [c for c in self.feature_columns if c not in CANDIDATE_COLUMNS]
+        self.missing_index = [index[c] for c in self.missing]
+        self.needs_performance = self.performance is not None or self.performance_encoded is not None
+
+    def __repr__(self):
+        return f"FeaturePlan({self.feature_columns!r}, missing={self.missing!r})"
+
+    def build(self, math, reading, writing, genders, out=None):
+        """Return an (n, n_features) float64 matrix; `genders` may be labels or 0/1 codes."""
+        scores = (
+            np.asarray(math, dtype=np.float64).reshape(-1),
+            np.asarray(reading, dtype=np.float64).reshape(-1),
+            np.asarray(writing, dtype=np.float64).reshape(-1),
+        )
+        n = scores[0].shape[0]
+        if out is None:
+            out = np.empty((n, self.n_features), dtype=np.float64)
+
+        for j, k in self.scores:
+            out[:, j] = scores[k]
+
+        if self.needs_performance:
+            performance = (scores[0] + scores[1] + scores[2]) / 3
+            if self.performance is not None:
+                out[:, self.performance] = performance
+            if self.performance_encoded is not None:
+                out[:, self.performance_encoded] = np.digitize(performance, PERFORMANCE_BINS)
+
+        if self.gender_encoded is not None or self.gender_female is not None or self.gender_male is not None:
+            female, male = gender_masks(genders)
+            if self.gender_encoded is not None:
+                out[:, self.gender_encoded] = ~female
+            if self.gender_female is not None:
+                out[:, self.gender_female] = female
+            if self.gender_male is not None:
+                out[:, self.gender_male] = male
+
+        for j in self.missing_index:
+            out[:, j] = 0.0
+        return out
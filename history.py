@@ -0,0 +1,352 @@
+"""Local prediction history store (stand-in for the Supabase `predictions` table).
+
+Backed by a SQLite database in WAL mode, indexed by (user_id, created_at, id).
+`record()` only puts the prediction on an in-memory queue; a background writer
+thread drains the queue and inserts in batched transactions, so the Streamlit
+script thread never waits on disk. A batch that can't be written (database
+locked, disk full) is retried a few times and then dropped with a message on
+stderr; the writer keeps going. History pages use keyset pagination on
+(created_at, id), so fetching a page costs the same at any depth.
+
+Per-user statistics (category counts, sums and sums of squares of each score,
+a fixed-bin histogram of `performance`) are kept as running aggregates in
+`user_stats` / `performance_hist`. The writer folds each batch into them in
+the same transaction as the inserts, so they never disagree with the history
+and the Statistics view is two primary-key lookups however long it is.
+
+    HISTORY_DB=history.db   location of the database (default: history.db)
+
+    python history.py rebuild-stats   # recompute the aggregates from the predictions table
+    python history.py stats --user U  # print one user's aggregates
+"""
+import argparse
+import atexit
+import collections
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+
+from inference import LEVELS
+
+DB_PATH = os.environ.get("HISTORY_DB", "history.db")
+BATCH_SIZE = 500
+FLUSH_INTERVAL = 0.2
+PAGE_SIZE = 20
+WRITE_RETRIES = 3
+RETRY_DELAY = 1.0
+
+COLUMNS = (
+    "user_id", "created_at", "math", "reading", "writing", "gender",
+    "performance", "predicted_category", "prob_low", "prob_medium", "prob_high", "model_version",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    math INTEGER NOT NULL,
+    reading INTEGER NOT NULL,
+    writing INTEGER NOT NULL,
+    gender TEXT NOT NULL,
+    performance REAL NOT NULL,
+    predicted_category TEXT NOT NULL,
+    prob_low REAL NOT NULL,
+    prob_medium REAL NOT NULL,
+    prob_high REAL NOT NULL,
+    model_version TEXT
+);
+CREATE INDEX IF NOT EXISTS predictions_user_time ON predictions (user_id, created_at DESC, id DESC);
+
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id TEXT PRIMARY KEY,
+    n INTEGER NOT NULL,
+    n_low INTEGER NOT NULL,
+    n_medium INTEGER NOT NULL,
+    n_high INTEGER NOT NULL,
+    sum_math REAL NOT NULL,
+    sumsq_math REAL NOT NULL,
+    sum_reading REAL NOT NULL,
+    sumsq_reading REAL NOT NULL,
+    sum_writing REAL NOT NULL,
+    sumsq_writing REAL NOT NULL,
+    sum_performance REAL NOT NULL,
+    sumsq_performance REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS performance_hist (
+    user_id TEXT NOT NULL,
+    bin INTEGER NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (user_id, bin)
+) WITHOUT ROWID;
+"""
+
+# ---------------------- Statistics Aggregates ----------------------
+STAT_SCORES = ("math", "reading", "writing", "performance")
+STAT_FIELDS = ("n", "n_low", "n_medium", "n_high") + tuple(
+    f"{kind}_{score}" for score in STAT_SCORES for kind in ("sum", "sumsq")
+)
+HIST_BINS = 10
+HIST_WIDTH = 100 / HIST_BINS
+
+UPSERT_STATS = (
+    f"INSERT INTO user_stats (user_id, {', '.join(STAT_FIELDS)}) "
+    f"VALUES (?, {', '.join('?' * len(STAT_FIELDS))}) "
+    f"ON CONFLICT (user_id) DO UPDATE SET {', '.join(f'{f} = {f} + excluded.{f}' for f in STAT_FIELDS)}"
+)
+UPSERT_HIST = (
+    "INSERT INTO performance_hist (user_id, bin, n) VALUES (?, ?, ?) "
+    "ON CONFLICT (user_id, bin) DO UPDATE SET n = n + excluded.n"
+)
+
+# Same aggregates computed from scratch; the bin expression must match performance_bin()
+REBUILD_STATS = f"""
+DELETE FROM user_stats;
+DELETE FROM performance_hist;
+INSERT INTO user_stats (user_id, {', '.join(STAT_FIELDS)})
+SELECT user_id, COUNT(*),
+       SUM(predicted_category = 'Low'), SUM(predicted_category = 'Medium'), SUM(predicted_category = 'High'),
+       {', '.join(f"SUM({s}), SUM({s} * {s})" for s in STAT_SCORES)}
+FROM predictions GROUP BY user_id;
+INSERT INTO performance_hist (user_id, bin, n)
+SELECT user_id, MIN(CAST(performance / {HIST_WIDTH} AS INTEGER), {HIST_BINS - 1}) AS bin, COUNT(*)
+FROM predictions GROUP BY user_id, bin;
+"""
+
+
+def performance_bin(performance):
+    return min(int(performance / HIST_WIDTH), HIST_BINS - 1)
+
+
+def aggregate(rows):
+    """Fold prediction rows (in COLUMNS order) into per-user stat and histogram deltas."""
+    stats = {}
+    hist = collections.Counter()
+    for user_id, _, math, reading, writing, _, performance, category, *_ in rows:
+        deltas = stats.get(user_id)
+        if deltas is None:
+            deltas = stats[user_id] = [0] * len(STAT_FIELDS)
+        deltas[0] += 1
+        deltas[1 + LEVELS.index(category)] += 1
+        for i, value in enumerate((math, reading, writing, performance)):
+            deltas[4 + 2 * i] += value
+            deltas[5 + 2 * i] += value * value
+        hist[user_id, performance_bin(performance)] += 1
+    return stats, hist
+
+
+def rebuild_stats(conn):
+    """Recompute every user's aggregates from the predictions table (repair)."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for statement in REBUILD_STATS.split(";"):
+            if statement.strip():
+                conn.execute(statement)
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def connect(path):
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class HistoryStore:
+    def __init__(self, path=DB_PATH, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue()
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self._local = threading.local()
+
+        conn = connect(path)
+        with conn:
+            conn.executescript(SCHEMA)
+            # Databases created before predictions carried a model version
+            if "model_version" not in {row[1] for row in conn.execute("PRAGMA table_info(predictions)")}:
+                conn.execute("ALTER TABLE predictions ADD COLUMN model_version TEXT")
+        # Databases from before the aggregates existed get them backfilled once
+        if conn.execute(
+            "SELECT EXISTS (SELECT 1 FROM predictions) AND NOT EXISTS (SELECT 1 FROM user_stats)"
+        ).fetchone()[0]:
+            rebuild_stats(conn)
+        conn.close()
+
+        self._closed = threading.Event()
+        self._writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+        self._writer.start()
+
+    # ---------------------- Writes ----------------------
+    def record(self, user_id, math, reading, writing, gender, performance, category, probabilities, model_version=None):
+        """Queue one prediction for the background writer; never blocks on disk."""
+        self.queue.put((
+            user_id, time.time(), int(math), int(reading), int(writing), gender,
+            float(performance), category, *(float(p) for p in probabilities), model_version,
+        ))
+
+    def _write_batch(self, conn, rows):
+        stats, hist = aggregate(rows)
+        with conn:
+            conn.executemany(
+                f"INSERT INTO predictions ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                rows,
+            )
+            conn.executemany(UPSERT_STATS, [(user_id, *deltas) for user_id, deltas in stats.items()])
+            conn.executemany(UPSERT_HIST, [(user_id, b, n) for (user_id, b), n in hist.items()])
+        self.written += len(rows)
+        self.batches += 1
+
+    def _write_loop(self):
+        conn = connect(self.path)
+        while not (self._closed.is_set() and self.queue.empty()):
+            try:
+                rows = [self.queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            # Give concurrent predictions a moment to join this transaction
+            deadline = time.monotonic() + self.flush_interval
+            while len(rows) < self.batch_size:
+                try:
+                    rows.append(self.queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            try:
+                self._write_with_retries(conn, rows)
+            finally:
+                for _ in rows:
+                    self.queue.task_done()
+        conn.close()
+
+    def _write_with_retries(self, conn, rows):
+        # A failed write (database locked past the busy timeout by a long
+        # `rebuild-stats`, disk full, ...) must not stop the writer: retry a
+        # few times, then drop the batch and carry on with the next one.
+        for attempt in range(1, WRITE_RETRIES + 1):
+            try:
+                self._write_batch(conn, rows)
+                return
+            except sqlite3.Error as exc:
+                print(f"history: writing {len(rows)} predictions failed (attempt {attempt}/{WRITE_RETRIES}): "
+                      f"{type(exc).__name__}: {exc}", file=sys.stderr)
+                if attempt < WRITE_RETRIES:
+                    time.sleep(RETRY_DELAY * attempt)
+        self.dropped += len(rows)
+        print(f"history: dropped {len(rows)} predictions ({self.dropped} so far)", file=sys.stderr)
+
+    def flush(self):
+        """Block until everything queued so far is on disk."""
+        self.queue.join()
+
+    def close(self):
+        self._closed.set()
+        self._writer.join()
+
+    # ---------------------- Reads ----------------------
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect(self.path)
+            conn.row_factory = sqlite3.Row
+        return conn
+
+    def page(self, user_id, cursor=None, limit=PAGE_SIZE):
+        """Return (rows, next_cursor), newest first.
+
+        `cursor` is the (created_at, id) of the last row of the previous page;
+        next_cursor is None when there are no older rows.
+        """
+        sql = "SELECT * FROM predictions WHERE user_id = ?"
+        params = [user_id]
+        if cursor is not None:
+            sql += " AND (created_at, id) < (?, ?)"
+            params += list(cursor)
+        sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        rows = [dict(r) for r in self._conn().execute(sql, params)]
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = (rows[-1]["created_at"], rows[-1]["id"])
+        return rows, next_cursor
+
+    def stats(self, user_id):
+        """Summary for the Statistics view, or None before the first prediction.
+
+        Reads the running aggregates only, so the cost doesn't grow with history.
+        """
+        conn = self._conn()
+        row = conn.execute("SELECT * FROM user_stats WHERE user_id = ?", (user_id,)).fetchone()
+        if row is None:
+            return None
+        histogram = [0] * HIST_BINS
+        for b, n in conn.execute("SELECT bin, n FROM performance_hist WHERE user_id = ?", (user_id,)):
+            histogram[b] = n
+
+        n = row["n"]
+        mean, std = {}, {}
+        for score in STAT_SCORES:
+            mean[score] = row[f"sum_{score}"] / n
+            std[score] = max(row[f"sumsq_{score}"] / n - mean[score] ** 2, 0.0) ** 0.5
+        categories = {level: row[f"n_{level.lower()}"] for level in LEVELS}
+        return {
+            "total": n,
+            "categories": categories,
+            "most_common": max(LEVELS, key=categories.get),
+            "mean": mean,
+            "std": std,
+            "histogram": histogram,
+        }
+
+
+# ---------------------- Process-wide Store ----------------------
+_lock = threading.Lock()
+_store = None
+
+
+def get_store():
+    global _store
+    with _lock:
+        if _store is None:
+            _store = HistoryStore()
+            atexit.register(_store.close)
+        return _store
+
+
+# ---------------------- CLI ----------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain the prediction history database.")
+    parser.add_argument("command", choices=["rebuild-stats", "stats"])
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--user", default="local")
+    args = parser.parse_args(argv)
+
+    if args.command == "rebuild-stats":
+        conn = connect(args.db)
+        conn.executescript(SCHEMA)
+        start = time.perf_counter()
+        rebuild_stats(conn)
+        users, rows = conn.execute("SELECT COUNT(*), COALESCE(SUM(n), 0) FROM user_stats").fetchone()
+        conn.close()
+        print(f"Rebuilt statistics for {users:,} user(s) / {rows:,} predictions in {time.perf_counter() - start:.2f}s")
+        return 0
+
+    store = HistoryStore(args.db)
+    print(json.dumps(store.stats(args.user), indent=2))
+    store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
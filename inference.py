@@ -0,0 +1,198 @@
+"""Fused NumPy inference for the StandardScaler + LogisticRegression pair.
+
+The scaler's mean/scale are folded into the logistic coefficients once, so a
+prediction is a single matmul + softmax on a plain float array instead of
+scaler.transform -> model.predict -> model.predict_proba.
+
+The fused coefficients can be exported to a plain .npz file next to the
+joblib artifacts; loading that needs neither joblib nor scikit-learn (nor
+scipy, which sklearn pulls in), which is most of the app's cold start.
+
+    python inference.py          # parity check against the sklearn path
+    python inference.py export   # write fused_model.npz for the current artifacts
+"""
+import json
+import os
+import sys
+
+import numpy as np
+
+LEVELS = ["Low", "Medium", "High"]
+
+
+class FusedModel:
+    def __init__(self, coef, intercept, classes, multi_class="multinomial", feature_names_in=None,
+                 mean=None, scale=None):
+        self.coef = np.ascontiguousarray(coef, dtype=np.float64)
+        self.intercept = np.ascontiguousarray(intercept, dtype=np.float64)
+        self.classes = np.asarray(classes)
+        self.multi_class = multi_class
+        self.n_features = self.coef.shape[1]
+        # Column names the scaler was fitted on, when it recorded them
+        self.feature_names_in = None if feature_names_in is None else [str(c) for c in feature_names_in]
+        # The scaler's training mean/scale, kept for drift monitoring (drift.py), not inference
+        self.mean = None if mean is None else np.asarray(mean, dtype=np.float64)
+        self.scale = None if scale is None else np.asarray(scale, dtype=np.float64)
+
+    @classmethod
+    def from_sklearn(cls, model, scaler):
+        n_features = model.coef_.shape[1]
+        mean = scaler.mean_ if getattr(scaler, "with_mean", True) and scaler.mean_ is not None else np.zeros(n_features)
+        scale = scaler.scale_ if getattr(scaler, "with_std", True) and scaler.scale_ is not None else np.ones(n_features)
+
+        # (x - mean) / scale @ W.T + b  ==  x @ (W / scale).T + (b - (W / scale) @ mean)
+        coef = model.coef_ / scale
+        intercept = model.intercept_ - coef @ mean
+
+        # Integral class labels (the saved model stores 0., 1., 2.) become ints
+        # so they can index LEVELS directly.
+        classes = model.classes_
+        if np.issubdtype(classes.dtype, np.floating) and np.all(classes == np.round(classes)):
+            classes = classes.astype(np.int64)
+
+        multi_class = getattr(model, "multi_class", "auto")
+        if multi_class == "ovr" and len(classes) > 2:
+            mode = "ovr"
+        else:
+            mode = "multinomial"
+        return cls(coef, intercept, classes, multi_class=mode,
+                   feature_names_in=getattr(scaler, "feature_names_in_", None), mean=mean, scale=scale)
+
+    # ---------------------- NumPy Runtime ----------------------
+    def save(self, path, **meta):
+        """Write the fused parameters (plus JSON-able `meta`) to an .npz file atomically."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                coef=self.coef,
+                intercept=self.intercept,
+                classes=self.classes,
+                multi_class=np.array(self.multi_class),
+                feature_names_in=np.array(self.feature_names_in or [], dtype=str),
+                has_feature_names=np.array(self.feature_names_in is not None),
+                **({} if self.mean is None else {"mean": self.mean, "scale": self.scale}),
+                meta=np.array(json.dumps(meta)),
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Return (FusedModel, meta) from a file written by save()."""
+        with np.load(path, allow_pickle=False) as data:
+            engine = cls(
+                data["coef"], data["intercept"], data["classes"],
+                multi_class=str(data["multi_class"]),
+                feature_names_in=data["feature_names_in"].tolist() if data["has_feature_names"] else None,
+                # Files exported before the reference statistics were added lack them
+                mean=data["mean"] if "mean" in data.files else None,
+                scale=data["scale"] if "scale" in data.files else None,
+            )
+            meta = json.loads(str(data["meta"]))
+        return engine, meta
+
+    # ---------------------- Inference ----------------------
+    def decision_function(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        return X @ self.coef.T + self.intercept
+
+    def _proba_from_scores(self, scores):
+        if scores.shape[1] == 1:
+            # Binary model: sigmoid(z) == softmax([0, z])
+            scores = np.hstack([np.zeros_like(scores), scores])
+        elif self.multi_class == "ovr":
+            proba = 1.0 / (1.0 + np.exp(-scores))
+            return proba / proba.sum(axis=1, keepdims=True)
+
+        scores = scores - scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=1, keepdims=True)
+        return scores
+
+    def predict_proba(self, X):
+        return self._proba_from_scores(self.decision_function(X))
+
+    def predict(self, X):
+        """Return (labels, probabilities) for one row or N rows."""
+        proba = self.predict_proba(X)
+        labels = self.classes[proba.argmax(axis=1)]
+        return labels, proba
+
+
+# ---------------------- Parity Check ----------------------
+def random_inputs(feature_columns, n=10_000, seed=0):
+    rng = np.random.default_rng(seed)
+    X = np.empty((n, len(feature_columns)), dtype=np.float64)
+    for j, col in enumerate(feature_columns):
+        if col.endswith("score") or col == "performance":
+            X[:, j] = rng.integers(0, 101, n)
+        elif col == "performance_encoded":
+            X[:, j] = rng.integers(0, 3, n)
+        else:
+            X[:, j] = rng.integers(0, 2, n)
+    return X
+
+
+def check_parity(model, scaler, feature_columns, X=None, atol=1e-9):
+    """Compare FusedModel against the sklearn scaler.transform + predict path.
+
+    Returns a dict with the max absolute probability difference and the number
+    of label mismatches that are not explained by an exact tie between classes.
+    """
+    import pandas as pd
+
+    if X is None:
+        X = random_inputs(feature_columns)
+    frame = pd.DataFrame(X, columns=feature_columns)
+    scaled = scaler.transform(frame)
+    ref_labels = model.predict(scaled)
+    ref_proba = model.predict_proba(scaled)
+
+    engine = FusedModel.from_sklearn(model, scaler)
+    labels, proba = engine.predict(X)
+
+    max_diff = float(np.abs(proba - ref_proba).max())
+    top2 = np.sort(ref_proba, axis=1)[:, -2:]
+    near_tie = (top2[:, 1] - top2[:, 0]) <= atol
+    mismatches = int(((labels != ref_labels.astype(labels.dtype)) & ~near_tie).sum())
+    return {
+        "rows": len(X),
+        "max_abs_proba_diff": max_diff,
+        "label_mismatches": mismatches,
+        "ok": max_diff <= atol and mismatches == 0,
+    }
+
+
+def main(argv=None):
+    import argparse
+    import joblib
+    from artifacts import ARTIFACT_PATHS, artifact_hash, fused_model_path
+
+    parser = argparse.ArgumentParser(description="Check or export the fused NumPy model.")
+    parser.add_argument("command", nargs="?", choices=["check", "export"], default="check")
+    parser.add_argument("--dir", default=".", help="directory holding the three .joblib artifacts")
+    args = parser.parse_args(argv)
+
+    paths = tuple(os.path.join(args.dir, os.path.basename(p)) for p in ARTIFACT_PATHS)
+    model_path, scaler_path, features_path = paths
+    model = joblib.load(model_path)
+    scaler = joblib.load(scaler_path)
+    feature_columns = list(joblib.load(features_path))
+
+    result = check_parity(model, scaler, feature_columns)
+    print(result)
+    if not result["ok"]:
+        return 1
+    if args.command == "export":
+        path = fused_model_path(paths)
+        FusedModel.from_sklearn(model, scaler).save(
+            path, model_hash=artifact_hash(paths), feature_columns=feature_columns,
+        )
+        print(f"Wrote {path} ({os.path.getsize(path):,} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
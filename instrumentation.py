@@ -0,0 +1,86 @@
+"""Per-stage latency instrumentation for the prediction hot path.
+
+A `StageTimer` laps through the stages of one prediction (cache, features,
+inference, figures, render). Finished runs go into a process-wide rolling
+window per stage, from which the diagnostics panel reads p50/p95/p99. If
+TIMINGS_LOG is set, every run is also appended to that file as one JSON line
+for offline analysis.
+"""
+import collections
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+STAGES = ("cache", "features", "inference", "figures", "render", "total")
+WINDOW = 2000
+
+
+class StageTimer:
+    def __init__(self, recorder):
+        self.recorder = recorder
+        self.stages = {}
+        self.start = self._last = time.perf_counter()
+
+    def lap(self, stage):
+        """Attribute the time since the previous lap (or start) to `stage`."""
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + (now - self._last)
+        self._last = now
+
+    def finish(self):
+        self.stages["total"] = time.perf_counter() - self.start
+        self.recorder.record(self.stages)
+        return self.stages
+
+
+class LatencyRecorder:
+    def __init__(self, window=WINDOW, log_path=None):
+        self.window = window
+        self.log_path = log_path
+        self._samples = collections.defaultdict(lambda: collections.deque(maxlen=self.window))
+        self._counts = collections.Counter()
+        self._lock = threading.Lock()
+
+    def timer(self):
+        return StageTimer(self)
+
+    def record(self, stages):
+        with self._lock:
+            for stage, seconds in stages.items():
+                self._samples[stage].append(seconds)
+                self._counts[stage] += 1
+            if self.log_path:
+                with open(self.log_path, "a") as f:
+                    f.write(json.dumps({"ts": time.time(), "stages": stages}) + "\n")
+
+    def summary(self, current=None):
+        """One row per stage: current run and rolling-window percentiles, in ms."""
+        with self._lock:
+            samples = {stage: np.array(values) for stage, values in self._samples.items()}
+            counts = dict(self._counts)
+
+        rows = []
+        for stage in [s for s in STAGES if s in samples] + sorted(set(samples) - set(STAGES)):
+            values = samples[stage] * 1000
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            rows.append({
+                "stage": stage,
+                "current_ms": round(current[stage] * 1000, 3) if current and stage in current else None,
+                "p50_ms": round(float(p50), 3),
+                "p95_ms": round(float(p95), 3),
+                "p99_ms": round(float(p99), 3),
+                "runs": counts[stage],
+            })
+        return rows
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+
+
+# Process-wide recorder shared by every session
+TIMINGS = LatencyRecorder(log_path=os.environ.get("TIMINGS_LOG"))
@@ -0,0 +1,225 @@
+"""Process-wide background jobs, so long-running work never holds a script thread.
+
+UI code submits a function with `get_jobs().submit(user_id, title, fn, ...)`
+and gets a Job back right away; `fn(job, ...)` runs on a worker thread,
+reports progress with `job.update(fraction, message)` and calls
+`job.check_cancelled()` between units of work. The script thread lists the
+user's jobs with `jobs_for(user_id)` and renders `job.snapshot()` on each
+rerun; progress shows on whichever rerun comes next, nothing polls.
+
+Jobs belong to the user, not the session: they are kept in this process until
+they are dismissed or JOB_RETENTION seconds after they finish, so a user who
+navigates away and comes back (same ?user=, same server process) finds them
+running or finished. Work runs on threads: scoring is numpy/pandas work that
+releases the GIL for most of its time, and the uploaded file and loaded model
+can be used as they are instead of being pickled into another process (the
+command-line scorer, score_cli.py, is the multi-process path).
+
+Submissions are refused with JobRejected when the user already has
+JOB_USER_LIMIT jobs queued or running, or JOB_QUEUE_SIZE jobs are waiting for
+a worker.
+
+    JOB_WORKERS=2         worker threads
+    JOB_QUEUE_SIZE=16     jobs allowed to wait for a worker, across all users
+    JOB_USER_LIMIT=2      queued + running jobs per user
+    JOB_RETENTION=3600    seconds a finished job stays listed
+"""
+import collections
+import concurrent.futures
+import os
+import threading
+import time
+import traceback
+import uuid
+
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+JOB_QUEUE_SIZE = int(os.environ.get("JOB_QUEUE_SIZE", 16))
+JOB_USER_LIMIT = int(os.environ.get("JOB_USER_LIMIT", 2))
+JOB_RETENTION = float(os.environ.get("JOB_RETENTION", 3600))
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+ACTIVE = (QUEUED, RUNNING)
+
+
+class JobRejected(RuntimeError):
+    pass
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, user_id, title, cleanup=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.user_id = user_id
+        self.title = title
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = ""
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._cleanup = cleanup
+        self._cancel = threading.Event()
+        self._future = None
+
+    # ---------------------- Called by the job function ----------------------
+    def update(self, progress=None, message=None):
+        if progress is not None:
+            self.progress = min(max(float(progress), 0.0), 1.0)
+        if message is not None:
+            self.message = message
+
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    # ---------------------- Called by the UI ----------------------
+    @property
+    def active(self):
+        return self.status in ACTIVE
+
+    def snapshot(self):
+        """Plain dict of the job's state, safe to keep in session_state."""
+        end = self.finished_at or time.time()
+        return {
+            "id": self.id,
+            "title": self.title,
+            "status": self.status,
+            "progress": self.progress,
+            "message": self.message,
+            "error": self.error,
+            "submitted_at": self.submitted_at,
+            "elapsed": end - (self.started_at or end),
+        }
+
+    def discard(self):
+        if self._cleanup is not None and self.result is not None:
+            try:
+                self._cleanup(self.result)
+            except Exception:
+                traceback.print_exc()
+        self.result = None
+
+
+class JobManager:
+    def __init__(self, workers=JOB_WORKERS, queue_size=JOB_QUEUE_SIZE, user_limit=JOB_USER_LIMIT, retention=JOB_RETENTION):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.user_limit = user_limit
+        self.retention = retention
+        self.counts = collections.Counter()
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(workers, thread_name_prefix="job")
+
+    def submit(self, user_id, title, fn, *args, cleanup=None, **kwargs):
+        """Queue `fn(job, *args, **kwargs)`; returns the Job or raises JobRejected.
+
+        `cleanup(result)` runs when a finished job is dismissed or expires.
+        """
+        self.prune()
+        with self._lock:
+            jobs = list(self._jobs.values())
+            if sum(j.user_id == user_id and j.active for j in jobs) >= self.user_limit:
+                self.counts["rejected_user_limit"] += 1
+                raise JobRejected(f"you already have {self.user_limit} jobs running or queued")
+            if sum(j.status == QUEUED for j in jobs) >= self.queue_size:
+                self.counts["rejected_queue_full"] += 1
+                raise JobRejected("the server is busy, try again in a minute")
+            job = Job(user_id, title, cleanup)
+            self._jobs[job.id] = job
+            job._future = self._executor.submit(self._run, job, fn, args, kwargs)
+            self.counts["submitted"] += 1
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        job.started_at = time.time()
+        try:
+            # Cancelled between cancel() failing to unqueue it and this worker starting it
+            job.check_cancelled()
+            job.status = RUNNING
+            result = fn(job, *args, **kwargs)
+        except JobCancelled:
+            job.status = CANCELLED
+        except Exception as exc:
+            job.error = f"{type(exc).__name__}: {exc}"
+            job.status = FAILED
+            traceback.print_exc()
+        else:
+            job.result = result
+            job.progress = 1.0
+            job.status = DONE
+        finally:
+            job.finished_at = time.time()
+            self.counts[job.status] += 1
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def jobs_for(self, user_id):
+        """The user's jobs, newest first."""
+        self.prune()
+        with self._lock:
+            jobs = [j for j in self._jobs.values() if j.user_id == user_id]
+        return sorted(jobs, key=lambda j: j.submitted_at, reverse=True)
+
+    def cancel(self, job_id):
+        """Stop a job: a queued one never starts, a running one stops at its next check."""
+        job = self._jobs.get(job_id)
+        if job is None or not job.active:
+            return False
+        job._cancel.set()
+        if job._future.cancel():
+            job.status = CANCELLED
+            job.finished_at = time.time()
+            self.counts[CANCELLED] += 1
+        return True
+
+    def dismiss(self, job_id):
+        """Forget a finished job and release its result."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.active:
+                return False
+            del self._jobs[job_id]
+        job.discard()
+        return True
+
+    def prune(self):
+        cutoff = time.time() - self.retention
+        with self._lock:
+            expired = [j for j in self._jobs.values() if not j.active and j.finished_at and j.finished_at < cutoff]
+            for job in expired:
+                del self._jobs[job.id]
+        for job in expired:
+            job.discard()
+
+    def stats(self):
+        with self._lock:
+            statuses = collections.Counter(j.status for j in self._jobs.values())
+        return {"workers": self.workers, "queued": statuses[QUEUED], "running": statuses[RUNNING], **self.counts}
+
+    def shutdown(self):
+        for job in list(self._jobs.values()):
+            self.cancel(job.id)
+        self._executor.shutdown(wait=True)
+
+
+# ---------------------- Process-wide Manager ----------------------
+_lock = threading.Lock()
+_manager = None
+
+
+def get_jobs():
+    global _manager
+    with _lock:
+        if _manager is None:
+            _manager = JobManager()
+        return _manager
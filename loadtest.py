@@ -0,0 +1,254 @@
+"""Concurrent-session load test for app.py.
+
+Drives N headless sessions at once - each its own `AppTest` on its own thread,
+all inside this one process, the way one Streamlit server runs one script
+thread per session against shared module state. Each session follows the
+real flow: load the page, then repeatedly edit the three scores and the
+gender (form widgets, so no rerun) and press Predict. Every session uses its
+own `?user=` so history and statistics grow per session.
+
+For each concurrency level it records rerun latency percentiles, reruns and
+predictions per second, process CPU (time and utilization) and resident
+memory per session, and saves a JSON report comparable across versions.
+
+    python loadtest.py --concurrency 1 2 4 8 16 --predictions 10
+    python loadtest.py --compare loadtest_results/abc1234.json
+
+Sessions share the process with the harness and with each other; with AppTest
+the browser, websocket and protobuf delivery aren't exercised.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+import warnings
+
+import numpy as np
+
+DEFAULT_LEVELS = [1, 2, 4, 8]
+RESULTS_DIR = "loadtest_results"
+
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+        # Peak, not current, where /proc isn't available (ru_maxrss is KiB on Linux)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _percentiles(values):
+    if not values:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    ms = np.asarray(values) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {"p50_ms": round(float(p50), 2), "p95_ms": round(float(p95), 2),
+            "p99_ms": round(float(p99), 2), "max_ms": round(float(ms.max()), 2)}
+
+
+# ---------------------- Sessions ----------------------
+@contextlib.contextmanager
+def shared_runtime():
+    """Give concurrent AppTest sessions what a real server shares between them.
+
+    Each AppTest run installs its own mock `Runtime._instance` and sets it back
+    to None when its script finishes, which pulls the runtime out from under
+    sessions still running on other threads (forms and session state quietly
+    stop working when no runtime exists). While this is active,
+    `Runtime.instance()` falls back to one mock built the same way. Each run
+    also compiles app.py into a fresh ScriptCache, where a server compiles it
+    once; compiling on several threads at once can fail on Python 3.11
+    ("AST constructor recursion depth mismatch"), so all sessions get one cache.
+    """
+    from unittest.mock import MagicMock
+
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import local_script_runner
+
+    fallback = MagicMock(spec=Runtime)
+    fallback.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    fallback.cache_storage_manager = MemoryCacheStorageManager()
+    script_cache = ScriptCache()
+    original = Runtime.__dict__["instance"], Runtime.__dict__["exists"], local_script_runner.ScriptCache
+    Runtime.instance = classmethod(lambda cls: cls._instance or fallback)
+    Runtime.exists = classmethod(lambda cls: True)
+    local_script_runner.ScriptCache = lambda: script_cache
+    try:
+        yield
+    finally:
+        Runtime.instance, Runtime.exists, local_script_runner.ScriptCache = original
+
+
+class Session:
+    def __init__(self, index, predictions, think_ms, seed, timeout):
+        from streamlit.testing.v1 import AppTest
+
+        self.index = index
+        self.predictions = predictions
+        self.think = think_ms / 1000
+        self.rng = random.Random(seed * 10_007 + index)
+        self.at = AppTest.from_file("app.py", default_timeout=timeout)
+        self.at.query_params = {"user": f"loadtest-{seed}-{index}"}
+        self.load_latency = None
+        self.predict_latencies = []
+        self.errors = []
+
+    def _rerun(self):
+        start = time.perf_counter()
+        self.at.run()
+        elapsed = time.perf_counter() - start
+        if self.at.exception:
+            self.errors.append(str(self.at.exception[0].value))
+        return elapsed
+
+    def run(self, barrier):
+        try:
+            barrier.wait()
+            self.load_latency = self._rerun()
+            for _ in range(self.predictions):
+                if self.think:
+                    time.sleep(self.think)
+                # Inside st.form: edits are held by the browser until Predict
+                math, reading, writing = self.at.number_input[:3]
+                math.set_value(self.rng.randint(0, 100))
+                writing.set_value(self.rng.randint(0, 100))
+                reading.set_value(self.rng.randint(0, 100))
+                self.at.selectbox[0].set_value(self.rng.choice(["Female", "Male"]))
+                next(b for b in self.at.button if "Predict" in str(b.label)).click()
+                self.predict_latencies.append(self._rerun())
+        except Exception as exc:
+            self.errors.append(f"{type(exc).__name__}: {exc}")
+
+
+def run_level(concurrency, predictions, think_ms=0, seed=0, timeout=120):
+    rss_before = _rss_bytes()
+    sessions = [Session(i, predictions, think_ms, seed, timeout) for i in range(concurrency)]
+    barrier = threading.Barrier(concurrency + 1)
+    threads = [threading.Thread(target=s.run, args=(barrier,), name=f"session-{s.index}") for s in sessions]
+    for thread in threads:
+        thread.start()
+
+    barrier.wait()
+    cpu, wall = time.process_time(), time.perf_counter()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - wall
+    cpu = time.process_time() - cpu
+    rss_after = _rss_bytes()
+
+    loads = [s.load_latency for s in sessions if s.load_latency is not None]
+    predicts = [t for s in sessions for t in s.predict_latencies]
+    reruns = len(loads) + len(predicts)
+    errors = [e for s in sessions for e in s.errors]
+    return {
+        "concurrency": concurrency,
+        "sessions_completed": sum(not s.errors for s in sessions),
+        "reruns": reruns,
+        "predictions": len(predicts),
+        "wall_s": round(wall, 3),
+        "reruns_per_s": round(reruns / wall, 2),
+        "predictions_per_s": round(len(predicts) / wall, 2),
+        "predict_rerun": _percentiles(predicts),
+        "load_rerun": _percentiles(loads),
+        "cpu_s": round(cpu, 3),
+        "cpu_utilization": round(cpu / wall, 3),
+        "cpu_ms_per_rerun": round(cpu / max(reruns, 1) * 1000, 2),
+        "rss_mb": round(rss_after / 1e6, 1),
+        "rss_mb_per_session": round((rss_after - rss_before) / 1e6 / concurrency, 2),
+        "errors": errors[:5],
+        "error_count": len(errors),
+    }
+
+
+# ---------------------- Reporting ----------------------
+def _print_level(r):
+    p = {k: v if v is not None else float("nan") for k, v in r["predict_rerun"].items()}
+    print(
+        f"  c={r['concurrency']:<4} predict p50 {p['p50_ms']:8.1f}  p95 {p['p95_ms']:8.1f}  p99 {p['p99_ms']:8.1f} ms"
+        f"  {r['predictions_per_s']:7.1f} pred/s  cpu {r['cpu_utilization'] * 100:5.0f}%"
+        f" ({r['cpu_ms_per_rerun']:.1f} ms/rerun)  rss {r['rss_mb']:.0f} MB (+{r['rss_mb_per_session']:.2f}/session)"
+        + (f"  errors {r['error_count']}" if r["error_count"] else "")
+    )
+
+
+def compare(report, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    old = {r["concurrency"]: r for r in baseline["levels"]}
+    print(f"\nComparison against {baseline_path} ({baseline.get('commit', '?')}):")
+    for r in report["levels"]:
+        b = old.get(r["concurrency"])
+        if b is None:
+            continue
+        p95_old, p95_new = b["predict_rerun"]["p95_ms"], r["predict_rerun"]["p95_ms"]
+        ratio = p95_new / p95_old if p95_old else float("inf")
+        flag = "  <-- slower" if ratio > 1.10 else ""
+        print(
+            f"  c={r['concurrency']:<4} p95 {p95_old:8.1f} -> {p95_new:8.1f} ms  x{ratio:5.2f}"
+            f"  pred/s {b['predictions_per_s']:7.1f} -> {r['predictions_per_s']:7.1f}{flag}"
+        )
+
+
+def main(argv=None):
+    from benchmark import git_commit
+
+    parser = argparse.ArgumentParser(description="Load-test app.py with concurrent headless sessions.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=DEFAULT_LEVELS)
+    parser.add_argument("--predictions", type=int, default=10, help="Predict presses per session")
+    parser.add_argument("--think-ms", type=float, default=0, help="pause before each prediction")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120, help="per-rerun timeout in seconds")
+    parser.add_argument("--output", help=f"JSON path (default: {RESULTS_DIR}/<commit>.json)")
+    parser.add_argument("--compare", help="previous report to compare against")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore")
+    # Throwaway history so load-test users don't end up in the real database
+    tmp = tempfile.TemporaryDirectory()
+    os.environ.setdefault("HISTORY_DB", os.path.join(tmp.name, "history.db"))
+
+    print(f"Concurrent sessions ({args.predictions} predictions each, think {args.think_ms:.0f} ms):")
+    levels = []
+    with shared_runtime():
+        # One untimed session first, so imports and model loading aren't charged to level 1
+        run_level(1, 1, seed=-1, timeout=args.timeout)
+        for concurrency in args.concurrency:
+            result = run_level(concurrency, args.predictions, args.think_ms, args.seed, args.timeout)
+            _print_level(result)
+            levels.append(result)
+
+    report = {
+        "commit": git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "predictions_per_session": args.predictions,
+        "think_ms": args.think_ms,
+        "levels": levels,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{report['commit']}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved {output}")
+
+    if args.compare:
+        compare(report, args.compare)
+    return 1 if any(level["error_count"] for level in levels) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
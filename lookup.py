@@ -0,0 +1,137 @@
+"""Precomputed prediction table covering every possible input in app.py.
+
+Math, reading and writing are integers in 0..100 and gender has two values,
+so the whole domain is 2 * 101**3 (~2.06M) rows. Each row stores the predicted
+label (uint8) and the three class probabilities (float16), ~14 MB in total.
+The table is memory-mapped at startup and a prediction becomes one index
+computation.
+
+    python lookup.py build     # (re)build prediction_table.npy for the current model
+    python lookup.py info      # show the table's metadata and whether it is current
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from artifacts import MODEL_PATH, SCALER_PATH, FEATURES_PATH, artifact_hash
+from features import FeaturePlan
+
+TABLE_PATH = "prediction_table.npy"
+SCORE_VALUES = 101
+GENDER_VALUES = 2
+TABLE_ROWS = GENDER_VALUES * SCORE_VALUES ** 3
+
+TABLE_DTYPE = np.dtype([("label", np.uint8), ("proba", np.float16, (3,))])
+
+
+class TableMismatchError(ValueError):
+    pass
+
+
+def meta_path(path):
+    return os.path.splitext(path)[0] + ".json"
+
+
+def table_index(math, reading, writing, gender_encoded):
+    return ((np.asarray(gender_encoded) * SCORE_VALUES + math) * SCORE_VALUES + reading) * SCORE_VALUES + writing
+
+
+# ---------------------- Build ----------------------
+def build_table(engine, plan, path=TABLE_PATH, model_hash=None):
+    if model_hash is None:
+        model_hash = artifact_hash()
+
+    start = time.perf_counter()
+    scores = np.arange(SCORE_VALUES)
+    math, reading, writing = (a.ravel() for a in np.meshgrid(scores, scores, scores, indexing="ij"))
+
+    tmp_path = path + ".tmp"
+    table = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=TABLE_DTYPE, shape=(TABLE_ROWS,))
+    block = SCORE_VALUES ** 3
+    X = np.empty((block, plan.n_features), dtype=np.float64)
+    for g in range(GENDER_VALUES):
+        plan.build(math, reading, writing, np.full(block, g), out=X)
+        labels, proba = engine.predict(X)
+        rows = table[g * block:(g + 1) * block]
+        rows["label"] = labels
+        rows["proba"] = proba
+    table.flush()
+    del table
+    os.replace(tmp_path, path)
+
+    meta = {
+        "model_hash": model_hash,
+        "rows": TABLE_ROWS,
+        "dtype": str(TABLE_DTYPE.descr),
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "build_seconds": round(time.perf_counter() - start, 3),
+    }
+    with open(meta_path(path), "w") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+# ---------------------- Load ----------------------
+class PredictionTable:
+    def __init__(self, path=TABLE_PATH, expected_hash=None):
+        with open(meta_path(path)) as f:
+            self.meta = json.load(f)
+
+        if expected_hash is None:
+            expected_hash = artifact_hash()
+        if self.meta.get("model_hash") != expected_hash:
+            raise TableMismatchError(
+                f"{path} was built for model {self.meta.get('model_hash', '?')[:12]}, "
+                f"current model is {expected_hash[:12]}; run `python lookup.py build`"
+            )
+
+        self.table = np.load(path, mmap_mode="r")
+        if self.table.dtype != TABLE_DTYPE or self.table.shape != (TABLE_ROWS,):
+            raise TableMismatchError(f"{path} has an unexpected layout {self.table.dtype} {self.table.shape}")
+
+    def predict(self, math, reading, writing, gender_encoded):
+        """Same (labels, probabilities) contract as FusedModel.predict."""
+        rows = self.table[table_index(math, reading, writing, gender_encoded)]
+        rows = np.atleast_1d(rows)
+        return rows["label"].astype(np.int64), rows["proba"].astype(np.float64)
+
+
+def load_table(path=None, expected_hash=None):
+    """Load the table named by PREDICTION_TABLE (or `path`); None if unset."""
+    path = path or os.environ.get("PREDICTION_TABLE")
+    if not path:
+        return None
+    return PredictionTable(path, expected_hash=expected_hash)
+
+
+# ---------------------- CLI ----------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or inspect the precomputed prediction table.")
+    parser.add_argument("command", choices=["build", "info"])
+    parser.add_argument("--path", default=TABLE_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        import joblib
+        from inference import FusedModel
+
+        model = joblib.load(MODEL_PATH)
+        scaler = joblib.load(SCALER_PATH)
+        feature_columns = joblib.load(FEATURES_PATH)
+        meta = build_table(FusedModel.from_sklearn(model, scaler), FeaturePlan(feature_columns), path=args.path)
+        print(json.dumps(meta, indent=2))
+        return 0
+
+    with open(meta_path(args.path)) as f:
+        meta = json.load(f)
+    meta["current"] = meta.get("model_hash") == artifact_hash()
+    print(json.dumps(meta, indent=2))
+    return 0 if meta["current"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,342 @@
+"""Prometheus-format metrics for prediction traffic, latency and resource use.
+
+A small process-wide registry of counters, histograms and gauges, rendered in
+the Prometheus text exposition format (version 0.0.4). Recording is a dict
+lookup and an addition under a lock (about a microsecond), so it can sit on
+the predict path; gauges such as memory and active sessions are computed from
+callbacks only when the metrics are scraped or written.
+
+    student_predictions_total{label, gender}      predictions made
+    student_prediction_seconds                    submit to rendered result (histogram)
+    student_model_inference_seconds               model call only, on cache misses (histogram)
+    student_active_sessions                       connected Streamlit sessions that ran the app
+    process_resident_memory_bytes                 RSS of this server process
+    student_memory_per_session_bytes              RSS / active sessions
+    student_model_info{version, model_hash, runtime}  1 for the model being served
+
+Exposed by a small HTTP server thread at http://127.0.0.1:<METRICS_PORT>/metrics
+for a local Prometheus to scrape, and/or written to METRICS_FILE every
+METRICS_FILE_SECONDS (for node_exporter's textfile collector). With several
+worker processes give each its own port, or put {pid} in METRICS_FILE.
+
+Sessions are counted by the app itself: each script run calls
+track_session(), and a scrape drops the ids Streamlit no longer reports
+as active (Runtime.is_active_session), so no private runtime state is read.
+
+    METRICS_PORT=8602          0 turns the endpoint off
+    METRICS_HOST=127.0.0.1
+    METRICS_FILE=              e.g. /var/lib/node_exporter/student-{pid}.prom
+    METRICS_FILE_SECONDS=15
+
+    python metrics.py   # recording overhead and a sample exposition
+"""
+import bisect
+import errno
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+MODEL_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        return [(self.name, _labels(self.labelnames, key), value) for key, value in sorted(values.items())]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets=LATENCY_BUCKETS, labelnames=()):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self.labelnames = tuple(labelnames)
+        # labels -> [per-bucket counts (last one is +Inf), sum, count]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labelvalues)
+            if entry is None:
+                entry = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self):
+        with self._lock:
+            values = {key: (list(counts), total, n) for key, (counts, total, n) in self._values.items()}
+        rows = []
+        for key, (counts, total, n) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                rows.append((self.name + "_bucket", _labels(self.labelnames, key, f'le="{_number(bound)}"'), cumulative))
+            rows.append((self.name + "_sum", _labels(self.labelnames, key), total))
+            rows.append((self.name + "_count", _labels(self.labelnames, key), n))
+        return rows
+
+
+class Gauge:
+    """A value that is set, or read from `fn()` at scrape time.
+
+    `fn` returns a number, None (no sample), or for labelled gauges a dict of
+    label-value tuples to numbers.
+    """
+    kind = "gauge"
+
+    def __init__(self, name, help, labelnames=(), fn=None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.fn = fn
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def set(self, value, *labelvalues):
+        with self._lock:
+            self._values[labelvalues] = value
+
+    def samples(self):
+        if self.fn is None:
+            with self._lock:
+                values = dict(self._values)
+        else:
+            try:
+                value = self.fn()
+            except Exception:
+                value = None
+            if value is None:
+                return []
+            values = value if isinstance(value, dict) else {(): value}
+        return [(self.name, _labels(self.labelnames, key), value) for key, value in sorted(values.items())]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            # Registering a name twice returns the metric already registered
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help, labelnames=()):
+        return self._add(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, buckets=LATENCY_BUCKETS, labelnames=()):
+        return self._add(Histogram(name, help, buckets, labelnames))
+
+    def gauge(self, name, help, labelnames=(), fn=None):
+        return self._add(Gauge(name, help, labelnames, fn))
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            samples = metric.samples()
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{name}{labels} {_number(value)}" for name, labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+# ---------------------- Process Gauges ----------------------
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+_sessions = set()
+_sessions_lock = threading.Lock()
+
+
+def track_session():
+    """Count the session running this script; called on every rerun of the app."""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        with _sessions_lock:
+            _sessions.add(ctx.session_id)
+
+
+def active_sessions():
+    """Connected Streamlit sessions in this process, or None outside a server."""
+    from streamlit import runtime
+
+    if not runtime.exists():
+        return None
+    instance = runtime.get_instance()
+    with _sessions_lock:
+        _sessions.intersection_update([s for s in _sessions if instance.is_active_session(s)])
+        return len(_sessions)
+
+
+def memory_per_session():
+    rss, sessions = rss_bytes(), active_sessions()
+    if rss is None or not sessions:
+        return None
+    return rss / sessions
+
+
+def model_info():
+    from registry import get_registry
+
+    registry = get_registry()
+    if not registry.ready():
+        return None
+    record = registry.current().record
+    return {(record["version"], record["model_hash"], record["runtime"]): 1}
+
+
+# Process-wide registry shared by every session
+METRICS = MetricsRegistry()
+PREDICTIONS = METRICS.counter("student_predictions_total", "Predictions made, by predicted label and gender.",
+                              ("label", "gender"))
+PREDICTION_SECONDS = METRICS.histogram("student_prediction_seconds",
+                                       "Prediction latency from submit to rendered result.")
+MODEL_SECONDS = METRICS.histogram("student_model_inference_seconds",
+                                  "Model call latency (result cache misses only).", MODEL_BUCKETS)
+METRICS.gauge("student_active_sessions", "Connected Streamlit sessions.", fn=active_sessions)
+METRICS.gauge("process_resident_memory_bytes", "Resident memory of this process.", fn=rss_bytes)
+METRICS.gauge("student_memory_per_session_bytes", "Resident memory divided by active sessions.",
+              fn=memory_per_session)
+METRICS.gauge("student_model_info", "The model version being served.", ("version", "model_hash", "runtime"),
+              fn=model_info)
+
+
+# ---------------------- Exposition ----------------------
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = METRICS
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        data = self.registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_lock = threading.Lock()
+_state = {}
+
+
+def write_metrics(path, registry=METRICS):
+    path = path.replace("{pid}", str(os.getpid()))
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(registry.render())
+    os.replace(tmp_path, path)
+    return path
+
+
+def _write_forever(path, seconds):
+    while True:
+        try:
+            write_metrics(path)
+        except OSError as exc:
+            print(f"metrics: can't write {path}: {exc}", file=sys.stderr)
+        time.sleep(seconds)
+
+
+def serve_metrics(port=None):
+    """Start the metrics endpoint and file writer once per process (as configured).
+
+    If the port is already taken (another worker on this box), this process
+    only writes METRICS_FILE, if set.
+    """
+    with _lock:
+        if "started" in _state:
+            return _state.get("server")
+        _state["started"] = True
+        port = int(os.environ.get("METRICS_PORT", 8602)) if port is None else port
+        if port:
+            try:
+                server = ThreadingHTTPServer((os.environ.get("METRICS_HOST", "127.0.0.1"), port), _MetricsHandler)
+            except OSError as exc:
+                if exc.errno != errno.EADDRINUSE:
+                    raise
+            else:
+                server.daemon_threads = True
+                threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+                _state["server"] = server
+        path = os.environ.get("METRICS_FILE")
+        if path:
+            seconds = float(os.environ.get("METRICS_FILE_SECONDS", 15))
+            threading.Thread(target=_write_forever, args=(path, seconds), name="metrics-file", daemon=True).start()
+        return _state.get("server")
+
+
+# ---------------------- CLI ----------------------
+def main(argv=None):
+    import timeit
+
+    n = 200_000
+    counter = timeit.timeit(lambda: PREDICTIONS.inc("Medium", "female"), number=n) / n
+    histogram = timeit.timeit(lambda: PREDICTION_SECONDS.observe(0.012), number=n) / n
+    METRICS.render()  # the first render imports what the gauges read
+    start = time.perf_counter()
+    text = METRICS.render()
+    render = time.perf_counter() - start
+    print(text)
+    print(f"counter inc        {counter * 1e6:6.2f} µs")
+    print(f"histogram observe  {histogram * 1e6:6.2f} µs")
+    print(f"render             {render * 1e6:6.0f} µs ({len(text):,} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
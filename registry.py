@@ -0,0 +1,313 @@
+"""Versioned model registry with zero-downtime hot-swap.
+
+MODEL_DIR holds one sub-directory per model version, each with the same three
+files the app has always used:
+
+    models/
+        2026-10-01/   student_model.joblib  scaler.joblib  model_features.joblib
+        2026-10-18/   ...
+
+The newest complete version (by directory name) is served. A watcher thread
+polls the directory; when a new version appears, or the files of the served
+one change, it is loaded in the background, validated (the scaler's
+`feature_names_in_` must match model_features), warmed up with a few
+synthetic predictions and only then swapped in with a single reference
+assignment. Callers take `registry.current()` once per prediction and use that
+snapshot throughout, so requests in flight finish on the version they
+started with. A version that fails to load or validate is skipped and the
+current one keeps serving.
+
+The first version is loaded by the watcher thread too, so a new server
+process can render its first page while the model is still loading;
+`current()` waits for it, `ready()` doesn't. `disk_loads` counts versions
+read (or attached) and `cache_hits` the `current()` calls served from memory,
+so it is easy to confirm that reruns don't touch disk.
+
+Without MODEL_DIR the artifacts in the working directory are served as the
+only version (named after their hash) and are hot-swapped the same way. With
+SHARED_MEMORY=1 each version is published to / attached from a segment shared
+by all worker processes on the box (see shared.py).
+
+    MODEL_DIR=models         versioned artifact directory (optional)
+    MODEL_POLL_SECONDS=5     how often the watcher looks for changes
+
+    python registry.py status           # versions on disk and which one would be served
+    python registry.py publish v2 DIR   # copy DIR's artifacts into MODEL_DIR/v2 atomically
+"""
+import argparse
+import collections
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import traceback
+
+import numpy as np
+
+import shared
+from artifacts import ARTIFACT_PATHS, FUSED_MODEL_NAME, artifact_signature, read_artifacts
+from inference import LEVELS
+
+MODEL_DIR = os.environ.get("MODEL_DIR")
+POLL_SECONDS = float(os.environ.get("MODEL_POLL_SECONDS", 5))
+WARMUP_ROWS = 64
+ARTIFACT_NAMES = tuple(os.path.basename(p) for p in ARTIFACT_PATHS)
+
+
+class ModelValidationError(ValueError):
+    pass
+
+
+# ---------------------- Versions ----------------------
+def list_versions(model_dir):
+    """[(version, paths)] for every complete version directory, oldest first."""
+    if not model_dir or not os.path.isdir(model_dir):
+        return []
+    versions = []
+    for name in sorted(os.listdir(model_dir)):
+        paths = tuple(os.path.join(model_dir, name, artifact) for artifact in ARTIFACT_NAMES)
+        if not name.startswith(".") and all(os.path.isfile(p) for p in paths):
+            versions.append((name, paths))
+    return versions
+
+
+def validate(artifacts):
+    """Raise ModelValidationError if the artifacts don't fit together."""
+    # Checked on the fused engine, which carries the scaler's feature_names_in_
+    # and the model's width, so the numpy runtime doesn't need sklearn for this
+    engine = artifacts.engine
+    columns = list(artifacts.feature_columns)
+    if engine.feature_names_in is not None and engine.feature_names_in != columns:
+        raise ModelValidationError(f"scaler was fitted on {engine.feature_names_in}, model_features lists {columns}")
+    if engine.n_features != len(columns):
+        raise ModelValidationError(f"model expects {engine.n_features} features, model_features lists {len(columns)}")
+    classes = engine.classes
+    if not set(classes.tolist()) <= set(range(len(LEVELS))):
+        raise ModelValidationError(f"model classes {classes.tolist()} don't map onto {LEVELS}")
+
+
+def warm_up(artifacts, rows=WARMUP_ROWS, seed=0):
+    """Run synthetic predictions through the hot path; return the seconds taken."""
+    start = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    math, reading, writing = rng.integers(0, 101, (3, rows))
+    genders = rng.choice(["Female", "Male"], rows)
+    _, proba = artifacts.engine.predict(artifacts.plan.build(math, reading, writing, genders))
+    # The app scores one student at a time; touch that shape too
+    for i in range(min(rows, 8)):
+        artifacts.engine.predict(artifacts.plan.build(math[i], reading[i], writing[i], genders[i]))
+    if not np.all(np.isfinite(proba)) or not np.allclose(proba.sum(axis=1), 1.0):
+        raise ModelValidationError("warm-up produced invalid probabilities")
+    if artifacts.table is not None:
+        artifacts.table.predict(math, reading, writing, (genders == "Male").astype(np.int64))
+    return time.perf_counter() - start
+
+
+# ---------------------- Registry ----------------------
+class ModelRegistry:
+    def __init__(self, model_dir=MODEL_DIR, poll_seconds=POLL_SECONDS, mmap_mode="r"):
+        self.model_dir = model_dir
+        self.poll_seconds = poll_seconds
+        self.mmap_mode = mmap_mode
+        self.swaps = 0
+        self.disk_loads = 0
+        self.cache_hits = 0
+        self.events = collections.deque(maxlen=50)
+        self._current = None
+        self._served = None
+        self._rejected = set()
+        self._error = None
+        self._ready = threading.Event()
+        self._check_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._watcher = None
+
+    def load(self):
+        """Serve the newest version that loads cleanly; raise if none does."""
+        try:
+            with self._check_lock:
+                for version, paths in reversed(self._candidates()):
+                    try:
+                        signature = artifact_signature(paths)
+                    except OSError as exc:
+                        self._event(version, "rejected", error=f"{type(exc).__name__}: {exc}")
+                        continue
+                    if self._try_load(version, paths, signature):
+                        return self._current
+            raise RuntimeError(f"no loadable model version (model_dir={self.model_dir!r}): {list(self.events)[-1:]}")
+        except Exception as exc:
+            # Set before _ready, so current() always has an error to raise
+            self._error = exc
+            raise
+        finally:
+            self._ready.set()
+
+    def _candidates(self):
+        if self.model_dir:
+            return list_versions(self.model_dir)
+        return [(None, ARTIFACT_PATHS)]
+
+    def current(self):
+        """The Artifacts snapshot to use for one prediction; waits for the first load."""
+        if self._current is None:
+            self._ready.wait()
+            if self._current is None:
+                raise self._error
+        self.cache_hits += 1
+        return self._current
+
+    def ready(self):
+        return self._current is not None
+
+    def _event(self, version, status, **details):
+        self.events.append({"at": time.strftime("%Y-%m-%d %H:%M:%S"), "version": version, "status": status, **details})
+
+    def _read(self, version, paths):
+        if shared.enabled():
+            return shared.load_shared(paths, version, self.mmap_mode)
+        return read_artifacts(paths, self.mmap_mode, version=version)
+
+    def _try_load(self, version, paths, signature):
+        artifacts = None
+        self.disk_loads += 1
+        try:
+            artifacts = self._read(version, paths)
+            validate(artifacts)
+            warmup_seconds = warm_up(artifacts)
+        except Exception as exc:
+            if artifacts is not None and artifacts.segment is not None:
+                artifacts.segment.detach()
+            self._rejected.add((version, paths, signature))
+            self._event(version, "rejected", error=f"{type(exc).__name__}: {exc}")
+            return False
+
+        previous = self._current
+        self._current = artifacts  # the swap: one reference assignment
+        self._served = (version, paths, signature)
+        if previous is not None:
+            self.swaps += 1
+            if previous.segment is not None:
+                # Requests still holding `previous` keep their mappings
+                previous.segment.detach()
+        if artifacts.segment is not None:
+            shared.print_startup_report(artifacts)
+        self._event(
+            artifacts.record["version"], "swapped in" if previous is not None else "loaded",
+            model_hash=artifacts.record["model_hash"][:12],
+            load_seconds=artifacts.record["load_seconds"],
+            warmup_seconds=round(warmup_seconds, 4),
+        )
+        return True
+
+    def check(self):
+        """Load and swap in a newer (or changed) version if there is one; True if swapped."""
+        with self._check_lock:
+            candidates = self._candidates()
+            if not candidates:
+                return False
+            version, paths = candidates[-1]
+            try:
+                signature = artifact_signature(paths)
+            except OSError:
+                return False  # files are being replaced; look again next poll
+            key = (version, paths, signature)
+            if key == self._served or key in self._rejected:
+                return False
+            return self._try_load(version, paths, signature)
+
+    # ---------------------- Watcher ----------------------
+    def _watch(self):
+        if self._current is None:
+            try:
+                self.load()
+            except Exception:
+                return  # current() re-raises it to callers
+        while self.poll_seconds > 0 and not self._stopped.wait(self.poll_seconds):
+            try:
+                self.check()
+            except Exception:
+                traceback.print_exc()
+
+    def start(self):
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, name="model-registry", daemon=True)
+            self._watcher.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def status(self):
+        record = self._current.record
+        return {
+            "version": record["version"],
+            "model_hash": record["model_hash"],
+            "loaded_at": record["loaded_at"],
+            "runtime": record["runtime"],
+            "model_dir": self.model_dir,
+            "swaps": self.swaps,
+            "disk_loads": self.disk_loads,
+            "cache_hits": self.cache_hits,
+            "events": list(self.events),
+        }
+
+
+# ---------------------- Process-wide Registry ----------------------
+_lock = threading.Lock()
+_registry = None
+
+
+def get_registry():
+    global _registry
+    with _lock:
+        if _registry is None:
+            _registry = ModelRegistry().start()
+        return _registry
+
+
+# ---------------------- CLI ----------------------
+def publish(version, source_dir, model_dir):
+    """Copy a version into place under a temporary name, then rename it in one step."""
+    target = os.path.join(model_dir, version)
+    if os.path.exists(target):
+        raise FileExistsError(f"{target} already exists; versions are immutable")
+    staging = os.path.join(model_dir, f".{version}.tmp")
+    os.makedirs(staging)
+    for name in ARTIFACT_NAMES + (FUSED_MODEL_NAME,):
+        if name == FUSED_MODEL_NAME and not os.path.exists(os.path.join(source_dir, name)):
+            continue  # the exported numpy model is optional
+        shutil.copy2(os.path.join(source_dir, name), os.path.join(staging, name))
+    os.rename(staging, target)
+    return target
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or publish versioned model artifacts.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="list versions and the one that would be served")
+    pub = sub.add_parser("publish", help="publish a directory's artifacts as a new version")
+    pub.add_argument("version")
+    pub.add_argument("source_dir", nargs="?", default=".")
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == "publish":
+        print(f"Published {publish(args.version, args.source_dir, args.model_dir or 'models')}")
+        return 0
+
+    registry = ModelRegistry(args.model_dir, poll_seconds=0)
+    registry.load()
+    print(json.dumps({
+        "versions": [version for version, _ in list_versions(args.model_dir)],
+        **registry.status(),
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""Process-wide LRU + TTL cache of prediction results, shared by all sessions.
+
+Keyed by (math, reading, writing, gender, model_hash). An entry holds what the
+results section needs - label, probabilities and the two figures - so a hit
+skips feature building, inference and figure building entirely. Entries are
+treated as immutable: sessions render them, never mutate them.
+
+A new model version has a new hash, so it never sees the old model's
+results. Those are not cleared on a swap: sessions still holding the previous
+version keep hitting them, and otherwise they age out through LRU and TTL.
+
+    RESULT_CACHE_SIZE=4096  maximum number of entries
+    RESULT_CACHE_TTL=3600   seconds an entry stays valid
+"""
+import collections
+import os
+import threading
+import time
+
+CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", 4096))
+CACHE_TTL = float(os.environ.get("RESULT_CACHE_TTL", 3600))
+
+COUNTERS = ("hits", "misses", "evictions", "expirations")
+
+
+class ResultCache:
+    def __init__(self, maxsize=CACHE_SIZE, ttl=CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = collections.OrderedDict()
+        self._counts = dict.fromkeys(COUNTERS, 0)
+        self._lock = threading.Lock()
+
+    def get(self, math, reading, writing, gender, model_hash):
+        key = (math, reading, writing, gender, model_hash)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                self._counts["expirations"] += 1
+                entry = None
+            if entry is None:
+                self._counts["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counts["hits"] += 1
+            return entry[1]
+
+    def put(self, math, reading, writing, gender, model_hash, result):
+        key = (math, reading, writing, gender, model_hash)
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (expires, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._counts["evictions"] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counts, size=len(self._entries), maxsize=self.maxsize, ttl=self.ttl)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counts = dict.fromkeys(COUNTERS, 0)
+
+
+# Process-wide cache shared by every session
+RESULTS = ResultCache()
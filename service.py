@@ -0,0 +1,354 @@
+"""Headless JSON inference service with request micro-batching.
+
+Runs a small asyncio HTTP/1.1 server (stdlib only) that scores with the same
+artifacts and feature rules as app.py. Concurrent requests arriving within
+`--batch-window-ms` of each other are coalesced into one vectorized model call.
+
+    python service.py serve --port 8600 --batch-window-ms 2
+    python service.py loadgen --concurrency 64 --requests 20000
+
+POST /predict accepts a single student
+    {"math score": 72, "reading score": 80, "writing score": 77, "gender": "female"}
+or a batch, either as a JSON list or {"rows": [...]}. The short keys "math",
+"reading" and "writing" are accepted too. Scores must be numbers from 0 to 100;
+anything else is a 400. GET /health returns the model hash
+and GET /drift the input drift report for everything scored so far (drift.py).
+"""
+import argparse
+import asyncio
+import json
+import math
+import sys
+import time
+
+import numpy as np
+
+from artifacts import load_artifacts
+from drift import DRIFT, drift_report, reference_from
+from features import encode_gender
+from inference import LEVELS
+
+SCORE_KEYS = (("math score", "math"), ("reading score", "reading"), ("writing score", "writing"))
+SCORE_RANGE = (0, 100)
+MAX_BODY_BYTES = 8 << 20
+
+
+class BadRequest(ValueError):
+    pass
+
+
+# ---------------------- Payloads ----------------------
+def parse_rows(payload):
+    """Return (scores[n, 3], gender_encoded[n], single) from a request payload."""
+    single = isinstance(payload, dict) and "rows" not in payload
+    if single:
+        rows = [payload]
+    elif isinstance(payload, dict):
+        rows = payload["rows"]
+    else:
+        rows = payload
+    if not isinstance(rows, list) or not rows:
+        raise BadRequest("expected an object, a non-empty list or {\"rows\": [...]}")
+
+    scores = np.empty((len(rows), 3), dtype=np.float64)
+    genders = []
+    for i, row in enumerate(rows):
+        if not isinstance(row, dict):
+            raise BadRequest(f"row {i}: expected an object")
+        for j, keys in enumerate(SCORE_KEYS):
+            value = next((row[k] for k in keys if k in row), None)
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise BadRequest(f"row {i}: '{keys[0]}' must be a number")
+            # json.loads lets NaN and Infinity through
+            if not (math.isfinite(value) and SCORE_RANGE[0] <= value <= SCORE_RANGE[1]):
+                raise BadRequest(f"row {i}: '{keys[0]}' must be between {SCORE_RANGE[0]} and {SCORE_RANGE[1]}")
+            scores[i, j] = value
+        if "gender" not in row:
+            raise BadRequest(f"row {i}: 'gender' is required")
+        genders.append(str(row["gender"]))
+    return scores, encode_gender(genders), single
+
+
+def format_results(scores, labels, proba):
+    performance = scores.mean(axis=1)
+    return [
+        {
+            "category": LEVELS[int(label)],
+            "probabilities": {level: round(float(p), 6) for level, p in zip(LEVELS, probs)},
+            "performance": round(float(perf), 4),
+        }
+        for label, probs, perf in zip(labels, proba, performance)
+    ]
+
+
+# ---------------------- Micro-batching ----------------------
+class MicroBatcher:
+    """Coalesce requests that arrive within `window_ms` into one model call.
+
+    With window_ms=0 every request is scored on its own (batching off).
+    """
+
+    def __init__(self, engine, plan, window_ms=2.0, max_batch=4096):
+        self.engine = engine
+        self.plan = plan
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue()
+        self.batches = 0
+        self.rows = 0
+        self._task = None
+
+    def _predict(self, scores, gender_encoded):
+        X = self.plan.build(scores[:, 0], scores[:, 1], scores[:, 2], gender_encoded)
+        self.batches += 1
+        self.rows += len(X)
+        labels, proba = self.engine.predict(X)
+        DRIFT.observe_many(scores, gender_encoded, labels)
+        return labels, proba
+
+    async def submit(self, scores, gender_encoded):
+        if self.window <= 0:
+            return self._predict(scores, gender_encoded)
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((scores, gender_encoded, future))
+        return await future
+
+    def start(self):
+        if self.window > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            pending = [await self.queue.get()]
+            # Let concurrent requests pile up for one window, then drain them all
+            await asyncio.sleep(self.window)
+            size = len(pending[0][0])
+            while size < self.max_batch and not self.queue.empty():
+                item = self.queue.get_nowait()
+                pending.append(item)
+                size += len(item[0])
+
+            scores = np.concatenate([p[0] for p in pending])
+            gender_encoded = np.concatenate([p[1] for p in pending])
+            try:
+                labels, proba = self._predict(scores, gender_encoded)
+            except Exception as exc:
+                for _, _, future in pending:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+
+            offset = 0
+            for rows, _, future in pending:
+                end = offset + len(rows)
+                if not future.done():
+                    future.set_result((labels[offset:end], proba[offset:end]))
+                offset = end
+
+
+# ---------------------- HTTP ----------------------
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+               500: "Internal Server Error"}
+
+
+class InferenceServer:
+    def __init__(self, artifacts, window_ms=2.0, max_batch=4096):
+        self.artifacts = artifacts
+        self.batcher = MicroBatcher(artifacts.engine, artifacts.plan, window_ms, max_batch)
+        self.server = None
+
+    async def start(self, host="127.0.0.1", port=8600):
+        self.batcher.start()
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        await self.batcher.stop()
+
+    async def _respond(self, writer, status, body, keep_alive):
+        data = json.dumps(body).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data
+        )
+        await writer.drain()
+
+    async def _route(self, method, path, body):
+        if path == "/health":
+            return 200, {"status": "ok", "model_hash": self.artifacts.record["model_hash"]}
+        if path == "/drift":
+            return 200, drift_report(DRIFT.state(), reference_from(self.artifacts))
+        if path != "/predict":
+            return 404, {"error": f"unknown path {path}"}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+        try:
+            scores, gender_encoded, single = parse_rows(json.loads(body or b"null"))
+        except (BadRequest, ValueError, KeyError) as exc:
+            return 400, {"error": str(exc)}
+        labels, proba = await self.batcher.submit(scores, gender_encoded)
+        results = format_results(scores, labels, proba)
+        return 200, results[0] if single else {"predictions": results}
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, version = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = headers.get("connection", "").lower() != "close" and version.strip() == "HTTP/1.1"
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"error": "request body too large"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                try:
+                    status, payload = await self._route(method, path.split("?", 1)[0], body)
+                except Exception as exc:
+                    # Answer rather than drop the connection; the client may retry
+                    print(f"service: {method} {path} failed: {exc!r}", file=sys.stderr)
+                    status, payload = 500, {"error": "internal server error"}
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+# ---------------------- Load Generator ----------------------
+async def _client(host, port, bodies, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for body in bodies:
+            start = time.perf_counter()
+            writer.write(
+                f"POST /predict HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def run_load(artifacts, window_ms, concurrency, requests, rows_per_request=1, seed=0):
+    rng = np.random.default_rng(seed)
+    server = InferenceServer(artifacts, window_ms=window_ms)
+    port = await server.start("127.0.0.1", 0)
+
+    def body():
+        rows = [
+            {"math score": int(m), "reading score": int(r), "writing score": int(w), "gender": g}
+            for m, r, w, g in zip(
+                *rng.integers(0, 101, (3, rows_per_request)), rng.choice(["female", "male"], rows_per_request)
+            )
+        ]
+        return json.dumps(rows[0] if rows_per_request == 1 else {"rows": rows}).encode()
+
+    # The first `requests % concurrency` clients send one extra request
+    per_client = [
+        [body() for _ in range(requests // concurrency + (i < requests % concurrency))]
+        for i in range(min(concurrency, requests))
+    ]
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(_client("127.0.0.1", port, bodies, latencies) for bodies in per_client))
+    elapsed = time.perf_counter() - start
+    batches, rows = server.batcher.batches, server.batcher.rows
+    await server.stop()
+
+    lat_ms = np.array(latencies) * 1000
+    return {
+        "batch_window_ms": window_ms,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "p50_ms": round(float(np.percentile(lat_ms, 50)), 3),
+        "p99_ms": round(float(np.percentile(lat_ms, 99)), 3),
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        "model_calls": batches,
+        "mean_rows_per_call": round(rows / max(batches, 1), 2),
+    }
+
+
+# ---------------------- CLI ----------------------
+def _positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless JSON inference service.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve = sub.add_parser("serve", help="run the HTTP service")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8600)
+    serve.add_argument("--batch-window-ms", type=float, default=2.0, help="0 disables micro-batching")
+    serve.add_argument("--max-batch", type=int, default=4096)
+
+    load = sub.add_parser("loadgen", help="benchmark the service with batching off and on")
+    load.add_argument("--concurrency", type=_positive_int, default=64)
+    load.add_argument("--requests", type=_positive_int, default=20_000)
+    load.add_argument("--rows-per-request", type=_positive_int, default=1)
+    load.add_argument("--batch-window-ms", type=float, default=2.0)
+
+    args = parser.parse_args(argv)
+    artifacts = load_artifacts()
+
+    if args.command == "serve":
+        async def serve_forever():
+            server = InferenceServer(artifacts, window_ms=args.batch_window_ms, max_batch=args.max_batch)
+            port = await server.start(args.host, args.port)
+            print(f"Serving on http://{args.host}:{port} (batch window {args.batch_window_ms} ms)")
+            await server.server.serve_forever()
+
+        try:
+            asyncio.run(serve_forever())
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    for window_ms in (0.0, args.batch_window_ms):
+        report = asyncio.run(run_load(artifacts, window_ms, args.concurrency, args.requests, args.rows_per_request))
+        print(json.dumps(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
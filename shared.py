@@ -0,0 +1,323 @@
+"""Share model parameters and the prediction table between worker processes.
+
+With SHARED_MEMORY=1, the first worker to load a model version publishes the
+fused coefficients and (if one is loaded) the precomputed prediction table as
+plain .npy files in a segment directory on tmpfs (/dev/shm):
+
+    /dev/shm/student-performance/<model hash>[-table]/
+        coef.npy  intercept.npy  classes.npy  meta.json
+        table.npy  table.json                 (only with PREDICTION_TABLE)
+        refs/<pid>                            one file per attached worker
+
+Workers with and without PREDICTION_TABLE use different segments, so one
+started without the table never hides it from the others.
+
+Every worker, including the publisher, memory-maps those files read-only, so
+the pages exist once on the box however many workers attach, and attaching
+skips joblib/the .npz entirely. The segment is published under a temporary
+name and renamed into place, so concurrent workers either see all of it or
+none of it. Workers register a ref file when they attach and remove it on
+detach (version swap or exit); within a process attachments are counted, so
+swapping to a version with the same hash (hence the same segment) keeps it.
+The last one out - ignoring refs of pids that
+no longer exist - removes the segment. Mappings already handed out stay
+valid after removal, the kernel frees the pages when the last one closes.
+
+    SHARED_MEMORY=1                          enable (POSIX only)
+    SHARED_MEMORY_DIR=/dev/shm/student-performance
+
+    python shared.py report   # segments on this box, live refs and sizes
+    python shared.py clean    # remove segments with no live refs
+"""
+import atexit
+import collections
+import errno
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from artifacts import Artifacts, artifact_hash, read_artifacts
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, shared mode stays off
+    fcntl = None
+
+_SHM = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+SHARED_DIR = os.environ.get("SHARED_MEMORY_DIR", os.path.join(_SHM, "student-performance"))
+SMAPS_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def enabled():
+    return os.environ.get("SHARED_MEMORY") == "1" and fcntl is not None
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class _DirLock:
+    """Exclusive flock on <root>/.lock: serializes attach vs. last-one-out teardown."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def __enter__(self):
+        os.makedirs(self.root, exist_ok=True)
+        self._fd = os.open(os.path.join(self.root, ".lock"), os.O_CREAT | os.O_RDWR, 0o644)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+
+
+# ---------------------- Segments ----------------------
+class Segment:
+    def __init__(self, path, root=SHARED_DIR):
+        self.path = path
+        self.root = root
+        self.pid = os.getpid()
+        self.attached = False
+
+    @property
+    def ref_path(self):
+        return os.path.join(self.path, "refs", str(self.pid))
+
+    def live_refs(self):
+        refs_dir = os.path.join(self.path, "refs")
+        pids = [int(name) for name in os.listdir(refs_dir) if name.isdigit()] if os.path.isdir(refs_dir) else []
+        return [pid for pid in pids if _pid_alive(pid)]
+
+    def nbytes(self):
+        return sum(
+            os.path.getsize(os.path.join(self.path, name))
+            for name in os.listdir(self.path) if name.endswith(".npy")
+        )
+
+    def attach(self):
+        with _DirLock(self.root):
+            if not os.path.isdir(self.path):
+                raise FileNotFoundError(self.path)
+            if not _holds[self.path]:
+                with open(self.ref_path, "w") as f:
+                    f.write(time.strftime("%Y-%m-%dT%H:%M:%S"))
+            _holds[self.path] += 1
+        self.attached = True
+        _attached.add(self)
+        return self
+
+    def detach(self):
+        """Drop this process's ref; remove the segment if no live process still holds one."""
+        if not self.attached:
+            return
+        self.attached = False
+        _attached.discard(self)
+        with _DirLock(self.root):
+            _holds[self.path] -= 1
+            if _holds[self.path] > 0:
+                return  # another Artifacts in this process still maps it
+            del _holds[self.path]
+            try:
+                os.unlink(self.ref_path)
+            except FileNotFoundError:
+                pass
+            if os.path.isdir(self.path) and not self.live_refs():
+                shutil.rmtree(self.path, ignore_errors=True)
+
+
+_attached = set()
+# segment path -> Segments attached to it in this process; the ref file is
+# written by the first and removed by the last
+_holds = collections.Counter()
+
+
+@atexit.register
+def _detach_all():
+    for segment in list(_attached):
+        segment.detach()
+
+
+def segment_path(model_hash, root=SHARED_DIR, table=False):
+    return os.path.join(root, model_hash[:16] + ("-table" if table else ""))
+
+
+def publish(artifacts, root=SHARED_DIR, path=None):
+    """Write `artifacts` into a segment unless another worker already has; return its path."""
+    if path is None:
+        path = segment_path(artifacts.record["model_hash"], root, table=artifacts.table is not None)
+    if os.path.isdir(path):
+        return path
+    os.makedirs(root, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".publish-", dir=root)
+    engine = artifacts.engine
+    np.save(os.path.join(staging, "coef.npy"), engine.coef)
+    np.save(os.path.join(staging, "intercept.npy"), engine.intercept)
+    np.save(os.path.join(staging, "classes.npy"), engine.classes)
+    meta = {
+        "model_hash": artifacts.record["model_hash"],
+        "feature_columns": list(artifacts.feature_columns),
+        "feature_names_in": engine.feature_names_in,
+        "multi_class": engine.multi_class,
+        "reference_mean": None if engine.mean is None else engine.mean.tolist(),
+        "reference_scale": None if engine.scale is None else engine.scale.tolist(),
+        "published_by": os.getpid(),
+        "published_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    if artifacts.table is not None:
+        np.save(os.path.join(staging, "table.npy"), artifacts.table.table)
+        with open(os.path.join(staging, "table.json"), "w") as f:
+            json.dump(artifacts.table.meta, f)
+    with open(os.path.join(staging, "meta.json"), "w") as f:
+        json.dump(meta, f)
+    os.makedirs(os.path.join(staging, "refs"))
+    try:
+        os.rename(staging, path)
+    except OSError as exc:
+        # Another worker published the same version first; use theirs
+        shutil.rmtree(staging, ignore_errors=True)
+        if exc.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+            raise
+    return path
+
+
+def attach(path, paths, version=None, root=SHARED_DIR):
+    """Artifacts whose arrays are read-only mappings of the segment at `path`."""
+    from features import FeaturePlan
+    from inference import FusedModel
+    from lookup import PredictionTable
+
+    start = time.perf_counter()
+    segment = Segment(path, root).attach()
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    engine = FusedModel(
+        np.load(os.path.join(path, "coef.npy"), mmap_mode="r"),
+        np.load(os.path.join(path, "intercept.npy"), mmap_mode="r"),
+        np.load(os.path.join(path, "classes.npy"), mmap_mode="r"),
+        multi_class=meta["multi_class"],
+        feature_names_in=meta["feature_names_in"],
+        mean=meta.get("reference_mean"),
+        scale=meta.get("reference_scale"),
+    )
+    table_path = os.path.join(path, "table.npy")
+    table = PredictionTable(table_path, expected_hash=meta["model_hash"]) if os.path.exists(table_path) else None
+    record = {
+        "version": version or meta["model_hash"][:12],
+        "model_hash": meta["model_hash"],
+        "loaded_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "load_seconds": round(time.perf_counter() - start, 4),
+        "runtime": "shared",
+        "mmap_mode": "r",
+        "pid": os.getpid(),
+        "disk_loads": 0,
+        "cache_hits": 0,
+        "segment": path,
+        "published_by": meta["published_by"],
+    }
+    return Artifacts(paths, "r", meta["feature_columns"], FeaturePlan(meta["feature_columns"]), engine,
+                     table, None, record, segment=segment)
+
+
+def load_shared(paths, version=None, mmap_mode="r", root=SHARED_DIR):
+    """Attach to the segment for `paths`, publishing it first if this is the first worker."""
+    # Keyed on whether this worker is configured for a table, not on whether it
+    # loaded: a table that fails its hash check is left out of that segment too
+    path = segment_path(artifact_hash(paths), root, table=bool(os.environ.get("PREDICTION_TABLE")))
+    if not os.path.isdir(path):
+        publish(read_artifacts(paths, mmap_mode, version=version), root, path)
+    for _ in range(3):
+        try:
+            return attach(path, paths, version, root)
+        except FileNotFoundError:
+            # The last holder tore it down between our check and attach; publish again
+            publish(read_artifacts(paths, mmap_mode, version=version), root, path)
+    raise RuntimeError(f"could not attach to {path}")
+
+
+# ---------------------- Memory Report ----------------------
+def memory_report(smaps="/proc/self/smaps", root=SHARED_DIR):
+    """Bytes of this process split into segment mappings vs everything else.
+
+    `attached_*` covers mappings of shared segments (Pss divides shared pages by
+    the number of processes mapping them); `private_bytes` is memory only this
+    process holds. None where /proc isn't available.
+    """
+    if not os.path.exists(smaps):
+        return None
+    totals = dict.fromkeys(SMAPS_FIELDS, 0)
+    attached = dict.fromkeys(SMAPS_FIELDS, 0)
+    in_segment = False
+    with open(smaps) as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in totals:
+                kb = int(rest.split()[0]) * 1024
+                totals[name] += kb
+                if in_segment:
+                    attached[name] += kb
+            elif "-" in name and " " in line:
+                # Mapping header: "addr-addr perms offset dev inode [path]"
+                fields = line.split()
+                in_segment = len(fields) >= 6 and fields[5].startswith(root)
+    return {
+        "rss_bytes": totals["Rss"],
+        "pss_bytes": totals["Pss"],
+        "private_bytes": totals["Private_Clean"] + totals["Private_Dirty"],
+        "shared_bytes": totals["Shared_Clean"] + totals["Shared_Dirty"],
+        "attached_rss_bytes": attached["Rss"],
+        "attached_pss_bytes": attached["Pss"],
+        "attached_private_bytes": attached["Private_Clean"] + attached["Private_Dirty"],
+        "segments": sorted(segment.path for segment in _attached),
+    }
+
+
+def print_startup_report(artifacts):
+    report = memory_report()
+    record = artifacts.record
+    line = f"[shared] pid {os.getpid()} attached {record.get('segment')} (published by pid {record.get('published_by')})"
+    if report is not None:
+        line += (
+            f": segment rss {report['attached_rss_bytes'] / 1e6:.1f} MB / pss {report['attached_pss_bytes'] / 1e6:.1f} MB, "
+            f"process private {report['private_bytes'] / 1e6:.1f} MB, shared {report['shared_bytes'] / 1e6:.1f} MB"
+        )
+    print(line, file=sys.stderr, flush=True)
+
+
+# ---------------------- CLI ----------------------
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else "report"
+    if command not in ("report", "clean"):
+        print(__doc__)
+        return 2
+    names = sorted(n for n in os.listdir(SHARED_DIR) if not n.startswith(".")) if os.path.isdir(SHARED_DIR) else []
+    for name in names:
+        segment = Segment(os.path.join(SHARED_DIR, name))
+        refs = segment.live_refs()
+        if command == "clean" and not refs:
+            with _DirLock(SHARED_DIR):
+                if not segment.live_refs():
+                    shutil.rmtree(segment.path, ignore_errors=True)
+            print(f"removed {segment.path}")
+        elif command == "report":
+            print(f"{segment.path}  {segment.nbytes():>12,} bytes  live refs: {refs or '-'}")
+    if not names:
+        print(f"no segments in {SHARED_DIR}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
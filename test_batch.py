@@ -0,0 +1,47 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from artifacts import read_artifacts
+from batch import RESULT_COLUMNS, iter_chunks, score_chunk, score_stream
+from inference import LEVELS
+
+
+@pytest.fixture(scope="module")
+def artifacts():
+    return read_artifacts()
+
+
+def students(rows):
+    return pd.DataFrame(rows, columns=["Math Score", "reading score", "writing score", "gender"])
+
+
+def test_scores_valid_chunk_like_single_predictions(artifacts):
+    chunk = students([[70, 80, 90, "female"], [0, 0, 0, "male"], ["100", 55.5, 60, "Female"]])
+    result = score_chunk(chunk, artifacts.engine, artifacts.plan)
+    assert list(result.columns) == list(chunk.columns) + RESULT_COLUMNS
+
+    for (_, row), (_, scored) in zip(chunk.iterrows(), result.iterrows()):
+        scores = [float(row.iloc[i]) for i in range(3)]
+        labels, proba = artifacts.engine.predict(artifacts.plan.build(*scores, row["gender"]))
+        assert scored["predicted_category"] == LEVELS[labels[0]]
+        assert scored["prob_" + LEVELS[labels[0]].lower()] == proba[0].max().round(4)
+
+
+@pytest.mark.parametrize("bad", [None, "", "abc", -1, 100.5, 150, np.inf])
+def test_rejects_invalid_score_with_row_number(artifacts, bad):
+    chunk = students([[70, 80, 90, "female"], [60, bad, 60, "male"]])
+    with pytest.raises(ValueError, match=r"1 row\(s\) .* row 12 reading score="):
+        score_chunk(chunk, artifacts.engine, artifacts.plan, first_row=10)
+
+
+def test_stream_numbers_rows_across_chunks(artifacts):
+    rows = [[50, 50, 50, "male"]] * 7 + [[50, 50, 150, "male"], [50, "abc", 50, "male"]]
+    source = io.BytesIO(students(rows).to_csv(index=False).encode())
+    out = io.StringIO()
+    with pytest.raises(ValueError, match=r"row 8 writing score=150\b.*row 9 reading score='abc'"):
+        score_stream(iter_chunks(source, "students.csv", chunksize=3), artifacts.engine, artifacts.plan, out)
+    # The chunks before the bad one were written, none after
+    assert len(out.getvalue().splitlines()) == 1 + 6
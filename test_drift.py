@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from drift import DriftMonitor, drift_report, psi
+
+
+@pytest.fixture
+def batch():
+    rng = np.random.default_rng(4)
+    scores = np.clip(rng.normal(66, 14, (1_000, 3)), 0, 100)
+    return scores, rng.integers(0, 2, 1_000), rng.integers(0, 3, 1_000)
+
+
+def test_merged_batches_match_one_pass(batch):
+    scores, genders, labels = batch
+    one_pass = DriftMonitor()
+    for (m, r, w), g, label in zip(scores, genders, labels):
+        one_pass.observe(m, r, w, g, label)
+
+    merged = DriftMonitor()
+    # Uneven batches, an empty one, and a single row merged into a non-empty state
+    for lo, hi in ((0, 1), (1, 1), (1, 400), (400, 401), (401, 1_000)):
+        merged.observe_many(scores[lo:hi], genders[lo:hi], labels[lo:hi])
+
+    expected, actual = one_pass.state(), merged.state()
+    assert actual["count"] == expected["count"] == 1_000
+    assert actual["hist"] == expected["hist"] and actual["mix"] == expected["mix"]
+    np.testing.assert_allclose(actual["mean"], expected["mean"], rtol=1e-12)
+    np.testing.assert_allclose(actual["m2"], expected["m2"], rtol=1e-9)
+    np.testing.assert_allclose(actual["mean"], np.column_stack([scores, genders]).mean(axis=0), rtol=1e-12)
+
+
+def test_report_flags_shifted_inputs(batch):
+    scores, genders, labels = batch
+    reference = {"features": ["math score"], "mean": [66.0], "scale": [14.0]}
+    monitor = DriftMonitor()
+    monitor.observe_many(scores, genders, labels)
+    assert drift_report(monitor.state(), reference)["status"] == "ok"
+
+    shifted = DriftMonitor()
+    shifted.observe_many(np.clip(scores - 20, 0, 100), genders, labels)
+    report = drift_report(shifted.state(), reference, baseline=monitor.state())
+    assert report["status"] == "alert"
+    assert report["baseline_psi"]["Math"] > report["baseline_psi"]["Prediction mix"] == 0
+
+
+def test_psi_of_identical_distributions_is_zero():
+    assert psi([5, 10, 0], [1, 2, 0]) == 0
+    assert psi([10, 0], [0, 10]) > 1
@@ -0,0 +1,57 @@
+"""FeaturePlan must build exactly what the per-prediction pandas path did."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from artifacts import read_artifacts
+from features import CANDIDATE_COLUMNS, FeaturePlan
+
+
+@pytest.fixture(scope="module")
+def artifacts():
+    return read_artifacts()
+
+
+def pandas_features(math, reading, writing, gender, feature_columns):
+    """The per-prediction dict + DataFrame + reindex that FeaturePlan replaced."""
+    performance = (math + reading + writing) / 3
+    if performance < 60:
+        pe = 0
+    elif performance < 80:
+        pe = 1
+    else:
+        pe = 2
+    input_dict = {
+        'math score': math,
+        'reading score': reading,
+        'writing score': writing,
+        'performance': performance,
+        'gender_encoded': 0 if gender.lower() == "female" else 1,
+        'performance_encoded': pe,
+        'gender_female': 1 if gender.lower() == "female" else 0,
+        'gender_male': 1 if gender.lower() == "male" else 0,
+    }
+    input_df = pd.DataFrame([input_dict])
+    input_df = input_df.reindex(columns=feature_columns, fill_value=0)
+    input_df = input_df.fillna(0)
+    return input_df.to_numpy(dtype=np.float64)
+
+
+@pytest.mark.parametrize("columns", ["model", "all", "subset"])
+def test_feature_plan_matches_pandas_path(artifacts, columns):
+    feature_columns = {
+        "model": artifacts.feature_columns,
+        "all": list(CANDIDATE_COLUMNS) + ["unknown column"],
+        "subset": ["performance_encoded", "writing score", "gender_male"],
+    }[columns]
+    plan = FeaturePlan(feature_columns)
+    rng = np.random.default_rng(0)
+    # Including the 60/80 bucket edges and both ends of the score range
+    scores = np.concatenate([rng.integers(0, 101, (500, 3)), [[60, 60, 60], [80, 80, 80], [0, 0, 0], [100, 100, 100]]])
+    genders = np.resize(["female", "male", "Female", "other"], len(scores))
+
+    built = plan.build(scores[:, 0], scores[:, 1], scores[:, 2], genders)
+    expected = np.vstack([
+        pandas_features(int(m), int(r), int(w), g, feature_columns) for (m, r, w), g in zip(scores, genders)
+    ])
+    np.testing.assert_array_equal(built, expected)
@@ -0,0 +1,36 @@
+import numpy as np
+
+from history import STAT_FIELDS, HistoryStore, connect, rebuild_stats
+from inference import LEVELS
+
+
+def test_incremental_stats_match_rebuild(tmp_path):
+    path = str(tmp_path / "history.db")
+    store = HistoryStore(path, batch_size=37)
+    rng = np.random.default_rng(2)
+    try:
+        for _ in range(500):
+            math, reading, writing = (int(s) for s in rng.integers(0, 101, 3))
+            performance = (math + reading + writing) / 3
+            proba = rng.dirichlet(np.ones(len(LEVELS)))
+            store.record(
+                f"user-{rng.integers(5)}", math, reading, writing, rng.choice(["female", "male"]),
+                performance, LEVELS[int(proba.argmax())], proba,
+            )
+        store.flush()
+    finally:
+        store.close()
+
+    conn = connect(path)
+    query_stats = f"SELECT user_id, {', '.join(STAT_FIELDS)} FROM user_stats ORDER BY user_id"
+    query_hist = "SELECT user_id, bin, n FROM performance_hist ORDER BY user_id, bin"
+    incremental = conn.execute(query_stats).fetchall(), conn.execute(query_hist).fetchall()
+    rebuild_stats(conn)
+    rebuilt = conn.execute(query_stats).fetchall(), conn.execute(query_hist).fetchall()
+    conn.close()
+
+    assert len(incremental[0]) == 5
+    assert incremental[1] == rebuilt[1]
+    for a, b in zip(incremental[0], rebuilt[0]):
+        assert a[:5] == b[:5]  # user and counts
+        np.testing.assert_allclose(a[5:], b[5:], rtol=1e-12)
@@ -0,0 +1,8 @@
+from artifacts import read_artifacts
+from inference import check_parity
+
+
+def test_fused_model_matches_sklearn():
+    artifacts = read_artifacts()
+    parity = check_parity(artifacts.model, artifacts.scaler, artifacts.feature_columns)
+    assert parity["ok"], parity
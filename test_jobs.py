@@ -0,0 +1,78 @@
+import threading
+
+import pytest
+
+from jobs import CANCELLED, DONE, FAILED, RUNNING, JobManager, JobRejected
+
+
+@pytest.fixture
+def manager():
+    manager = JobManager(workers=1, queue_size=1, user_limit=2)
+    yield manager
+    manager.shutdown()
+
+
+def blocking(job, release, started=None):
+    """Runs until `release` is set, checking for cancellation like a scoring job."""
+    if started is not None:
+        started.set()
+    while not release.wait(0.01):
+        job.check_cancelled()
+    return "ok"
+
+
+def test_job_runs_to_completion(manager):
+    job = manager.submit("a", "add", lambda job, x, y: x + y, 2, 3)
+    job._future.result(timeout=5)
+    assert (job.status, job.result, job.progress) == (DONE, 5, 1.0)
+    assert manager.jobs_for("a") == [job] and manager.jobs_for("b") == []
+
+
+def test_failure_is_reported_on_the_job(manager):
+    def fail(job):
+        raise ValueError("bad file")
+
+    job = manager.submit("a", "fail", fail)
+    job._future.result(timeout=5)
+    assert job.status == FAILED and job.error == "ValueError: bad file"
+
+
+def test_user_and_queue_limits(manager):
+    release, started = threading.Event(), threading.Event()
+    try:
+        running = manager.submit("a", "first", blocking, release, started)
+        assert started.wait(5)
+        queued = manager.submit("a", "second", blocking, release)
+        with pytest.raises(JobRejected, match="already have 2 jobs"):
+            manager.submit("a", "third", blocking, release)
+        # One worker busy and the one queue slot taken
+        with pytest.raises(JobRejected, match="busy"):
+            manager.submit("b", "other user", blocking, release)
+        assert manager.counts["rejected_user_limit"] == manager.counts["rejected_queue_full"] == 1
+    finally:
+        release.set()
+    for job in (running, queued):
+        job._future.result(timeout=5)
+    assert manager.stats()["done"] == 2
+
+
+def test_cancel_queued_and_running(manager):
+    release, started = threading.Event(), threading.Event()
+    running = manager.submit("a", "running", blocking, release, started)
+    queued = manager.submit("a", "queued", blocking, release)
+    assert started.wait(5) and running.status == RUNNING
+
+    # A queued job never starts; a running one stops at its next check
+    assert manager.cancel(queued.id) and queued.status == CANCELLED
+    assert manager.cancel(running.id)
+    running._future.result(timeout=5)
+    assert running.status == CANCELLED
+    assert not manager.cancel(running.id)
+
+
+def test_dismiss_runs_cleanup_once(manager):
+    released = []
+    job = manager.submit("a", "result", lambda job: "scored.csv", cleanup=released.append)
+    job._future.result(timeout=5)
+    assert manager.dismiss(job.id) and not manager.dismiss(job.id)
+    assert released == ["scored.csv"] and manager.jobs_for("a") == []
@@ -0,0 +1,23 @@
+import itertools
+
+import numpy as np
+
+from artifacts import read_artifacts
+from lookup import TABLE_DTYPE, PredictionTable, build_table, table_index
+
+
+def test_lookup_table_matches_live_model(tmp_path):
+    artifacts = read_artifacts()
+    path = str(tmp_path / "table.npy")
+    build_table(artifacts.engine, artifacts.plan, path=path, model_hash=artifacts.record["model_hash"])
+    table = PredictionTable(path, expected_hash=artifacts.record["model_hash"])
+
+    grid = np.array(list(itertools.product(range(101), repeat=3)))
+    for gender_encoded in (0, 1):
+        math, reading, writing = grid.T
+        labels, proba = artifacts.engine.predict(artifacts.plan.build(math, reading, writing, np.full(len(grid), gender_encoded)))
+        table_labels, table_proba = table.predict(math, reading, writing, gender_encoded)
+        assert int((table_labels != labels).sum()) == 0
+        # Probabilities are stored as float16
+        np.testing.assert_allclose(table_proba, proba, atol=np.finfo(TABLE_DTYPE["proba"].base).eps)
+    assert table_index(100, 100, 100, 1) == table.table.shape[0] - 1
@@ -0,0 +1,68 @@
+import socket
+import urllib.request
+
+import pytest
+
+import metrics
+from metrics import CONTENT_TYPE, MetricsRegistry
+
+
+@pytest.fixture
+def registry():
+    return MetricsRegistry()
+
+
+def test_counter_exposition(registry):
+    counter = registry.counter("predictions_total", "Predictions made.", ("label", "gender"))
+    counter.inc("High", "female")
+    counter.inc("High", "female")
+    counter.inc('Lo"w\\', "male\n", amount=3)
+    assert registry.render() == (
+        "# HELP predictions_total Predictions made.\n"
+        "# TYPE predictions_total counter\n"
+        'predictions_total{label="High",gender="female"} 2\n'
+        'predictions_total{label="Lo\\"w\\\\",gender="male\\n"} 3\n'
+    )
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    histogram = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 0.01))
+    for value in (0.005, 0.01, 0.05, 2.0):
+        histogram.observe(value)
+    assert registry.render().splitlines() == [
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.01"} 2',  # upper bounds are inclusive
+        'latency_seconds_bucket{le="0.1"} 3',
+        'latency_seconds_bucket{le="+Inf"} 4',
+        "latency_seconds_sum 2.065",
+        "latency_seconds_count 4",
+    ]
+
+
+def test_gauges(registry):
+    registry.gauge("set_value", "Set.").set(1.5)
+    registry.gauge("labelled", "Labelled.", ("version",), fn=lambda: {("v2",): 1})
+    registry.gauge("no_sample", "None.", fn=lambda: None)
+    registry.gauge("broken", "Raises.", fn=lambda: 1 / 0)
+    lines = registry.render().splitlines()
+    assert "set_value 1.5" in lines and 'labelled{version="v2"} 1' in lines
+    # A gauge without a value keeps its HELP/TYPE but has no sample
+    assert [line for line in lines if not line.startswith("#")] == ["set_value 1.5", 'labelled{version="v2"} 1']
+    assert registry.gauge("set_value", "Again.") is registry.gauge("set_value", "Once more.")
+
+
+def test_endpoint_and_sessions_outside_streamlit(monkeypatch):
+    assert metrics.active_sessions() is None and metrics.memory_per_session() is None
+    monkeypatch.setattr(metrics, "_state", {})
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = metrics.serve_metrics(port=port)
+    try:
+        response = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics")
+        assert response.headers["Content-Type"] == CONTENT_TYPE
+        assert "# TYPE student_predictions_total counter" in response.read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
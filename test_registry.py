@@ -0,0 +1,55 @@
+"""Versions are validated before they are swapped in; bad ones are skipped."""
+import os
+
+import joblib
+import numpy as np
+import pytest
+
+from registry import ModelRegistry, publish
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    root = str(tmp_path / "models")
+    os.makedirs(root)
+    publish("v1", ".", root)
+    return root
+
+
+def predict(artifacts):
+    return artifacts.engine.predict(artifacts.plan.build(72, 80, 77, "female"))
+
+
+def test_serves_newest_version(model_dir):
+    publish("v2", ".", model_dir)
+    registry = ModelRegistry(model_dir, poll_seconds=0)
+    assert registry.load().record["version"] == "v2"
+
+
+def test_swaps_in_new_version(model_dir):
+    registry = ModelRegistry(model_dir, poll_seconds=0)
+    first = registry.load()
+    assert not registry.check()
+
+    # Same files, so the same model hash: still a new version to swap to
+    publish("v2", ".", model_dir)
+    assert registry.check()
+    assert registry.current().record["version"] == "v2"
+    assert registry.current().record["model_hash"] == first.record["model_hash"]
+    assert registry.swaps == 1
+    assert (registry.disk_loads, registry.cache_hits) == (2, 2)
+    # A request still holding the old snapshot finishes on it
+    np.testing.assert_array_equal(predict(first)[1], predict(registry.current())[1])
+
+
+def test_rejects_version_that_fails_validation(model_dir):
+    registry = ModelRegistry(model_dir, poll_seconds=0)
+    registry.load()
+    publish("v2", ".", model_dir)
+    joblib.dump(["math score", "reading score"], os.path.join(model_dir, "v2", "model_features.joblib"))
+
+    assert not registry.check()
+    assert registry.current().record["version"] == "v1"
+    assert registry.events[-1]["status"] == "rejected"
+    assert not registry.check()  # not retried until its files change
+    assert registry.disk_loads == 2
@@ -0,0 +1,53 @@
+import pytest
+
+import result_cache
+from result_cache import ResultCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_hit_and_miss():
+    cache = ResultCache(maxsize=4, ttl=60)
+    assert cache.get(70, 80, 90, "female", "h1") is None
+    cache.put(70, 80, 90, "female", "h1", "result")
+    assert cache.get(70, 80, 90, "female", "h1") == "result"
+    assert cache.get(70, 80, 90, "male", "h1") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 2, 1)
+    assert stats["hit_rate"] == pytest.approx(1 / 3)
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResultCache(maxsize=4, ttl=60)
+    cache.put(1, 2, 3, "male", "h1", "result")
+    clock[0] += 59
+    assert cache.get(1, 2, 3, "male", "h1") == "result"
+    clock[0] += 1
+    assert cache.get(1, 2, 3, "male", "h1") is None
+    assert cache.stats()["expirations"] == 1 and cache.stats()["size"] == 0
+
+
+def test_evicts_least_recently_used():
+    cache = ResultCache(maxsize=2, ttl=60)
+    cache.put(1, 1, 1, "male", "h1", "a")
+    cache.put(2, 2, 2, "male", "h1", "b")
+    assert cache.get(1, 1, 1, "male", "h1") == "a"  # b is now the oldest
+    cache.put(3, 3, 3, "male", "h1", "c")
+    assert cache.get(2, 2, 2, "male", "h1") is None
+    assert cache.get(1, 1, 1, "male", "h1") == "a" and cache.get(3, 3, 3, "male", "h1") == "c"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_new_model_hash_misses_without_clearing_old_entries():
+    cache = ResultCache(maxsize=4, ttl=60)
+    cache.put(1, 2, 3, "male", "old", "from old model")
+    assert cache.get(1, 2, 3, "male", "new") is None
+    cache.put(1, 2, 3, "male", "new", "from new model")
+    # A session still on the old snapshot during a swap keeps its hits
+    assert cache.get(1, 2, 3, "male", "old") == "from old model"
+    assert cache.get(1, 2, 3, "male", "new") == "from new model"
@@ -0,0 +1,46 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from artifacts import read_artifacts
+from service import BadRequest, parse_rows, run_load
+
+ROW = {"math score": 72, "reading score": 80, "writing score": 77, "gender": "female"}
+
+
+def test_parses_single_list_and_rows():
+    scores, genders, single = parse_rows(ROW)
+    assert single and scores.tolist() == [[72, 80, 77]] and genders.tolist() == [0]
+
+    short = {"math": 1, "reading": 2, "writing": 3, "gender": "male"}
+    for payload in ([ROW, short], {"rows": [ROW, short]}):
+        scores, genders, single = parse_rows(payload)
+        assert not single and scores.tolist() == [[72, 80, 77], [1, 2, 3]] and genders.tolist() == [0, 1]
+
+
+@pytest.mark.parametrize("payload, message", [
+    ([], "non-empty list"),
+    ({"rows": "x"}, "non-empty list"),
+    ("x", "non-empty list"),
+    ([ROW, 3], "row 1: expected an object"),
+    ({**ROW, "math score": "72"}, "'math score' must be a number"),
+    ({**ROW, "reading score": True}, "'reading score' must be a number"),
+    ({**ROW, "writing score": None}, "'writing score' must be a number"),
+    ({**ROW, "math score": -1}, "between 0 and 100"),
+    ({**ROW, "math score": 100.5}, "between 0 and 100"),
+    (json.loads('{"math score": NaN, "reading score": 1, "writing score": 1, "gender": "male"}'), "between 0 and 100"),
+    (json.loads('{"math score": Infinity, "reading score": 1, "writing score": 1, "gender": "male"}'), "between 0 and 100"),
+    ({k: v for k, v in ROW.items() if k != "gender"}, "'gender' is required"),
+])
+def test_rejects_bad_payloads(payload, message):
+    with pytest.raises(BadRequest, match=message):
+        parse_rows(payload)
+
+
+@pytest.mark.parametrize("concurrency, requests", [(3, 7), (8, 2)])
+def test_loadgen_sends_every_request(concurrency, requests):
+    report = asyncio.run(run_load(read_artifacts(), 0.0, concurrency, requests))
+    assert report["requests"] == requests
+    assert np.isfinite(report["p99_ms"])
@@ -0,0 +1,72 @@
+"""Shared segments: one per model (and table), removed by the last process out."""
+import functools
+import os
+
+import pytest
+
+import shared
+from artifacts import ARTIFACT_PATHS
+from lookup import build_table
+from registry import ModelRegistry, publish
+
+pytestmark = pytest.mark.skipif(shared.fcntl is None, reason="shared segments need flock")
+
+
+@pytest.fixture
+def root(tmp_path, monkeypatch):
+    root = str(tmp_path / "shm")
+    monkeypatch.delenv("PREDICTION_TABLE", raising=False)
+    monkeypatch.setattr(shared, "load_shared", functools.partial(shared.load_shared, root=root))
+    return root
+
+
+def test_last_one_out_removes_segment(root):
+    first = shared.load_shared(ARTIFACT_PATHS)
+    second = shared.load_shared(ARTIFACT_PATHS)
+    path = first.segment.path
+    assert second.segment.path == path
+    assert first.segment.live_refs() == [os.getpid()]
+
+    # A ref left behind by a process that no longer exists doesn't keep it alive
+    with open(os.path.join(path, "refs", "999999999"), "w"):
+        pass
+    first.segment.detach()
+    assert os.path.isdir(path)
+    second.segment.detach()
+    assert not os.path.exists(path)
+
+
+def test_same_hash_swap_keeps_segment(root, tmp_path, monkeypatch):
+    monkeypatch.setenv("SHARED_MEMORY", "1")
+    model_dir = str(tmp_path / "models")
+    os.makedirs(model_dir)
+    publish("v1", ".", model_dir)
+    registry = ModelRegistry(model_dir, poll_seconds=0)
+    first = registry.load()
+
+    publish("v2", ".", model_dir)
+    assert registry.check()
+    served = registry.current()
+    assert served.segment.path == first.segment.path
+    assert os.path.isdir(served.segment.path)
+    assert served.segment.live_refs() == [os.getpid()]
+    served.engine.predict(served.plan.build(72, 80, 77, "female"))
+
+    served.segment.detach()
+    assert not os.path.exists(served.segment.path)
+
+
+def test_table_and_tableless_workers_use_separate_segments(root, tmp_path, monkeypatch):
+    without = shared.load_shared(ARTIFACT_PATHS)
+    assert without.table is None
+
+    table_path = str(tmp_path / "table.npy")
+    build_table(without.engine, without.plan, path=table_path)
+    monkeypatch.setenv("PREDICTION_TABLE", table_path)
+    with_table = shared.load_shared(ARTIFACT_PATHS)
+    assert with_table.table is not None
+    assert with_table.segment.path != without.segment.path
+
+    without.segment.detach()
+    with_table.segment.detach()
+    assert os.listdir(root) == [".lock"]
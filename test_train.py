@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cohort import synthetic_cohort
+from features import FeaturePlan
+from inference import FusedModel
+from train import FEATURE_COLUMNS, Stream, evaluate, fit_model, fit_scaler, parse_labels
+
+
+@pytest.fixture
+def students(tmp_path):
+    math, reading, writing, genders = synthetic_cohort(2_000, seed=3)
+    frame = pd.DataFrame({"math score": math, "reading score": reading, "writing score": writing, "gender": genders})
+    # Ends with a chunk that has only the top class, which can't be fitted on its own
+    frame.loc[len(frame)] = [100, 100, 100, "female"]
+    path = tmp_path / "students.csv"
+    frame.to_csv(path, index=False)
+    return str(path)
+
+
+def test_parse_labels():
+    assert parse_labels(np.array(["low", " High", "MEDIUM"])).tolist() == [0, 2, 1]
+    assert parse_labels(np.array([0, 2, 1.0])).tolist() == [0, 2, 1]
+    for bad in ([0, 3], [1.5], [-1], [np.nan]):
+        with pytest.raises(ValueError, match="out of range"):
+            parse_labels(np.array(bad))
+    with pytest.raises(ValueError, match="unknown label"):
+        parse_labels(np.array(["low", "great"]))
+
+
+def test_fits_every_training_row_and_evaluates_each_plan(students):
+    stream = Stream([students], FeaturePlan(FEATURE_COLUMNS), chunksize=500)
+    scaler, rows = fit_scaler(stream, FEATURE_COLUMNS)
+    model, fitted = fit_model(stream, scaler, epochs=1)
+    assert fitted == rows
+
+    class Bucket:
+        """Predicts performance_encoded, the default label, from its own two columns."""
+
+        def predict(self, X):
+            return X[:, 1].astype(np.int64), None
+
+    report = evaluate(stream, {
+        "new": (FusedModel.from_sklearn(model, scaler), stream.plan),
+        "bucket": (Bucket(), FeaturePlan(["gender_encoded", "performance_encoded"])),
+    })
+    assert report["new"]["rows"] == report["bucket"]["rows"] > 0
+    assert report["new"]["accuracy"] > 0.9 and report["bucket"]["accuracy"] == 1.0
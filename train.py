@@ -0,0 +1,305 @@
+"""Out-of-core training of the three model artifacts app.py loads.
+
+Streams one or more CSV/Parquet/Excel files in chunks (batch.iter_chunks) and
+never holds more than a chunk in memory:
+
+    pass 1       StandardScaler.partial_fit on the training rows
+    pass 2..E+1  LogisticRegression(warm_start=True) refitted on each scaled
+                 chunk for a few iterations, starting from the previous
+                 chunk's coefficients, for E epochs; a chunk without every
+                 class is merged into the next, the last one into the final fit
+    last pass    accuracy and confusion matrix on the held-out rows, for the
+                 new model and (if present) the artifacts it would replace,
+                 each with its own feature columns
+
+A fixed fraction of every chunk is held out, chosen by a seeded generator per
+chunk, so the same rows are held out in every pass. The label is the
+`--label` column (Low/Medium/High or 0/1/2) or, by default, the 60/80 bucket
+of the average score - the same rule as features.performance_encoded.
+Scores are checked like batch scoring does (0-100, no blanks), and numeric
+labels must be whole numbers 0-2.
+
+The output directory gets student_model.joblib, scaler.joblib,
+model_features.joblib and fused_model.npz in the same format as the shipped
+ones, written under a temporary name and renamed into place, so it can point
+straight into MODEL_DIR for the registry to pick up. Nothing is written if
+the held-out accuracy is below --min-accuracy.
+
+    python train.py students.csv --out models/2026-10-18
+    python train.py a.parquet b.csv --label performance_level --epochs 3 --chunksize 100000
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+import warnings
+
+import numpy as np
+
+from batch import _checked_scores, _resolve_columns, iter_chunks
+from features import PERFORMANCE_BINS, FeaturePlan, gender_codes
+from inference import LEVELS
+
+FEATURE_COLUMNS = ["math score", "reading score", "writing score", "gender_encoded"]
+CHUNK_ROWS = 50_000
+EPOCHS = 2
+BATCH_ITER = 10
+HOLDOUT = 0.1
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def parse_labels(values):
+    """Class indices 0..2 from level names (any case) or numbers."""
+    values = np.asarray(values)
+    if values.dtype.kind in "iuf":
+        bad = ~np.isin(values, np.arange(len(LEVELS)))
+        if bad.any():
+            raise ValueError(f"label(s) {sorted(set(values[bad].tolist()))[:5]} out of range, expected {LEVELS} or 0-{len(LEVELS) - 1}")
+        return values.astype(np.int64)
+    lookup = {level.lower(): i for i, level in enumerate(LEVELS)}
+    lowered = np.char.lower(np.char.strip(values.astype(str)))
+    labels = np.array([lookup.get(v, -1) for v in lowered], dtype=np.int64)
+    if (labels < 0).any():
+        raise ValueError(f"unknown label(s) {sorted(set(lowered[labels < 0]))[:5]}, expected {LEVELS} or 0-2")
+    return labels
+
+
+# ---------------------- Streaming ----------------------
+class Stream:
+    """Re-readable stream of (features, labels, held_out) chunks over `paths`.
+
+    `raw()` yields the inputs instead of features, for models with another plan.
+    """
+
+    def __init__(self, paths, plan, chunksize=CHUNK_ROWS, label_column=None, holdout=HOLDOUT, seed=0):
+        self.paths = paths
+        self.plan = plan
+        self.chunksize = chunksize
+        self.label_column = label_column
+        self.holdout = holdout
+        self.seed = seed
+
+    def _arrays(self, chunk, first_row):
+        score_cols, gender_col = _resolve_columns(chunk.columns)
+        scores = _checked_scores(chunk, score_cols, first_row)
+        genders = gender_codes(chunk[gender_col].to_numpy())
+        if self.label_column is not None:
+            y = parse_labels(chunk[self.label_column].to_numpy())
+        else:
+            y = np.digitize(scores.mean(axis=1), PERFORMANCE_BINS)
+        return scores, genders, y
+
+    def raw(self):
+        """Yield (scores[n, 3], gender codes, labels, held_out) per chunk."""
+        index = 0
+        for path in self.paths:
+            first_row = 0
+            with open(path, "rb") as f:
+                for chunk in iter_chunks(f, path, chunksize=self.chunksize):
+                    try:
+                        scores, genders, y = self._arrays(chunk, first_row)
+                    except ValueError as exc:
+                        raise ValueError(f"{path}: {exc}") from exc
+                    held_out = np.random.default_rng((self.seed, index)).random(len(y)) < self.holdout
+                    index += 1
+                    first_row += len(chunk)
+                    yield scores, genders, y, held_out
+
+    def __iter__(self):
+        for scores, genders, y, held_out in self.raw():
+            yield self.plan.build(scores[:, 0], scores[:, 1], scores[:, 2], genders), y, held_out
+
+
+# ---------------------- Training ----------------------
+def fit_scaler(stream, columns):
+    import pandas as pd
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler()
+    rows = 0
+    for X, _, held_out in stream:
+        train = ~held_out
+        # A DataFrame, so the scaler records feature_names_in_ like the shipped one
+        scaler.partial_fit(pd.DataFrame(X[train], columns=columns))
+        rows += int(train.sum())
+    return scaler, rows
+
+
+def fit_model(stream, scaler, epochs=EPOCHS, batch_iter=BATCH_ITER, C=1.0, on_epoch=None):
+    from sklearn.exceptions import ConvergenceWarning
+    from sklearn.linear_model import LogisticRegression
+
+    model = LogisticRegression(C=C, max_iter=batch_iter, warm_start=True)
+    n_classes = len(LEVELS)
+    rows = 0
+
+    def fit(X_batch, y_batch):
+        with warnings.catch_warnings():
+            # A few iterations per chunk is the point; later chunks continue from here
+            warnings.simplefilter("ignore", ConvergenceWarning)
+            # Float labels, like the shipped model's classes_ (0., 1., 2.)
+            model.fit(X_batch, y_batch.astype(np.float64))
+        return len(y_batch)
+
+    for epoch in range(epochs):
+        # A chunk missing a class would change the coefficient shape, so it is
+        # folded into the next one. Each complete batch is fitted only once the
+        # next is ready, so rows left over at the end of the epoch can join the last.
+        pending_X, pending_y = [], []
+        ready = None
+        for X, y, held_out in stream:
+            train = ~held_out
+            # scaler.transform, without the feature-name check for a bare array
+            pending_X.append((X[train] - scaler.mean_) / scaler.scale_)
+            pending_y.append(y[train])
+            if np.unique(np.concatenate(pending_y)).size < n_classes:
+                continue
+            if ready is not None:
+                rows += fit(*ready)
+            ready = np.concatenate(pending_X), np.concatenate(pending_y)
+            pending_X, pending_y = [], []
+        if ready is not None:
+            rows += fit(np.concatenate([ready[0]] + pending_X), np.concatenate([ready[1]] + pending_y))
+        if on_epoch is not None:
+            on_epoch(epoch, rows)
+    if not hasattr(model, "coef_"):
+        raise ValueError(f"no chunk contained all {n_classes} classes; nothing to train on")
+    return model, rows
+
+
+def evaluate(stream, engines):
+    """Held-out accuracy and confusion matrix (true x predicted) per engine.
+
+    `engines` maps a name to (engine, FeaturePlan), so each model sees its own features.
+    """
+    n_classes = len(LEVELS)
+    confusion = {name: np.zeros((n_classes, n_classes), dtype=np.int64) for name in engines}
+    for scores, genders, y, held_out in stream.raw():
+        scores, genders = scores[held_out], genders[held_out]
+        for name, (engine, plan) in engines.items():
+            predicted, _ = engine.predict(plan.build(scores[:, 0], scores[:, 1], scores[:, 2], genders))
+            confusion[name] += np.bincount(
+                y[held_out] * n_classes + predicted, minlength=n_classes * n_classes
+            ).reshape(n_classes, n_classes)
+    return {
+        name: {
+            "rows": int(matrix.sum()),
+            "accuracy": float(np.trace(matrix) / max(matrix.sum(), 1)),
+            "confusion": matrix.tolist(),
+        }
+        for name, matrix in confusion.items()
+    }
+
+
+def write_artifacts(out_dir, model, scaler, feature_columns):
+    """Write the three joblib files and fused_model.npz to `out_dir` atomically."""
+    import joblib
+
+    from artifacts import ARTIFACT_PATHS, FUSED_MODEL_NAME, artifact_hash
+    from inference import FusedModel, check_parity
+
+    parity = check_parity(model, scaler, feature_columns)
+    if not parity["ok"]:
+        raise ValueError(f"fused model doesn't match scikit-learn: {parity}")
+    if os.path.exists(out_dir):
+        raise FileExistsError(f"{out_dir} already exists; versions are immutable")
+    parent = os.path.dirname(os.path.abspath(out_dir))
+    os.makedirs(parent, exist_ok=True)
+    staging = os.path.join(parent, f".{os.path.basename(out_dir)}.tmp")
+    os.makedirs(staging)
+    try:
+        paths = tuple(os.path.join(staging, os.path.basename(p)) for p in ARTIFACT_PATHS)
+        for obj, path in zip((model, scaler, list(feature_columns)), paths):
+            joblib.dump(obj, path)
+        FusedModel.from_sklearn(model, scaler).save(
+            os.path.join(staging, FUSED_MODEL_NAME), model_hash=artifact_hash(paths), feature_columns=list(feature_columns),
+        )
+        os.rename(staging, out_dir)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return out_dir
+
+
+def _baseline(directory):
+    from artifacts import ARTIFACT_PATHS, read_artifacts
+
+    paths = tuple(os.path.join(directory, os.path.basename(p)) for p in ARTIFACT_PATHS)
+    if not all(os.path.isfile(p) for p in paths):
+        return None
+    return read_artifacts(paths)
+
+
+# ---------------------- CLI ----------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the model artifacts from CSV/Parquet files in chunks.")
+    parser.add_argument("inputs", nargs="+")
+    parser.add_argument("--out", default=os.path.join("models", time.strftime("%Y-%m-%d-%H%M%S")),
+                        help="new version directory (default: models/<timestamp>)")
+    parser.add_argument("--label", help="label column (default: 60/80 bucket of the average score)")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    parser.add_argument("--batch-iter", type=int, default=BATCH_ITER, help="solver iterations per chunk")
+    parser.add_argument("--C", type=float, default=1.0, help="inverse regularization strength")
+    parser.add_argument("--holdout", type=float, default=HOLDOUT)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=".", help="directory with the artifacts to compare against")
+    parser.add_argument("--min-accuracy", type=float, default=0.0, help="don't write artifacts below this")
+    args = parser.parse_args(argv)
+
+    from inference import FusedModel
+
+    plan = FeaturePlan(FEATURE_COLUMNS)
+    stream = Stream(args.inputs, plan, args.chunksize, args.label, args.holdout, args.seed)
+    report = {"inputs": args.inputs, "chunksize": args.chunksize, "epochs": args.epochs, "passes": {}}
+
+    def timed(name, rows, seconds):
+        report["passes"][name] = {"rows": rows, "seconds": round(seconds, 3), "rows_per_s": round(rows / max(seconds, 1e-9))}
+        print(f"  {name:<12} {rows:>12,} rows  {seconds:8.2f}s  {rows / max(seconds, 1e-9):>12,.0f} rows/s", file=sys.stderr)
+
+    start = time.perf_counter()
+    print(f"Training on {', '.join(args.inputs)} in chunks of {args.chunksize:,}:", file=sys.stderr)
+    scaler, rows = fit_scaler(stream, FEATURE_COLUMNS)
+    timed("scaler", rows, time.perf_counter() - start)
+
+    epoch_start = [time.perf_counter()]
+
+    def on_epoch(epoch, rows_so_far):
+        now = time.perf_counter()
+        timed(f"epoch {epoch + 1}", rows_so_far // (epoch + 1), now - epoch_start[0])
+        epoch_start[0] = now
+
+    model, _ = fit_model(stream, scaler, args.epochs, args.batch_iter, args.C, on_epoch=on_epoch)
+
+    engines = {"new": (FusedModel.from_sklearn(model, scaler), plan)}
+    baseline = _baseline(args.baseline)
+    if baseline is not None:
+        engines["baseline"] = (baseline.engine, baseline.plan)
+    eval_start = time.perf_counter()
+    report["holdout"] = evaluate(stream, engines)
+    timed("evaluate", report["holdout"]["new"]["rows"], time.perf_counter() - eval_start)
+
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    report["peak_rss_mb"] = _peak_rss_mb()
+    accuracy = report["holdout"]["new"]["accuracy"]
+    if accuracy < args.min_accuracy:
+        report["written"] = None
+        print(json.dumps(report, indent=2))
+        print(f"Held-out accuracy {accuracy:.4f} is below --min-accuracy {args.min_accuracy}; nothing written.", file=sys.stderr)
+        return 1
+    report["written"] = write_artifacts(args.out, model, scaler, FEATURE_COLUMNS)
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
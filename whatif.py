@@ -0,0 +1,97 @@
+"""What-if probability surfaces: score every combination of two subjects at once.
+
+`probability_surface` fixes the third score and the gender, builds the full
+(GRID_SIZE x GRID_SIZE) grid of the other two subjects - 10,201 students for
+0..100 - and scores it in one batched call through the same feature plan and
+model (or prediction table) as a single prediction. The result is indexed
+[y, x], the way a heatmap draws it.
+
+    python whatif.py   # time a full surface on the current model
+"""
+import sys
+import time
+
+import numpy as np
+
+SUBJECTS = ("Math", "Reading", "Writing")
+GRID_SIZE = 101
+GRID = np.arange(GRID_SIZE)
+
+# Row-major grid coordinates, built once: x varies fastest
+_GRID_X = np.tile(GRID, GRID_SIZE)
+_GRID_Y = np.repeat(GRID, GRID_SIZE)
+
+
+class Surface:
+    def __init__(self, x_subject, y_subject, fixed_subject, fixed_score, gender, labels, probabilities, seconds):
+        self.x_subject = x_subject
+        self.y_subject = y_subject
+        self.fixed_subject = fixed_subject
+        self.fixed_score = fixed_score
+        self.gender = gender
+        self.labels = labels                # (GRID_SIZE, GRID_SIZE) class index, [y, x]
+        self.probabilities = probabilities  # (GRID_SIZE, GRID_SIZE, n_classes)
+        self.seconds = seconds
+
+    def confidence(self):
+        """Probability of the predicted class at every grid point."""
+        return self.probabilities.max(axis=2)
+
+    def needed(self, x, y, target):
+        """Lowest y' >= y at which (x, y') is predicted `target` or better, or None.
+
+        Answers "how far would the y subject have to rise to reach `target`",
+        holding the x subject where it is.
+        """
+        column = self.labels[y:, x]
+        reached = np.flatnonzero(column >= target)
+        return int(y + reached[0]) if reached.size else None
+
+
+def probability_surface(model, x_subject, y_subject, fixed_score, gender):
+    """Score all GRID_SIZE**2 combinations of `x_subject` and `y_subject` in one call.
+
+    `model` is an Artifacts snapshot (registry.current()); the third subject is
+    held at `fixed_score`.
+    """
+    if x_subject == y_subject:
+        raise ValueError("pick two different subjects")
+    start = time.perf_counter()
+    fixed_subject = next(s for s in SUBJECTS if s not in (x_subject, y_subject))
+    n = GRID_SIZE * GRID_SIZE
+    scores = {x_subject: _GRID_X, y_subject: _GRID_Y, fixed_subject: np.full(n, fixed_score)}
+    math, reading, writing = (scores[s] for s in SUBJECTS)
+    # 0/1 codes rather than 10k copies of the label, which would be lower-cased one by one
+    gender_encoded = np.full(n, 0 if gender.lower() == "female" else 1)
+
+    if model.table is not None:
+        labels, probs = model.table.predict(math, reading, writing, gender_encoded)
+    else:
+        labels, probs = model.engine.predict(model.plan.build(math, reading, writing, gender_encoded))
+
+    shape = (GRID_SIZE, GRID_SIZE)
+    return Surface(
+        x_subject, y_subject, fixed_subject, fixed_score, gender,
+        np.asarray(labels).reshape(shape), np.asarray(probs).reshape(shape + (-1,)),
+        time.perf_counter() - start,
+    )
+
+
+def main(argv=None):
+    from registry import ModelRegistry
+
+    model = ModelRegistry(poll_seconds=0).load()
+    times = []
+    for i in range(50):
+        surface = probability_surface(model, "Math", "Reading", i * 2, "Female" if i % 2 else "Male")
+        times.append(surface.seconds)
+    print(
+        f"{GRID_SIZE}x{GRID_SIZE} surface ({model.record['runtime']} runtime, "
+        f"table {'on' if model.table is not None else 'off'}): "
+        f"median {np.median(times) * 1000:.2f} ms, min {min(times) * 1000:.2f} ms over {len(times)} runs"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())